@@ -0,0 +1,107 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+"""Informes nocturnos de saldos vencidos y uso razonable de todos los clientes.
+
+Uso::
+
+    python -m backend.analytics saldos --output saldos.csv --solo-vencidos
+    python -m backend.analytics uso --desde 2024-05-01 --hasta 2024-05-31 --percentil 95 --output uso.csv
+
+Requiere ``pip install -r requirements-analytics.txt``.
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import sys
+import time
+from contextlib import nullcontext
+from datetime import date
+from typing import Any, Dict, Iterable, Sequence
+
+from backend.app_factory import create_app
+from backend.models import db
+from backend.services.analytics_service import (
+    DEFAULT_CHUNK_SIZE,
+    AnalyticsError,
+    compute_balances,
+    compute_usage,
+    load_external_ids,
+)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Informes de saldos y uso de todos los clientes.")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Filas leídas por bloque.")
+    parser.add_argument("--output", help="Fichero CSV de salida; por defecto, la salida estándar.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    balances = commands.add_parser("saldos", help="Saldo pendiente y vencido por cliente.")
+    balances.add_argument("--fecha", type=date.fromisoformat, help="Fecha de referencia para el vencimiento.")
+    balances.add_argument("--solo-vencidos", action="store_true", help="Incluye solo clientes con importes vencidos.")
+
+    usage = commands.add_parser("uso", help="Consumo por cliente y percentiles entre clientes.")
+    usage.add_argument("--desde", type=date.fromisoformat, required=True, help="Primera fecha (AAAA-MM-DD).")
+    usage.add_argument("--hasta", type=date.fromisoformat, required=True, help="Última fecha (AAAA-MM-DD).")
+    usage.add_argument("--percentil", type=float, help="Incluye solo clientes por encima de este percentil de datos.")
+    return parser
+
+
+def _write_csv(path: str | None, records: Iterable[Dict[str, Any]], fieldnames: Sequence[str]) -> None:
+    with (open(path, "w", newline="", encoding="utf-8") if path else nullcontext(sys.stdout)) as handle:
+        writer = csv.DictWriter(handle, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(records)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    app = create_app()
+    with app.app_context():
+        started = time.perf_counter()
+        try:
+            with db.engine.connect() as connection:
+                external_ids = load_external_ids(connection)
+                if args.command == "saldos":
+                    report = compute_balances(connection, args.fecha, chunk_size=args.chunk_size)
+                    if args.solo_vencidos:
+                        report = report.overdue()
+                    _write_csv(args.output, report.records(external_ids), ["cliente_id", "saldo", "vencido"])
+                    app.logger.info(
+                        "Saldos a %s: %s clientes, pendiente %s, vencido %s (%s facturas en %.2fs)",
+                        report.as_of,
+                        report.customer_ids.size,
+                        report.total_outstanding,
+                        report.total_overdue,
+                        report.rows_read,
+                        time.perf_counter() - started,
+                    )
+                else:
+                    report = compute_usage(connection, args.desde, args.hasta, chunk_size=args.chunk_size)
+                    records = report.records(external_ids)
+                    if args.percentil is not None:
+                        selected = set(report.above(args.percentil).tolist())
+                        records = (
+                            record
+                            for customer_id, record in zip(report.customer_ids.tolist(), records)
+                            if customer_id in selected
+                        )
+                    _write_csv(args.output, records, ["cliente_id", "consumo_mb", "minutos"])
+                    app.logger.info(
+                        "Uso %s a %s: %s clientes, percentiles de datos %s (%s periodos en %.2fs)",
+                        report.start,
+                        report.end,
+                        report.customer_ids.size,
+                        report.percentiles.get("data_used_mb", {}),
+                        report.rows_read,
+                        time.perf_counter() - started,
+                    )
+        except AnalyticsError as error:
+            app.logger.error("%s", error)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -3,19 +3,34 @@
 from __future__ import annotations
 
 import os
-import socket
 from logging.config import dictConfig
-from typing import Any, Dict
+from typing import Any, Dict, List, NamedTuple
 
-from sqlalchemy.engine import make_url
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.exc import ArgumentError
 
 from flask import Flask, jsonify
 from flask_cors import CORS
 from werkzeug.exceptions import HTTPException
 
+from backend.instrumentation import DEFAULT_QUERY_BUDGET, init_instrumentation
+from backend.json_provider import init_json
 from backend.models import db
+from backend.pooling import instrument_engine, pool_engine_options
+from backend.routing import (
+    DEFAULT_PROBE_TIMEOUT,
+    ROUTER_EXTENSION_KEY,
+    CircuitBreaker,
+    DatabaseRouter,
+    Replica,
+    ReplicaSet,
+)
 from backend.routes.consumption import consumption_bp
+from backend.routes.health import health_bp
+from backend.services.aggregation_service import register_rollup_hooks
+from backend.services.cache import CacheBackend, MemoryCache, RedisCache, SQLiteCache, init_cache
+from backend.services.summary_service import register_summary_hooks
 
 
 DEFAULT_LOGGING_CONFIG: Dict[str, Any] = {
@@ -39,15 +54,6 @@ DEFAULT_LOGGING_CONFIG: Dict[str, Any] = {
 }
 
 
-def _can_connect(host: str, port: int, timeout: float = 1.0) -> bool:
-    """Verifica si se puede establecer una conexión TCP al host y puerto especificados."""
-    try:
-        with socket.create_connection((host, port), timeout):
-            return True
-    except OSError:
-        return False
-
-
 def _is_fallback_enabled(app: Flask) -> bool:
     """Determina si se debe habilitar el uso de la base de datos de respaldo."""
     env_override = app.config.get("DB_FALLBACK_ENABLED")
@@ -82,20 +88,147 @@ def configure_database(app: Flask) -> None:
     except ArgumentError:
         url = None
 
-    if url and url.host and url.get_backend_name() in {"mysql"}:
-        port = int(url.port or 3306)
-        if _is_fallback_enabled(app) and not _can_connect(url.host, port):
-            app.logger.warning(
-                "No se pudo conectar a %s:%s. Se usará la base de datos SQLite de respaldo en %s.",
-                url.host,
-                port,
-                fallback_uri,
-            )
-            uri = fallback_uri
-
+    # La disponibilidad del servidor no se comprueba aquí: el enrutador decide
+    # al primer uso si hay que recurrir a la base de respaldo.
+    use_fallback = bool(
+        url and url.host and url.get_backend_name() in {"mysql"} and uri != fallback_uri and _is_fallback_enabled(app)
+    )
     app.config["SQLALCHEMY_DATABASE_URI"] = uri
 
+    engine_options = dict(app.config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+    for option, value in pool_engine_options(app, uri).items():
+        engine_options.setdefault(option, value)
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options
+
     db.init_app(app)
+    with app.app_context():
+        instrument_engine(db.engine)
+        configure_routing(app, fallback_uri if use_fallback else None)
+    register_summary_hooks()
+    register_rollup_hooks()
+
+
+def _standalone_engine(app: Flask, uri: str) -> Engine:
+    """Crea un engine adicional resolviendo rutas SQLite relativas como Flask-SQLAlchemy."""
+
+    url = make_url(uri)
+    database = url.database
+    if url.get_backend_name() == "sqlite" and database and database != ":memory:" and not os.path.isabs(database):
+        os.makedirs(app.instance_path, exist_ok=True)
+        url = url.set(database=os.path.join(app.instance_path, database))
+    return create_engine(url, **pool_engine_options(app, uri))
+
+
+def _config_value(app: Flask, key: str, default: Any) -> Any:
+    value = app.config.get(key)
+    if value is None:
+        value = os.getenv(key, default)
+    return value
+
+
+def _replica_uris(app: Flask) -> List[str]:
+    value = _config_value(app, "DB_REPLICA_URIS", "")
+    if isinstance(value, str):
+        value = value.split(",")
+    return [uri.strip() for uri in value if uri and uri.strip()]
+
+
+def _build_replicas(app: Flask, uris: List[str]) -> ReplicaSet:
+    max_lag = _config_value(app, "DB_REPLICA_MAX_LAG", 10)
+    retry_after = float(_config_value(app, "DB_REPLICA_RETRY_SECONDS", 30))
+    probe_timeout = float(_config_value(app, "DB_PROBE_TIMEOUT", DEFAULT_PROBE_TIMEOUT))
+    replicas = [
+        Replica(
+            _standalone_engine(app, uri),
+            breaker=CircuitBreaker(retry_after=retry_after),
+            max_lag=float(max_lag) if max_lag not in (None, "") else None,
+            lag_check_interval=float(_config_value(app, "DB_REPLICA_LAG_CHECK_SECONDS", 5)),
+            probe_timeout=probe_timeout,
+        )
+        for uri in uris
+    ]
+    return ReplicaSet(replicas, strategy=_config_value(app, "DB_REPLICA_STRATEGY", "round_robin"))
+
+
+def configure_routing(app: Flask, fallback_uri: str | None) -> None:
+    """Registra el enrutador de respaldo y réplicas de lectura, si hay alguno configurado.
+
+    ``DB_REPLICA_URIS`` acepta una lista o una cadena separada por comas.
+    """
+
+    replica_uris = _replica_uris(app)
+    if fallback_uri is None and not replica_uris:
+        app.extensions.pop(ROUTER_EXTENSION_KEY, None)
+        return
+
+    threshold = _config_value(app, "DB_FALLBACK_FAILURE_THRESHOLD", 1)
+    retry_after = _config_value(app, "DB_FALLBACK_RETRY_SECONDS", 30)
+    app.extensions[ROUTER_EXTENSION_KEY] = DatabaseRouter(
+        db.engine,
+        fallback=_standalone_engine(app, fallback_uri) if fallback_uri else None,
+        breaker=CircuitBreaker(failure_threshold=int(threshold), retry_after=float(retry_after)),
+        replicas=_build_replicas(app, replica_uris) if replica_uris else None,
+        probe_timeout=float(_config_value(app, "DB_PROBE_TIMEOUT", DEFAULT_PROBE_TIMEOUT)),
+    )
+    app.logger.debug(
+        "Enrutado de base de datos: respaldo=%s réplicas=%s", fallback_uri, len(replica_uris)
+    )
+
+
+def _config_flag(app: Flask, key: str, default: bool) -> bool:
+    value = app.config.get(key)
+    if value is None:
+        raw_value = os.getenv(key)
+        if raw_value is None:
+            return default
+        return raw_value.lower() not in {"0", "false", "no"}
+    return bool(value)
+
+
+def _build_cache(app: Flask, backend: str, max_entries: int, ttl: float) -> CacheBackend:
+    if backend == "memory":
+        return MemoryCache(max_entries=max_entries, ttl=ttl)
+    if backend == "sqlite":
+        path = app.config.get("CUSTOMER_CACHE_PATH") or os.getenv(
+            "CUSTOMER_CACHE_PATH", os.path.join(app.instance_path, "customer-cache.sqlite3")
+        )
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        return SQLiteCache(path, max_entries=max_entries, ttl=ttl)
+    if backend == "redis":
+        url = app.config.get("CUSTOMER_CACHE_REDIS_URL") or os.getenv("CUSTOMER_CACHE_REDIS_URL")
+        return RedisCache(url, ttl=ttl, client=app.config.get("CUSTOMER_CACHE_REDIS_CLIENT"))
+    raise ValueError(f"Backend de caché no soportado: {backend!r}")
+
+
+def configure_cache(app: Flask) -> None:
+    """Configura la caché de perfiles y resúmenes de consumo.
+
+    ``CUSTOMER_CACHE_BACKEND`` admite ``memory`` (por proceso), ``sqlite``
+    (fichero compartido entre los procesos del host) y ``redis``.
+    """
+
+    if not _config_flag(app, "CUSTOMER_CACHE_ENABLED", True):
+        init_cache(app, None)
+        return
+
+    backend = (app.config.get("CUSTOMER_CACHE_BACKEND") or os.getenv("CUSTOMER_CACHE_BACKEND", "memory")).lower()
+    max_entries = int(app.config.get("CUSTOMER_CACHE_MAX_ENTRIES") or os.getenv("CUSTOMER_CACHE_MAX_ENTRIES", 10_000))
+    ttl = float(app.config.get("CUSTOMER_CACHE_TTL") or os.getenv("CUSTOMER_CACHE_TTL", 60))
+    init_cache(app, _build_cache(app, backend, max_entries, ttl))
+
+
+def configure_json(app: Flask) -> None:
+    """Instala el proveedor JSON de ``JSON_PROVIDER`` (``auto``, ``orjson`` o ``stdlib``)."""
+
+    init_json(app, str(_config_value(app, "JSON_PROVIDER", "auto")))
+
+
+def configure_instrumentation(app: Flask) -> None:
+    """Activa las métricas por petición, ``Server-Timing`` y el aviso de N+1."""
+
+    if not _config_flag(app, "REQUEST_METRICS_ENABLED", True):
+        return
+    init_instrumentation(app, int(_config_value(app, "REQUEST_QUERY_BUDGET", DEFAULT_QUERY_BUDGET)))
 
 
 def configure_logging(config: Dict[str, Any] | None = None) -> None:
@@ -112,9 +245,13 @@ def create_app(config: Dict[str, Any] | None = None) -> Flask:
         app.config.update(config)
 
     configure_logging(app.config.get("LOGGING_CONFIG"))
+    configure_json(app)
     configure_database(app)
+    configure_cache(app)
     configure_cors(app)
 
+    configure_instrumentation(app)
+
     register_blueprints(app)
     register_error_handlers(app)
 
@@ -124,6 +261,7 @@ def create_app(config: Dict[str, Any] | None = None) -> Flask:
 
 def register_blueprints(app: Flask) -> None:
     app.register_blueprint(consumption_bp)
+    app.register_blueprint(health_bp)
 
 
 def register_error_handlers(app: Flask) -> None:
@@ -139,8 +277,15 @@ def register_error_handlers(app: Flask) -> None:
         return jsonify(response), 500
 
 
-def configure_cors(app: Flask) -> None:
-    """Configura CORS para permitir el acceso desde el frontend."""
+class CorsSettings(NamedTuple):
+    """Orígenes permitidos para ``/api/*`` y si se admiten credenciales."""
+
+    origins: List[str]
+    supports_credentials: bool
+
+
+def cors_settings(app: Flask) -> CorsSettings:
+    """Lee ``CORS_ORIGINS`` y ``CORS_SUPPORTS_CREDENTIALS`` de la configuración o del entorno."""
 
     origins = app.config.get("CORS_ORIGINS") or os.getenv("CORS_ORIGINS")
     if origins:
@@ -151,12 +296,29 @@ def configure_cors(app: Flask) -> None:
     supports_credentials = app.config.get("CORS_SUPPORTS_CREDENTIALS")
     if supports_credentials is None:
         supports_credentials = allowed_origins != ["*"]
+    return CorsSettings(allowed_origins, bool(supports_credentials))
+
+
+def configure_cors(app: Flask) -> None:
+    """Configura CORS para permitir el acceso desde el frontend."""
 
+    settings = cors_settings(app)
     CORS(
         app,
-        resources={r"/api/*": {"origins": allowed_origins}},
-        supports_credentials=supports_credentials,
+        resources={r"/api/*": {"origins": settings.origins}},
+        supports_credentials=settings.supports_credentials,
     )
 
 
-__all__ = ["create_app", "configure_logging", "configure_database", "configure_cors"]
+__all__ = [
+    "create_app",
+    "configure_logging",
+    "configure_json",
+    "configure_instrumentation",
+    "configure_database",
+    "configure_routing",
+    "configure_cache",
+    "configure_cors",
+    "cors_settings",
+    "CorsSettings",
+]
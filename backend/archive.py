@@ -0,0 +1,54 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+"""Traslada los consumos antiguos a ``consumptions_archive`` en lotes.
+
+Uso::
+
+    python -m backend.archive --retencion 24
+    python -m backend.archive --retencion 12 --lote 500 --pausa 0.2 --max-lotes 1000
+"""
+from __future__ import annotations
+
+import argparse
+from datetime import date
+from typing import Sequence
+
+from backend.app_factory import create_app
+from backend.models import db
+from backend.services.archive_service import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_RETENTION_MONTHS,
+    archive_consumptions,
+    archive_cutoff,
+)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Archiva los consumos fuera del periodo de retención.")
+    parser.add_argument(
+        "--retencion", type=int, default=DEFAULT_RETENTION_MONTHS, help="Meses que permanecen en la tabla caliente."
+    )
+    parser.add_argument("--fecha", type=date.fromisoformat, help="Fecha de referencia (AAAA-MM-DD); hoy por defecto.")
+    parser.add_argument("--lote", type=int, default=DEFAULT_BATCH_SIZE, help="Consumos por transacción.")
+    parser.add_argument("--pausa", type=float, default=0.0, help="Segundos de espera entre lotes.")
+    parser.add_argument("--max-lotes", type=int, help="Lotes máximos en esta ejecución.")
+    args = parser.parse_args(argv)
+
+    cutoff = archive_cutoff(args.retencion, args.fecha)
+    app = create_app()
+    with app.app_context():
+        with db.engine.connect() as connection:
+            stats = archive_consumptions(connection, cutoff, args.lote, args.pausa, args.max_lotes)
+        app.logger.info(
+            "Archivados %s consumos anteriores a %s en %s lotes en %.2fs (%.0f filas/s)",
+            stats.rows,
+            cutoff.isoformat(),
+            stats.batches,
+            stats.elapsed,
+            stats.rows_per_second,
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
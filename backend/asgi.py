@@ -0,0 +1,252 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+"""Modo de servicio asíncrono (ASGI) para los endpoints de consumo y clientes.
+
+``/api/consumo``, ``/api/cliente``, ``/api/dashboard`` y ``/api/clientes/batch``
+esperan a la base de datos sobre ``asyncio`` con el engine asíncrono de
+SQLAlchemy, de modo que un único proceso puede mantener miles de peticiones
+concurrentes sin reservar un hilo por cada una. Cualquier otra petición
+(historial, agregados, ``/health``, ``/metrics``, preflight CORS...) la
+atiende la propia aplicación Flask a través de ``a2wsgi``, así que no existe
+una segunda copia de la API::
+
+    uvicorn --factory backend.asgi:create_asgi_app --host 0.0.0.0 --port 5000
+
+Las rutas nativas comparten con ``consumption_bp`` los servicios, la
+validación, la composición de lotes, los validadores ETag y la configuración
+CORS. No usan la caché de resultados (síncrona), las réplicas de lectura ni
+la instrumentación por petición; las rutas delegadas sí.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+from urllib.parse import parse_qsl
+
+from a2wsgi import WSGIMiddleware
+from flask import Flask
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from werkzeug.http import http_date, is_resource_modified, quote_etag
+
+from backend.app_factory import cors_settings, create_app
+from backend.json_provider import dumps_bytes
+from backend.models import db
+from backend.pooling import pool_engine_options
+from backend.routing import get_router
+from backend.routes.consumption import (
+    DEFAULT_CACHE_CONTROL,
+    componer_lote,
+    etiqueta_version,
+    validar_id_cliente,
+    validar_ids_lote,
+)
+from backend.services import CustomerNotFoundError, CustomerServiceError, CustomerValidators
+from backend.services import async_customer_service as service
+
+
+logger = logging.getLogger(__name__)
+
+ASYNC_DRIVERS = {"mysql": "aiomysql", "sqlite": "aiosqlite"}
+DEFAULT_WSGI_THREADS = 10
+
+Scope = Dict[str, Any]
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+Headers = List[Tuple[str, str]]
+Response = Tuple[int, Headers, bytes]
+
+
+class Request:
+    """Vista mínima de una petición HTTP ASGI dirigida a una ruta nativa."""
+
+    def __init__(self, scope: Scope, body: bytes) -> None:
+        self.method: str = scope["method"]
+        self.path: str = scope["path"]
+        self.query: Dict[str, str] = {}
+        for name, value in parse_qsl(scope.get("query_string", b"").decode("latin-1")):
+            self.query.setdefault(name, value)
+        self.headers: Dict[str, str] = {
+            name.decode("latin-1").lower(): value.decode("latin-1") for name, value in scope.get("headers", [])
+        }
+        self.body = body
+
+    def json(self) -> Any:
+        try:
+            return json.loads(self.body or b"null")
+        except ValueError:
+            return None
+
+
+def async_database_url(url: URL | str) -> URL:
+    """Sustituye el driver síncrono de la URL por su equivalente asíncrono."""
+
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No hay driver asíncrono configurado para {backend!r}")
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+
+
+def _json_response(status: int, payload: Any, headers: Headers | None = None) -> Response:
+    return status, [("content-type", "application/json"), *(headers or [])], dumps_bytes(payload)
+
+
+class AsyncConsumptionApp:
+    """Aplicación ASGI: rutas de lectura de clientes nativas y el resto delegado en Flask."""
+
+    def __init__(self, engine: AsyncEngine, flask_app: Flask) -> None:
+        self.engine = engine
+        self.flask_app = flask_app
+        self.sessionmaker = async_sessionmaker(engine, expire_on_commit=False)
+        self.cache_control = flask_app.config.get("API_CACHE_CONTROL", DEFAULT_CACHE_CONTROL)
+        self.cors = cors_settings(flask_app)
+        threads = flask_app.config.get("ASGI_WSGI_THREADS") or os.getenv("ASGI_WSGI_THREADS", DEFAULT_WSGI_THREADS)
+        self.wsgi = WSGIMiddleware(flask_app, workers=int(threads))
+        self.routes: Dict[Tuple[str, str], Callable[[AsyncSession, Request], Awaitable[Response]]] = {
+            ("GET", "/api/consumo"): self._condicional("consumo", service.get_consumption_summary),
+            ("GET", "/api/cliente"): self._condicional("perfil", service.get_customer_profile),
+            ("GET", "/api/dashboard"): self._dashboard,
+            ("POST", "/api/clientes/batch"): self._lote,
+        }
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        handler = self.routes.get((scope.get("method"), scope.get("path"))) if scope["type"] == "http" else None
+        if handler is None:
+            await self.wsgi(scope, receive, send)
+            return
+
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+        request = Request(scope, body)
+        status, headers, payload = await self._dispatch(handler, request)
+        headers = headers + self._cors_headers(request)
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [(name.encode("latin-1"), value.encode("latin-1")) for name, value in headers],
+            }
+        )
+        await send({"type": "http.response.body", "body": payload})
+
+    async def _lifespan(self, receive: Receive, send: Send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.engine.dispose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _dispatch(
+        self, handler: Callable[[AsyncSession, Request], Awaitable[Response]], request: Request
+    ) -> Response:
+        try:
+            async with self.sessionmaker() as session:
+                return await handler(session, request)
+        except ValueError as error:
+            return _json_response(400, {"mensaje": str(error)})
+        except CustomerNotFoundError as error:
+            return _json_response(404, {"mensaje": str(error)})
+        except CustomerServiceError as error:
+            logger.exception("Error atendiendo %s: %s", request.path, error)
+            return _json_response(500, {"mensaje": "Error interno del servidor"})
+        except Exception as error:
+            logger.exception("Excepción no controlada: %s", error)
+            return _json_response(500, {"mensaje": "Error interno del servidor"})
+
+    def _validada(
+        self, request: Request, namespace: str, validators: CustomerValidators, payload: Any | None
+    ) -> Response:
+        """Equivalente de ``_respuesta_validada``: 304 si el cliente ya tiene la versión vigente."""
+
+        etag = etiqueta_version(namespace, validators)
+        headers: Headers = [
+            ("etag", quote_etag(etag)),
+            ("last-modified", http_date(validators.last_modified)),
+            ("cache-control", self.cache_control),
+        ]
+        environ = {
+            "REQUEST_METHOD": request.method,
+            "HTTP_IF_NONE_MATCH": request.headers.get("if-none-match", ""),
+            "HTTP_IF_MODIFIED_SINCE": request.headers.get("if-modified-since", ""),
+        }
+        if not is_resource_modified(environ, etag=etag, last_modified=validators.last_modified):
+            return 304, headers, b""
+        return _json_response(200, payload, headers) if payload is not None else (200, headers, b"")
+
+    def _condicional(
+        self, namespace: str, build: Callable[[AsyncSession, str], Awaitable[Dict[str, Any]]]
+    ) -> Callable[[AsyncSession, Request], Awaitable[Response]]:
+        async def handler(session: AsyncSession, request: Request) -> Response:
+            customer_id = validar_id_cliente(request.query.get("customer_id"))
+            validators = await service.get_customer_validators(session, customer_id)
+            status, headers, _ = self._validada(request, namespace, validators, None)
+            if status == 304:
+                return status, headers, b""
+            return _json_response(200, await build(session, customer_id), headers)
+
+        return handler
+
+    async def _dashboard(self, session: AsyncSession, request: Request) -> Response:
+        view = await service.get_dashboard_view(session, validar_id_cliente(request.query.get("customer_id")))
+        return self._validada(request, "dashboard", view.validators, view.data)
+
+    async def _lote(self, session: AsyncSession, request: Request) -> Response:
+        customer_ids = validar_ids_lote(request.json())
+        profiles = await service.get_customer_profiles(session, customer_ids)
+        return _json_response(200, componer_lote(customer_ids, profiles))
+
+    def _cors_headers(self, request: Request) -> Headers:
+        """Cabeceras CORS de una respuesta nativa con la configuración de ``configure_cors``.
+
+        Las peticiones preflight no llegan aquí: ``OPTIONS`` se delega en Flask.
+        """
+
+        origin = request.headers.get("origin")
+        if not origin:
+            return []
+        if self.cors.origins == ["*"] and not self.cors.supports_credentials:
+            return [("access-control-allow-origin", "*")]
+        if self.cors.origins != ["*"] and origin not in self.cors.origins:
+            return []
+        headers: Headers = [("access-control-allow-origin", origin), ("vary", "Origin")]
+        if self.cors.supports_credentials:
+            headers.append(("access-control-allow-credentials", "true"))
+        return headers
+
+
+def create_asgi_app(config: Dict[str, Any] | None = None) -> AsyncConsumptionApp:
+    """Crea la aplicación ASGI reutilizando la configuración de ``create_app``.
+
+    Las rutas nativas usan el engine activo del enrutador al arrancar: si el
+    servidor MySQL no responde y el respaldo está habilitado, se conectan a la
+    base SQLite de respaldo hasta el siguiente reinicio. Las rutas delegadas en
+    Flask siguen pasando por el *circuit breaker* en cada petición.
+    """
+
+    flask_app = create_app(config)
+    with flask_app.app_context():
+        router = get_router()
+        url = (router.active_engine() if router is not None else db.engine).url
+    uri = url.render_as_string(hide_password=False)
+    engine_options = {
+        option: value for option, value in pool_engine_options(flask_app, uri).items() if option != "poolclass"
+    }
+    engine = create_async_engine(async_database_url(url), **engine_options)
+    flask_app.logger.info("Modo ASGI usando %s", engine.url.render_as_string(hide_password=True))
+    return AsyncConsumptionApp(engine, flask_app)
+
+
+__all__ = ["AsyncConsumptionApp", "async_database_url", "create_asgi_app"]
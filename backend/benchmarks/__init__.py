@@ -0,0 +1,3 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+"""Benchmarks de rendimiento del backend."""
@@ -0,0 +1,141 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+"""Compara viajes a la base de datos y latencia del perfil de cliente.
+
+Ejecuta la ruta anterior (tres consultas secuenciales) frente a la consulta
+única de ``customer_service`` sobre una base SQLite temporal::
+
+    python -m backend.benchmarks.bench_customer_profile --customers 2000 --periods 12
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from datetime import date
+from decimal import Decimal
+from typing import Callable, Dict, List
+
+from sqlalchemy import event, func, select
+
+from backend.app_factory import create_app
+from backend.models import Billing, Consumption, Customer, db
+from backend.services.customer_service import get_customer_profile
+from backend.services.summary_service import rebuild_customer_summaries
+
+
+def _legacy_profile(external_id: str) -> Dict[str, float | str]:
+    """Reproduce la implementación previa de tres consultas para comparar."""
+
+    session = db.session
+    customer = session.execute(
+        select(Customer).where(Customer.external_id == external_id)
+    ).scalar_one()
+    latest = (
+        session.execute(
+            select(Consumption)
+            .where(Consumption.customer_id == customer.id)
+            .order_by(Consumption.period_end.desc(), Consumption.id.desc())
+        )
+        .scalars()
+        .first()
+    )
+    balance = session.execute(
+        select(func.coalesce(func.sum(Billing.amount), 0))
+        .where(Billing.customer_id == customer.id, Billing.paid.is_(False))
+    ).scalar_one()
+    return {
+        "cliente_id": customer.external_id,
+        "nombre": customer.full_name,
+        "saldo": float(balance or 0),
+        "consumo_mb": float(latest.data_used_mb) if latest else 0.0,
+        "minutos": float(latest.voice_minutes) if latest else 0.0,
+    }
+
+
+def seed(customers: int, periods: int) -> List[str]:
+    """Inserta clientes con su historial de consumos y facturas."""
+
+    rng = random.Random(42)
+    external_ids = [f"{index:08d}" for index in range(1, customers + 1)]
+    db.session.execute(
+        Customer.__table__.insert(),
+        [
+            {"id": index, "external_id": external_id, "full_name": f"Cliente {external_id}"}
+            for index, external_id in enumerate(external_ids, start=1)
+        ],
+    )
+    consumptions = []
+    billings = []
+    for customer_id in range(1, customers + 1):
+        for month in range(periods):
+            year, month_index = divmod(month, 12)
+            start = date(2020 + year, month_index + 1, 1)
+            consumptions.append(
+                {
+                    "customer_id": customer_id,
+                    "period_start": start,
+                    "period_end": start.replace(day=28),
+                    "data_used_mb": rng.uniform(0, 10_000),
+                    "voice_minutes": rng.uniform(0, 600),
+                }
+            )
+            billings.append(
+                {
+                    "customer_id": customer_id,
+                    "billing_date": start.replace(day=15),
+                    "amount": Decimal(rng.randint(0, 10_000)) / 100,
+                    "currency": "EUR",
+                    "paid": rng.random() > 0.2,
+                }
+            )
+    db.session.execute(Consumption.__table__.insert(), consumptions)
+    db.session.execute(Billing.__table__.insert(), billings)
+    db.session.commit()
+    with db.engine.connect() as connection:
+        rebuild_customer_summaries(connection)
+    return external_ids
+
+
+def measure(name: str, fn: Callable[[str], object], external_ids: List[str]) -> None:
+    statements = 0
+
+    def _count(*_args) -> None:
+        nonlocal statements
+        statements += 1
+
+    event.listen(db.engine, "before_cursor_execute", _count)
+    try:
+        started = time.perf_counter()
+        for external_id in external_ids:
+            fn(external_id)
+        elapsed = time.perf_counter() - started
+    finally:
+        event.remove(db.engine, "before_cursor_execute", _count)
+
+    lookups = len(external_ids)
+    print(
+        f"{name:<10} consultas/petición={statements / lookups:.2f} "
+        f"latencia_media={elapsed / lookups * 1e6:.1f}µs total={elapsed:.3f}s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--customers", type=int, default=2000)
+    parser.add_argument("--periods", type=int, default=12)
+    parser.add_argument("--lookups", type=int, default=2000)
+    args = parser.parse_args()
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://", "CUSTOMER_CACHE_ENABLED": False})
+    with app.app_context():
+        db.create_all()
+        external_ids = seed(args.customers, args.periods)
+        sample = random.Random(7).choices(external_ids, k=args.lookups)
+
+        measure("anterior", _legacy_profile, sample)
+        measure("unica", get_customer_profile, sample)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+"""Compara la serialización de respuestas con los proveedores JSON disponibles.
+
+Mide ``app.json.response`` (lo que ejecuta ``jsonify``) con cargas del
+tamaño de un perfil, de un lote de perfiles y de una página de historial::
+
+    python -m backend.benchmarks.bench_json --batch 1000 --history 500
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import timeit
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List
+
+from flask import Flask
+
+from backend.json_provider import JSON_PROVIDERS, json_provider_class
+
+
+def _profile(rng: random.Random, index: int) -> Dict[str, Any]:
+    return {
+        "cliente_id": f"{index:08d}",
+        "nombre": f"Cliente {index} Pérez",
+        "saldo": Decimal(rng.randint(0, 100_000)) / 100,
+        "consumo_mb": rng.uniform(0, 10_000),
+        "minutos": rng.uniform(0, 600),
+    }
+
+
+def payloads(batch: int, history: int) -> Dict[str, Any]:
+    rng = random.Random(42)
+    start = date(2020, 1, 1)
+    periods: List[Dict[str, Any]] = [
+        {
+            "periodo_inicio": start + timedelta(days=30 * index),
+            "periodo_fin": start + timedelta(days=30 * index + 29),
+            "consumo_mb": rng.uniform(0, 10_000),
+            "minutos": rng.uniform(0, 600),
+        }
+        for index in range(history)
+    ]
+    return {
+        "perfil": _profile(rng, 1),
+        "lote": {"clientes": [_profile(rng, index) for index in range(batch)], "errores": []},
+        "historial": {"cliente_id": "00000001", "periodos": periods, "siguiente": None},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch", type=int, default=1000, help="Perfiles del lote.")
+    parser.add_argument("--history", type=int, default=500, help="Periodos del historial.")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    samples = payloads(args.batch, args.history)
+    providers = ["stdlib"]
+    try:
+        json_provider_class("orjson")
+        providers.append("orjson")
+    except RuntimeError:
+        print("orjson no está instalado; solo se mide la librería estándar")
+
+    app = Flask(__name__)
+    for name, payload in samples.items():
+        baseline = None
+        for provider in providers:
+            app.json = JSON_PROVIDERS[provider](app)
+            with app.app_context():
+                size = len(app.json.response(payload).get_data())
+                timer = timeit.Timer(lambda: app.json.response(payload))
+                loops, _ = timer.autorange()
+                best = min(timer.repeat(repeat=args.repeat, number=loops)) / loops
+            baseline = baseline or best
+            print(
+                f"{name:<10} {provider:<7} bytes={size:<8} "
+                f"tiempo={best * 1e6:10.1f}µs aceleración={baseline / best:5.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
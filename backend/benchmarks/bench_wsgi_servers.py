@@ -0,0 +1,160 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+"""Compara peticiones por segundo del servidor de desarrollo frente a gunicorn.
+
+Siembra una base SQLite temporal, arranca cada servidor en un subproceso y
+lanza clientes HTTP concurrentes contra ``/api/dashboard``::
+
+    python -m backend.benchmarks.bench_wsgi_servers --concurrency 32 --duration 10
+"""
+from __future__ import annotations
+
+import argparse
+import http.client
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from backend.app_factory import create_app
+from backend.benchmarks.bench_customer_profile import seed
+from backend.models import db
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("GET", "/estado/pool")
+            connection.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"El servidor no respondió en el puerto {port}")
+
+
+def _server_commands(port: int, workers: int) -> Dict[str, List[str]]:
+    return {
+        "desarrollo": [sys.executable, "-m", "flask", "--app", "backend.wsgi:app", "run", "--port", str(port)],
+        "gunicorn": [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            "--config",
+            str(BACKEND_DIR / "gunicorn_conf.py"),
+            "--bind",
+            f"127.0.0.1:{port}",
+            "--workers",
+            str(workers),
+            "backend.wsgi:app",
+        ],
+    }
+
+
+def load(port: int, external_ids: List[str], concurrency: int, duration: float) -> Dict[str, float]:
+    """Mantiene ``concurrency`` clientes con keep-alive durante ``duration`` segundos."""
+
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client(seed_value: int) -> None:
+        nonlocal errors
+        rng = random.Random(seed_value)
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        local: List[float] = []
+        failed = 0
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                connection.request("GET", f"/api/dashboard?customer_id={rng.choice(external_ids)}")
+                response = connection.getresponse()
+                response.read()
+                if response.status != 200:
+                    failed += 1
+                    continue
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                connection.close()
+                connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+                continue
+            local.append(time.perf_counter() - started)
+        connection.close()
+        with lock:
+            latencies.extend(local)
+            errors += failed
+
+    threads = [threading.Thread(target=client, args=(index,)) for index in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1] if latencies else 0.0
+    return {"rps": len(latencies) / elapsed, "p99_ms": p99 * 1000, "errores": errors}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--customers", type=int, default=2000)
+    parser.add_argument("--periods", type=int, default=12)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--workers", type=int, default=None, help="Workers de gunicorn (por defecto 2 * CPUs + 1).")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        uri = f"sqlite:///{os.path.join(directory, 'bench.sqlite3')}"
+        app = create_app({"SQLALCHEMY_DATABASE_URI": uri})
+        with app.app_context():
+            db.create_all()
+            external_ids = seed(args.customers, args.periods)
+            db.engine.dispose()
+
+        from backend.gunicorn_conf import default_workers
+
+        workers = args.workers or default_workers()
+        env = {
+            **os.environ,
+            "SQLALCHEMY_DATABASE_URI": uri,
+            "PYTHONPATH": str(BACKEND_DIR.parent),
+            "GUNICORN_ACCESS_LOG": "",
+        }
+        for name in ("desarrollo", "gunicorn"):
+            port = _free_port()
+            command = _server_commands(port, workers)[name]
+            process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            try:
+                _wait_ready(port)
+                result = load(port, external_ids, args.concurrency, args.duration)
+            finally:
+                process.terminate()
+                process.wait(timeout=30)
+            print(
+                f"{name:<11} peticiones/s={result['rps']:.0f} p99={result['p99_ms']:.1f}ms "
+                f"errores={result['errores']:.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
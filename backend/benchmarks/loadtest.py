@@ -0,0 +1,277 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+"""Línea base de latencia y rendimiento de la API de consumo.
+
+``run`` siembra con ``datagen_service`` (o reutiliza) un conjunto sintético y mide p50/p95/p99 y
+peticiones por segundo de ``get_consumption_summary``, ``get_customer_profile``
+y de ``/api/consumo`` y ``/api/cliente``. Sin ``--url`` las rutas se llaman
+en proceso con el cliente de pruebas de Flask; con ``--url`` se cargan con
+``--concurrency`` clientes HTTP contra un servidor ya arrancado. El
+resultado se guarda en JSON junto con el commit para compararlo después::
+
+    python -m backend.benchmarks.loadtest run --customers 100000 --periods 24 --output base.json
+    python -m backend.benchmarks.loadtest run --database mysql+pymysql://... --skip-seed --output nuevo.json
+    python -m backend.benchmarks.loadtest compare base.json nuevo.json --threshold 0.10
+
+``compare`` termina con código 1 si el p95 de algún objetivo empeora más que
+``--threshold`` o su rendimiento cae en la misma proporción.
+"""
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Sequence
+from urllib.parse import urlsplit
+
+from backend.app_factory import create_app
+from sqlalchemy import func, select
+from sqlalchemy.engine import Connection
+
+from backend.models import Customer, db
+from backend.services.customer_service import get_consumption_summary, get_customer_profile
+from backend.services.datagen_service import GeneratorSpec, generate_dataset, next_customer_id
+
+
+HTTP_ROUTES = {"http /api/consumo": "/api/consumo", "http /api/cliente": "/api/cliente"}
+
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    """Percentil por rango más cercano de una lista ya ordenada."""
+
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def sample_external_ids(connection: Connection, size: int, seed: int) -> List[str]:
+    """Identificadores externos de hasta ``size`` clientes existentes elegidos al azar."""
+
+    first, last = connection.execute(select(func.min(Customer.id), func.max(Customer.id))).one()
+    if first is None:
+        return []
+    ids = random.Random(seed).sample(range(first, last + 1), min(size, last - first + 1))
+    return list(connection.execute(select(Customer.external_id).where(Customer.id.in_(ids))).scalars())
+
+
+def summarize(latencies: List[float], elapsed: float, errors: int = 0) -> Dict[str, float]:
+    latencies.sort()
+    count = len(latencies)
+    return {
+        "peticiones": count,
+        "errores": errors,
+        "rps": count / elapsed if elapsed else 0.0,
+        "media_ms": sum(latencies) / count * 1000 if count else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+def measure(call: Callable[[str], Any], ids: Sequence[str], duration: float, warmup: int = 50) -> Dict[str, float]:
+    """Llama a ``call`` en bucle durante ``duration`` segundos tras ``warmup`` llamadas."""
+
+    rng = random.Random(7)
+    for _ in range(warmup):
+        call(rng.choice(ids))
+    latencies: List[float] = []
+    started = time.perf_counter()
+    deadline = started + duration
+    while time.perf_counter() < deadline:
+        customer = rng.choice(ids)
+        call_started = time.perf_counter()
+        call(customer)
+        latencies.append(time.perf_counter() - call_started)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def load_http(base_url: str, path: str, ids: Sequence[str], concurrency: int, duration: float) -> Dict[str, float]:
+    """Mantiene ``concurrency`` clientes con keep-alive contra un servidor externo."""
+
+    url = urlsplit(base_url)
+    connection_class = http.client.HTTPSConnection if url.scheme == "https" else http.client.HTTPConnection
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client(seed_value: int) -> None:
+        nonlocal errors
+        rng = random.Random(seed_value)
+        connection = connection_class(url.netloc, timeout=10)
+        local: List[float] = []
+        failed = 0
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                connection.request("GET", f"{url.path.rstrip('/')}{path}?customer_id={rng.choice(ids)}")
+                response = connection.getresponse()
+                response.read()
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                connection.close()
+                connection = connection_class(url.netloc, timeout=10)
+                continue
+            if response.status != 200:
+                failed += 1
+                continue
+            local.append(time.perf_counter() - started)
+        connection.close()
+        with lock:
+            latencies.extend(local)
+            errors += failed
+
+    threads = [threading.Thread(target=client, args=(index,)) for index in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, time.perf_counter() - started, errors)
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as directory:
+        uri = args.database or f"sqlite:///{os.path.join(directory, 'loadtest.sqlite3')}"
+        app = create_app(
+            {
+                "SQLALCHEMY_DATABASE_URI": uri,
+                "CUSTOMER_CACHE_ENABLED": args.cache,
+                "REQUEST_METRICS_ENABLED": False,
+            }
+        )
+        with app.app_context():
+            if not args.skip_seed:
+                db.create_all()
+                started = time.perf_counter()
+                with db.engine.connect() as connection:
+                    spec = GeneratorSpec(
+                        args.customers, months=args.periods, seed=args.seed, first_id=next_customer_id(connection)
+                    )
+                    stats = generate_dataset(spec, connection=connection)
+                print(f"Conjunto sembrado: {stats.rows} filas en {time.perf_counter() - started:.1f}s", file=sys.stderr)
+            with db.engine.connect() as connection:
+                customers = connection.execute(select(func.count()).select_from(Customer)).scalar_one()
+                sample = sample_external_ids(connection, args.sample, args.seed)
+
+            results: Dict[str, Dict[str, float]] = {}
+            targets: Dict[str, Callable[[str], Any]] = {
+                "servicio get_consumption_summary": get_consumption_summary,
+                "servicio get_customer_profile": get_customer_profile,
+            }
+            if not args.url:
+                client = app.test_client()
+                for name, path in HTTP_ROUTES.items():
+                    targets[name] = lambda customer, path=path: client.get(f"{path}?customer_id={customer}")
+            for name, call in targets.items():
+                results[name] = measure(call, sample, args.duration)
+                db.session.remove()
+                print(_format_row(name, results[name]), file=sys.stderr)
+
+        if args.url:
+            for name, path in HTTP_ROUTES.items():
+                results[name] = load_http(args.url, path, sample, args.concurrency, args.duration)
+                print(_format_row(name, results[name]), file=sys.stderr)
+
+    return {
+        "commit": _git_commit(),
+        "fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "base_de_datos": uri.split("://", 1)[0] if args.database else "sqlite",
+        "conjunto": {"clientes": customers, "periodos": args.periods, "semilla": args.seed},
+        "parametros": {"duracion_s": args.duration, "concurrencia": args.concurrency if args.url else 1, "cache": args.cache},
+        "resultados": results,
+    }
+
+
+def _format_row(name: str, stats: Dict[str, float]) -> str:
+    return (
+        f"{name:<34} rps={stats['rps']:9.0f} p50={stats['p50_ms']:7.2f}ms "
+        f"p95={stats['p95_ms']:7.2f}ms p99={stats['p99_ms']:7.2f}ms errores={stats['errores']:.0f}"
+    )
+
+
+def compare(baseline: Dict[str, Any], candidate: Dict[str, Any], threshold: float) -> List[str]:
+    """Devuelve los objetivos cuyo p95 o rendimiento empeora más que ``threshold``."""
+
+    regressions = []
+    for name, before in baseline["resultados"].items():
+        after = candidate["resultados"].get(name)
+        if after is None:
+            continue
+        p95_change = after["p95_ms"] / before["p95_ms"] - 1 if before["p95_ms"] else 0.0
+        rps_change = after["rps"] / before["rps"] - 1 if before["rps"] else 0.0
+        regressed = p95_change > threshold or rps_change < -threshold
+        print(
+            f"{name:<34} p95 {before['p95_ms']:7.2f} → {after['p95_ms']:7.2f}ms ({p95_change:+.1%}) "
+            f"rps {before['rps']:9.0f} → {after['rps']:9.0f} ({rps_change:+.1%}){'  REGRESIÓN' if regressed else ''}"
+        )
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Siembra el conjunto y mide los objetivos.")
+    run_parser.add_argument("--customers", type=int, default=10_000)
+    run_parser.add_argument("--periods", type=int, default=24, help="Meses máximos de historial por cliente.")
+    run_parser.add_argument("--seed", type=int, default=42)
+    run_parser.add_argument("--database", help="URI de la base; por defecto, un SQLite temporal.")
+    run_parser.add_argument("--skip-seed", action="store_true", help="Reutiliza los datos ya cargados en --database.")
+    run_parser.add_argument("--sample", type=int, default=10_000, help="Clientes distintos consultados.")
+    run_parser.add_argument("--duration", type=float, default=5.0, help="Segundos por objetivo.")
+    run_parser.add_argument("--url", help="Servidor HTTP externo para medir las rutas.")
+    run_parser.add_argument("--concurrency", type=int, default=16)
+    run_parser.add_argument("--cache", action="store_true", help="Mide con la caché de perfiles activa.")
+    run_parser.add_argument("--output", help="Fichero JSON de resultados; por defecto, la salida estándar.")
+
+    compare_parser = commands.add_parser("compare", help="Compara dos ficheros de resultados.")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    compare_parser.add_argument("--threshold", type=float, default=0.10)
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.command == "compare":
+        with open(args.baseline, encoding="utf-8") as handle:
+            baseline = json.load(handle)
+        with open(args.candidate, encoding="utf-8") as handle:
+            candidate = json.load(handle)
+        return 1 if compare(baseline, candidate, args.threshold) else 0
+
+    report = json.dumps(run(args), indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(report + "\n")
+    else:
+        print(report)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,62 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+"""Microbenchmarks de la API con ``pytest-benchmark``.
+
+No forman parte de la batería de ``tests``; se ejecutan explícitamente y el
+JSON resultante se compara entre commits con ``--benchmark-compare``::
+
+    pytest backend/benchmarks --benchmark-autosave
+    BENCH_CUSTOMERS=50000 pytest backend/benchmarks --benchmark-compare --benchmark-compare-fail=mean:10%
+"""
+from __future__ import annotations
+
+import os
+import random
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from backend.app_factory import create_app
+from backend.models import db
+from backend.services.customer_service import get_consumption_summary, get_customer_profile
+from backend.services.datagen_service import GeneratorSpec, external_id, generate_dataset
+
+
+@pytest.fixture(scope="module")
+def seeded_app(tmp_path_factory):
+    spec = GeneratorSpec(
+        customers=int(os.getenv("BENCH_CUSTOMERS", 5_000)),
+        months=int(os.getenv("BENCH_PERIODS", 24)),
+    )
+    uri = f"sqlite:///{tmp_path_factory.mktemp('bench') / 'bench.sqlite3'}"
+    app = create_app({"SQLALCHEMY_DATABASE_URI": uri, "CUSTOMER_CACHE_ENABLED": False, "REQUEST_METRICS_ENABLED": False})
+    with app.app_context():
+        db.create_all()
+        with db.engine.connect() as connection:
+            generate_dataset(spec, connection=connection)
+        yield app, spec
+
+
+@pytest.fixture
+def customer_ids(seeded_app):
+    _, spec = seeded_app
+    rng = random.Random(7)
+    return lambda: external_id(rng.randrange(spec.first_id, spec.first_id + spec.customers))
+
+
+def test_bench_consumption_summary(benchmark, seeded_app, customer_ids):
+    benchmark(lambda: get_consumption_summary(customer_ids()))
+
+
+def test_bench_customer_profile(benchmark, seeded_app, customer_ids):
+    benchmark(lambda: get_customer_profile(customer_ids()))
+
+
+@pytest.mark.parametrize("path", ["/api/consumo", "/api/cliente"])
+def test_bench_http_routes(benchmark, seeded_app, customer_ids, path):
+    client = seeded_app[0].test_client()
+
+    response = benchmark(lambda: client.get(f"{path}?customer_id={customer_ids()}"))
+
+    assert response.status_code == 200
@@ -0,0 +1,70 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+"""Configuración de gunicorn para servir ``backend.wsgi:app`` en producción.
+
+Todos los valores pueden sobrescribirse con variables de entorno. Para
+recargar sin cortar peticiones:
+
+- ``kill -HUP <maestro>`` arranca workers nuevos con la configuración
+  actualizada y retira los anteriores cuando terminan sus peticiones en curso
+  (con ``preload_app`` el código no se vuelve a importar).
+- ``kill -USR2 <maestro>`` seguido de ``kill -TERM <maestro anterior>``
+  despliega código nuevo sin cerrar el socket de escucha.
+"""
+from __future__ import annotations
+
+import multiprocessing
+import os
+import sys
+from typing import Any
+
+
+def _env_int(key: str, default: int) -> int:
+    value = os.getenv(key)
+    return int(value) if value else default
+
+
+def default_workers(cpu_count: int | None = None) -> int:
+    """Número de procesos recomendado por gunicorn: ``2 * CPUs + 1``."""
+
+    if cpu_count is None:
+        try:
+            cpu_count = len(os.sched_getaffinity(0))
+        except AttributeError:
+            cpu_count = multiprocessing.cpu_count()
+    return 2 * max(1, cpu_count) + 1
+
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = _env_int("WEB_CONCURRENCY", default_workers())
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+threads = _env_int("GUNICORN_THREADS", 4)
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() not in {"0", "false", "no"}
+
+timeout = _env_int("GUNICORN_TIMEOUT", 30)
+graceful_timeout = _env_int("GUNICORN_GRACEFUL_TIMEOUT", 30)
+keepalive = _env_int("GUNICORN_KEEPALIVE", 5)
+
+# Reciclar workers periódicamente acota el crecimiento de memoria; el jitter
+# evita que todos se reinicien a la vez.
+max_requests = _env_int("GUNICORN_MAX_REQUESTS", 10_000)
+max_requests_jitter = _env_int("GUNICORN_MAX_REQUESTS_JITTER", 1_000)
+
+# Una cadena vacía desactiva el log de accesos.
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-") or None
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+
+def post_fork(server: Any, worker: Any) -> None:
+    """Evita que los workers reutilicen las conexiones abiertas por el maestro."""
+
+    wsgi_module = sys.modules.get("backend.wsgi")
+    if wsgi_module is None:
+        return
+    wsgi_module.dispose_engines(wsgi_module.app)
+    server.log.debug("Pool de conexiones reiniciado en el worker %s", worker.pid)
+
+
+def on_reload(server: Any) -> None:
+    server.log.info("Recarga solicitada: se reemplazarán los workers de forma gradual")
@@ -0,0 +1,121 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+"""Carga masiva de consumos o facturas desde ficheros CSV o JSON Lines.
+
+Uso::
+
+    python -m backend.ingest consumption usage-2024-05.csv --batch-size 5000
+    python -m backend.ingest billing billings.jsonl --batches-per-transaction 20
+    python -m backend.ingest consumption usage-2024-05.csv --workers 8 --retries 2
+
+Columnas de ``consumption``: ``external_id``, ``period_start``,
+``period_end``, ``data_used_mb``, ``voice_minutes``. Columnas de
+``billing``: ``external_id``, ``billing_date``, ``amount``, ``currency``,
+``due_date``, ``paid``. Las fechas usan formato ISO (``AAAA-MM-DD``).
+
+Con ``--workers`` mayor que 1 los consumos se reparten por rangos de bytes
+entre un pool de procesos; como se cargan con upsert sobre
+``(customer_id, period_start, period_end)``, los rangos fallidos se
+reintentan sin duplicar filas.
+"""
+from __future__ import annotations
+
+import argparse
+from typing import Sequence, Set
+
+from backend.app_factory import create_app
+from backend.models import db
+from backend.routing import active_database_uri, get_router
+from backend.services.cache import get_cache, invalidate_customers
+from backend.services.ingestion_service import (
+    RECORD_KINDS,
+    IngestionStats,
+    ingest_file,
+    ingest_file_parallel,
+    load_customer_ids,
+)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Carga masiva de consumos o facturas.")
+    parser.add_argument("kind", choices=sorted(RECORD_KINDS), help="Tipo de registro a cargar.")
+    parser.add_argument("paths", nargs="+", help="Ficheros .csv, .jsonl o .ndjson.")
+    parser.add_argument("--batch-size", type=int, default=5_000, help="Filas por sentencia executemany.")
+    parser.add_argument(
+        "--batches-per-transaction", type=int, default=10, help="Lotes confirmados en cada transacción."
+    )
+    parser.add_argument("--workers", type=int, default=1, help="Procesos de carga en paralelo.")
+    parser.add_argument("--retries", type=int, default=2, help="Reintentos de los rangos fallidos.")
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    app = create_app()
+    with app.app_context():
+        total = IngestionStats()
+        failures = 0
+        router = get_router()
+        with router.connect() if router else db.engine.connect() as connection:
+            customer_ids = load_customer_ids(connection)
+            connection.commit()
+
+            on_commit = None
+            if get_cache() is not None:
+                external_ids = {customer_id: external_id for external_id, customer_id in customer_ids.items()}
+
+                def on_commit(ids: Set[int]) -> None:
+                    invalidate_customers(external_ids[customer_id] for customer_id in ids)
+
+            for path in args.paths:
+                if args.workers > 1:
+                    stats, failed = ingest_file_parallel(
+                        active_database_uri(),
+                        path,
+                        args.kind,
+                        workers=args.workers,
+                        batch_size=args.batch_size,
+                        batches_per_transaction=args.batches_per_transaction,
+                        retries=args.retries,
+                    )
+                    if on_commit is not None:
+                        on_commit(stats.customer_ids)
+                    for result in failed:
+                        app.logger.error(
+                            "%s: rango de bytes [%s, %s) sin cargar: %s", path, result.start, result.end, result.error
+                        )
+                        failures += 1
+                else:
+                    stats = ingest_file(
+                        connection,
+                        path,
+                        args.kind,
+                        batch_size=args.batch_size,
+                        batches_per_transaction=args.batches_per_transaction,
+                        customer_ids=customer_ids,
+                        on_commit=on_commit,
+                    )
+                app.logger.info(
+                    "%s: %s filas leídas, %s insertadas, %s descartadas en %.2fs (%.0f filas/s)",
+                    path,
+                    stats.read,
+                    stats.inserted,
+                    stats.rejected,
+                    stats.elapsed,
+                    stats.rows_per_second,
+                )
+                total.merge(stats)
+                total.elapsed += stats.elapsed
+
+        app.logger.info(
+            "Total: %s filas insertadas, %s descartadas, %.0f filas/s",
+            total.inserted,
+            total.rejected,
+            total.rows_per_second,
+        )
+    return 1 if total.rejected or failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
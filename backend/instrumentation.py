@@ -0,0 +1,176 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+"""Instrumentación por petición: consultas, tiempo de base de datos y latencia.
+
+Cada petición abre un ``RequestTimings`` en una ``ContextVar``; los eventos
+``before_cursor_execute``/``after_cursor_execute`` de todos los engines
+(principal, respaldo y réplicas) suman en él las sentencias ejecutadas y su
+duración. Al terminar el handler se añade la cabecera ``Server-Timing`` y se
+alimentan los histogramas que expone ``/metrics``. Si una petición supera
+``REQUEST_QUERY_BUDGET`` consultas se registra un aviso de posible N+1.
+
+Los histogramas son por proceso: con varios workers de gunicorn cada uno
+publica los suyos y Prometheus los agrega al consultar.
+"""
+from __future__ import annotations
+
+import time
+from contextvars import ContextVar
+from typing import Any, List
+
+from flask import Flask, Response, current_app, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from backend.metrics import HistogramVec
+
+
+METRICS_EXTENSION_KEY = "request_metrics"
+DEFAULT_QUERY_BUDGET = 10
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+_current: ContextVar["RequestTimings | None"] = ContextVar("request_timings", default=None)
+_QUERY_STARTED_KEY = "instrumentation_query_started"
+_TOKEN_ENVIRON_KEY = "backend.instrumentation.token"
+_hooks_registered = False
+
+
+class RequestTimings:
+    """Consultas y tiempo de base de datos acumulados durante una petición."""
+
+    __slots__ = ("started", "queries", "db_seconds")
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+class RequestMetrics:
+    """Histogramas de latencia, tiempo de base de datos y consultas por endpoint."""
+
+    def __init__(self, query_budget: int = DEFAULT_QUERY_BUDGET) -> None:
+        self.query_budget = query_budget
+        self.request_seconds = HistogramVec(
+            "telcox_http_request_duration_seconds",
+            "Duración del handler por endpoint, método y código de estado.",
+            ("endpoint", "method", "status"),
+        )
+        self.db_seconds = HistogramVec(
+            "telcox_http_request_db_seconds",
+            "Tiempo acumulado en la base de datos por petición.",
+            ("endpoint",),
+        )
+        self.db_queries = HistogramVec(
+            "telcox_http_request_db_queries",
+            "Sentencias SQL ejecutadas por petición.",
+            ("endpoint",),
+            buckets=QUERY_COUNT_BUCKETS,
+        )
+
+    def render(self) -> List[str]:
+        return [*self.request_seconds.render(), *self.db_seconds.render(), *self.db_queries.render()]
+
+
+def current_timings() -> RequestTimings | None:
+    return _current.get()
+
+
+def _before_cursor_execute(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+    if _current.get() is not None:
+        conn.info.setdefault(_QUERY_STARTED_KEY, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+    timings = _current.get()
+    started = conn.info.get(_QUERY_STARTED_KEY)
+    if timings is None or not started:
+        return
+    timings.db_seconds += time.perf_counter() - started.pop()
+    timings.queries += 1
+
+
+def register_query_hooks() -> None:
+    """Registra una única vez los eventos de cursor en todos los engines."""
+
+    global _hooks_registered
+    if _hooks_registered:
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    _hooks_registered = True
+
+
+def get_request_metrics() -> RequestMetrics | None:
+    return current_app.extensions.get(METRICS_EXTENSION_KEY)
+
+
+def _endpoint_label() -> str:
+    rule = request.url_rule
+    return rule.rule if rule is not None else "sin_ruta"
+
+
+def _start_request() -> None:
+    request.environ[_TOKEN_ENVIRON_KEY] = _current.set(RequestTimings())
+
+
+def _finish_request(response: Response) -> Response:
+    timings = _current.get()
+    if timings is None:
+        return response
+    elapsed = time.perf_counter() - timings.started
+    metrics: RequestMetrics = current_app.extensions[METRICS_EXTENSION_KEY]
+    endpoint = _endpoint_label()
+
+    metrics.request_seconds.labels(endpoint, request.method, str(response.status_code)).observe(elapsed)
+    metrics.db_seconds.labels(endpoint).observe(timings.db_seconds)
+    metrics.db_queries.labels(endpoint).observe(timings.queries)
+    response.headers.add(
+        "Server-Timing",
+        f'db;dur={timings.db_seconds * 1000:.2f};desc="{timings.queries} consultas", app;dur={elapsed * 1000:.2f}',
+    )
+    if timings.queries > metrics.query_budget:
+        current_app.logger.warning(
+            "Posible N+1 en %s %s: %s consultas (presupuesto %s) y %.1f ms en base de datos",
+            request.method,
+            endpoint,
+            timings.queries,
+            metrics.query_budget,
+            timings.db_seconds * 1000,
+        )
+    return response
+
+
+def _reset_request(_error: BaseException | None) -> None:
+    token = request.environ.pop(_TOKEN_ENVIRON_KEY, None)
+    if token is None:
+        return
+    try:
+        _current.reset(token)
+    except ValueError:
+        # La respuesta en streaming terminó en otro contexto; basta con limpiar el actual.
+        _current.set(None)
+
+
+def init_instrumentation(app: Flask, query_budget: int = DEFAULT_QUERY_BUDGET) -> RequestMetrics:
+    """Registra los hooks de petición y guarda las métricas en ``app.extensions``."""
+
+    metrics = RequestMetrics(query_budget)
+    app.extensions[METRICS_EXTENSION_KEY] = metrics
+    register_query_hooks()
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.teardown_request(_reset_request)
+    return metrics
+
+
+__all__ = [
+    "DEFAULT_QUERY_BUDGET",
+    "METRICS_EXTENSION_KEY",
+    "RequestMetrics",
+    "RequestTimings",
+    "current_timings",
+    "get_request_metrics",
+    "init_instrumentation",
+    "register_query_hooks",
+]
@@ -0,0 +1,114 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+"""Proveedores JSON de la API con ``orjson`` opcional.
+
+``JSON_PROVIDER`` elige la implementación: ``auto`` (por defecto) usa
+``orjson`` si está instalado y la librería estándar en caso contrario;
+``orjson`` y ``stdlib`` la fijan. Ambas producen el mismo documento:
+``Decimal`` como número, ``date`` y ``datetime`` en ISO 8601 y texto UTF-8
+sin escapar.
+"""
+from __future__ import annotations
+
+import dataclasses
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Type
+
+from flask import Flask, Response
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    if hasattr(value, "__html__"):
+        return str(value.__html__())
+    raise TypeError(f"El objeto de tipo {type(value).__name__} no es serializable a JSON")
+
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """Proveedor sobre el módulo ``json`` con los mismos tipos que ``OrjsonProvider``."""
+
+    default = staticmethod(_default)
+    ensure_ascii = False
+
+
+class OrjsonProvider(StdlibJSONProvider):
+    """Proveedor sobre ``orjson``; serializa directamente a bytes en las respuestas.
+
+    Las llamadas a ``dumps`` con argumentos propios del módulo ``json``
+    (``indent``, ``cls``...) se delegan en la implementación estándar.
+    """
+
+    def _options(self, indent: bool = False) -> int:
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=_default, option=self._options()).decode()
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        body = orjson.dumps(obj, default=_default, option=self._options(indent) | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+JSON_PROVIDERS: Dict[str, Type[StdlibJSONProvider]] = {"stdlib": StdlibJSONProvider, "orjson": OrjsonProvider}
+
+
+def json_provider_class(name: str = "auto") -> Type[StdlibJSONProvider]:
+    """Devuelve la clase de proveedor para ``name`` (``auto``, ``orjson`` o ``stdlib``)."""
+
+    name = name.lower()
+    if name == "auto":
+        return OrjsonProvider if orjson is not None else StdlibJSONProvider
+    if name not in JSON_PROVIDERS:
+        raise ValueError(f"Proveedor JSON no soportado: {name!r}")
+    if name == "orjson" and orjson is None:
+        raise RuntimeError("El paquete 'orjson' es necesario para JSON_PROVIDER=orjson")
+    return JSON_PROVIDERS[name]
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """Serializa ``obj`` a UTF-8 fuera de un contexto de aplicación (por ejemplo, en ASGI)."""
+
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def init_json(app: Flask, name: str = "auto") -> None:
+    app.json = json_provider_class(name)(app)
+
+
+__all__ = [
+    "JSON_PROVIDERS",
+    "OrjsonProvider",
+    "StdlibJSONProvider",
+    "dumps_bytes",
+    "init_json",
+    "json_provider_class",
+]
@@ -0,0 +1,125 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+"""Primitivas de métricas en memoria compartidas por la instrumentación."""
+from __future__ import annotations
+
+import bisect
+import threading
+from typing import Dict, List, Mapping, Sequence, Tuple
+
+
+DEFAULT_LATENCY_BUCKETS: Tuple[float, ...] = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """Histograma acumulado con límites superiores fijos, seguro entre hilos."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._max = max(self._max, value)
+
+    def snapshot(self) -> Dict[str, object]:
+        """Devuelve los contadores acumulados por límite (``le``), la suma y el máximo."""
+
+        with self._lock:
+            counts = list(self._counts)
+            total, maximum = self._sum, self._max
+        cumulative = 0
+        buckets: Dict[str, int] = {}
+        for bound, count in zip(self.buckets, counts):
+            cumulative += count
+            buckets[repr(bound)] = cumulative
+        cumulative += counts[-1]
+        buckets["+Inf"] = cumulative
+        return {"buckets": buckets, "count": cumulative, "sum": total, "max": maximum}
+
+
+def _escape(value: object) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Mapping[str, object]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_metric(name: str, kind: str, documentation: str, samples: Sequence[Tuple[Mapping[str, str], float]]) -> List[str]:
+    """Líneas en formato de exposición de Prometheus de un contador o indicador."""
+
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+    lines.extend(f"{name}{_format_labels(labels)} {_format_value(value)}" for labels, value in samples)
+    return lines
+
+
+def render_histogram(name: str, snapshot: Mapping[str, object], labels: Mapping[str, str] | None = None) -> List[str]:
+    """Series ``_bucket``, ``_sum`` y ``_count`` de la instantánea de un ``Histogram``."""
+
+    labels = dict(labels or {})
+    lines = [
+        f"{name}_bucket{_format_labels({**labels, 'le': bound})} {count}"
+        for bound, count in snapshot["buckets"].items()  # type: ignore[union-attr]
+    ]
+    lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(snapshot['sum'])}")  # type: ignore[arg-type]
+    lines.append(f"{name}_count{_format_labels(labels)} {snapshot['count']}")
+    return lines
+
+
+class HistogramVec:
+    """Familia de histogramas con etiquetas, creados bajo demanda."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str],
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str) -> Histogram:
+        if len(values) != len(self.label_names):
+            raise ValueError(f"{self.name} espera las etiquetas {self.label_names}")
+        histogram = self._series.get(values)
+        if histogram is None:
+            with self._lock:
+                histogram = self._series.setdefault(values, Histogram(self.buckets))
+        return histogram
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted(self._series.items())
+        for values, histogram in series:
+            lines.extend(render_histogram(self.name, histogram.snapshot(), dict(zip(self.label_names, values))))
+        return lines
+
+
+__all__ = [
+    "DEFAULT_LATENCY_BUCKETS",
+    "PROMETHEUS_CONTENT_TYPE",
+    "Histogram",
+    "HistogramVec",
+    "render_histogram",
+    "render_metric",
+]
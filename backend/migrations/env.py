@@ -16,6 +16,8 @@ if PROJECT_ROOT not in sys.path:
 from backend.app_factory import create_app
 from backend.models import db
 from backend.models.customer import Billing, Consumption, Customer
+from backend.routing import get_router
+from backend.services.partition_service import PARTITIONED_TABLES
 
 config = context.config
 
@@ -30,6 +32,18 @@ config.set_main_option("sqlalchemy.url", app.config["SQLALCHEMY_DATABASE_URI"])
 target_metadata = db.metadata
 
 
+def include_object(object, name, type_, reflected, compare_to):  # noqa: A002 - firma de Alembic
+    """Excluye de ``--autogenerate`` las claves foráneas de las tablas particionadas.
+
+    En MySQL ``consumptions`` y ``billings`` están particionadas y no admiten
+    claves foráneas, aunque los modelos las declaran para el ORM y SQLite.
+    """
+
+    if type_ == "foreign_key_constraint" and object.table.name in PARTITIONED_TABLES:
+        return context.get_context().dialect.name != "mysql"
+    return True
+
+
 def run_migrations_offline() -> None:
     """Ejecuta las migraciones en modo 'offline'."""
 
@@ -40,6 +54,7 @@ def run_migrations_offline() -> None:
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
         compare_type=True,
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -50,8 +65,14 @@ def run_migrations_online() -> None:
     """Ejecuta las migraciones en modo 'online'."""
 
     with app.app_context():
-        with db.engine.connect() as connection:
-            context.configure(connection=connection, target_metadata=target_metadata, compare_type=True)
+        router = get_router()
+        with router.connect() if router else db.engine.connect() as connection:
+            context.configure(
+                connection=connection,
+                target_metadata=target_metadata,
+                compare_type=True,
+                include_object=include_object,
+            )
 
             with context.begin_transaction():
                 context.run_migrations()
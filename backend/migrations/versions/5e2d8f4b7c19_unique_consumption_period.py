@@ -0,0 +1,24 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+from __future__ import annotations
+
+from alembic import op
+
+
+revision = "5e2d8f4b7c19"
+down_revision = "c3a7e91f5d20"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ux_consumptions_customer_period",
+        "consumptions",
+        ["customer_id", "period_start", "period_end"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ux_consumptions_customer_period", table_name="consumptions")
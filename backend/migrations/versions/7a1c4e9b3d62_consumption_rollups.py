@@ -0,0 +1,36 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "7a1c4e9b3d62"
+down_revision = "5e2d8f4b7c19"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_consumptions_period_start",
+        "consumptions",
+        ["period_start", "customer_id", "data_used_mb", "voice_minutes"],
+    )
+    op.create_table(
+        "consumption_rollups",
+        sa.Column("granularity", sa.String(length=8), nullable=False),
+        sa.Column("bucket", sa.Date(), nullable=False),
+        sa.Column("data_used_mb", sa.Float(), nullable=False),
+        sa.Column("voice_minutes", sa.Float(), nullable=False),
+        sa.Column("customer_count", sa.Integer(), nullable=False),
+        sa.Column("record_count", sa.Integer(), nullable=False),
+        sa.Column("refreshed_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("granularity", "bucket"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("consumption_rollups")
+    op.drop_index("ix_consumptions_period_start", table_name="consumptions")
@@ -0,0 +1,29 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+from __future__ import annotations
+
+from alembic import op
+
+
+revision = "9b1e3c7d2a54"
+down_revision = "4c8d2df1a1a0"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_consumptions_customer_period_end",
+        "consumptions",
+        ["customer_id", "period_end", "id"],
+    )
+    op.create_index(
+        "ix_billings_customer_paid_amount",
+        "billings",
+        ["customer_id", "paid", "amount"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_billings_customer_paid_amount", table_name="billings")
+    op.drop_index("ix_consumptions_customer_period_end", table_name="consumptions")
@@ -0,0 +1,66 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+from __future__ import annotations
+
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "b6d2f8a4c1e7"
+down_revision = "7a1c4e9b3d62"
+branch_labels = None
+depends_on = None
+
+# Copia fija de la configuración de ``partition_service`` en esta revisión.
+PARTITIONED_TABLES = {"consumptions": "period_end", "billings": "billing_date"}
+MONTHS_AHEAD = 3
+
+
+def _add_months(month: date, count: int) -> date:
+    year, month_index = divmod(month.year * 12 + month.month - 1 + count, 12)
+    return date(year, month_index + 1, 1)
+
+
+def _partitioning_clause(column: str, first_month: date, last_month: date) -> str:
+    definitions = []
+    month = first_month
+    while month <= last_month:
+        definitions.append(f"PARTITION p{month:%Y%m} VALUES LESS THAN ('{_add_months(month, 1).isoformat()}')")
+        month = _add_months(month, 1)
+    definitions.append("PARTITION pmax VALUES LESS THAN (MAXVALUE)")
+    return f"PARTITION BY RANGE COLUMNS({column}) (\n  " + ",\n  ".join(definitions) + "\n)"
+
+
+def upgrade() -> None:
+    # Solo MySQL admite particionado por rango; en otros motores no hay cambios.
+    bind = op.get_bind()
+    if bind.dialect.name != "mysql":
+        return
+
+    current = date.today().replace(day=1)
+    last_month = _add_months(current, MONTHS_AHEAD)
+    for table, column in PARTITIONED_TABLES.items():
+        # Las tablas particionadas no admiten claves foráneas y cada clave
+        # única debe incluir la columna de partición. Los modelos mantienen
+        # ``ForeignKey`` y la clave primaria ``id``; ``env.py`` excluye esas
+        # diferencias de ``--autogenerate``.
+        for foreign_key in sa.inspect(bind).get_foreign_keys(table):
+            op.drop_constraint(foreign_key["name"], table, type_="foreignkey")
+        op.execute(f"ALTER TABLE {table} DROP PRIMARY KEY, ADD PRIMARY KEY (id, {column})")
+        first = bind.execute(sa.text(f"SELECT MIN({column}) FROM {table}")).scalar()
+        first_month = min(first.replace(day=1), last_month) if first else current
+        op.execute(f"ALTER TABLE {table} {_partitioning_clause(column, first_month, last_month)}")
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "mysql":
+        return
+
+    for table in PARTITIONED_TABLES:
+        op.execute(f"ALTER TABLE {table} REMOVE PARTITIONING")
+        op.execute(f"ALTER TABLE {table} DROP PRIMARY KEY, ADD PRIMARY KEY (id)")
+        # Igual que la declaran los modelos: sin ``ON DELETE``.
+        op.create_foreign_key(f"fk_{table}_customer_id_customers", table, "customers", ["customer_id"], ["id"])
@@ -0,0 +1,58 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "c3a7e91f5d20"
+down_revision = "9b1e3c7d2a54"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "customer_summaries",
+        sa.Column(
+            "customer_id",
+            sa.Integer(),
+            sa.ForeignKey("customers.id", ondelete="CASCADE"),
+            primary_key=True,
+            autoincrement=False,
+        ),
+        sa.Column("latest_consumption_id", sa.Integer(), nullable=True),
+        sa.Column("latest_period_start", sa.Date(), nullable=True),
+        sa.Column("latest_period_end", sa.Date(), nullable=True),
+        sa.Column("data_used_mb", sa.Float(), nullable=True),
+        sa.Column("voice_minutes", sa.Float(), nullable=True),
+        sa.Column("outstanding_balance", sa.Numeric(12, 2), nullable=False, server_default=sa.text("0")),
+        sa.Column("billing_count", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("updated_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    )
+
+    op.execute(
+        """
+        INSERT INTO customer_summaries (
+            customer_id, latest_consumption_id, latest_period_start, latest_period_end,
+            data_used_mb, voice_minutes, outstanding_balance, billing_count, updated_at
+        )
+        SELECT
+            c.id, lc.id, lc.period_start, lc.period_end, lc.data_used_mb, lc.voice_minutes,
+            COALESCE((SELECT SUM(b.amount) FROM billings b WHERE b.customer_id = c.id AND b.paid = 0), 0),
+            (SELECT COUNT(b.id) FROM billings b WHERE b.customer_id = c.id),
+            CURRENT_TIMESTAMP
+        FROM customers c
+        LEFT OUTER JOIN consumptions lc ON lc.id = (
+            SELECT c2.id FROM consumptions c2
+            WHERE c2.customer_id = c.id
+            ORDER BY c2.period_end DESC, c2.id DESC
+            LIMIT 1
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("customer_summaries")
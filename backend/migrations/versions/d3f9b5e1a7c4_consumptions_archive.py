@@ -0,0 +1,36 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "d3f9b5e1a7c4"
+down_revision = "b6d2f8a4c1e7"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "consumptions_archive",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("customer_id", sa.Integer(), sa.ForeignKey("customers.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("period_start", sa.Date(), nullable=False),
+        sa.Column("period_end", sa.Date(), nullable=False),
+        sa.Column("data_used_mb", sa.Float(), nullable=False, server_default=sa.text("0")),
+        sa.Column("voice_minutes", sa.Float(), nullable=False, server_default=sa.text("0")),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("archived_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index(
+        "ix_consumptions_archive_customer_period_end",
+        "consumptions_archive",
+        ["customer_id", "period_end", "id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_consumptions_archive_customer_period_end", table_name="consumptions_archive")
+    op.drop_table("consumptions_archive")
@@ -0,0 +1,23 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+from __future__ import annotations
+
+from alembic import op
+
+
+revision = "e8a2c6f0b4d1"
+down_revision = "d3f9b5e1a7c4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_consumptions_archive_period_start",
+        "consumptions_archive",
+        ["period_start", "customer_id", "data_used_mb", "voice_minutes"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_consumptions_archive_period_start", table_name="consumptions_archive")
@@ -5,11 +5,13 @@ from __future__ import annotations
 
 from flask_sqlalchemy import SQLAlchemy
 
+from backend.routing import RoutingSession
 
-db = SQLAlchemy()
 
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 
-from .customer import Billing, Consumption, Customer 
 
+from .customer import Billing, Consumption, ConsumptionArchive, ConsumptionRollup, Customer, CustomerSummary
 
-__all__ = ["db", "Customer", "Consumption", "Billing"]
+
+__all__ = ["db", "Customer", "Consumption", "Billing", "CustomerSummary", "ConsumptionRollup", "ConsumptionArchive"]
@@ -6,7 +6,7 @@ from __future__ import annotations
 from datetime import date, datetime
 from decimal import Decimal
 
-from sqlalchemy import Boolean, CheckConstraint, Date, DateTime, Float, ForeignKey, Integer, Numeric, String
+from sqlalchemy import Boolean, CheckConstraint, Date, DateTime, Float, ForeignKey, Index, Integer, Numeric, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from backend.models import db
@@ -42,6 +42,9 @@ class Consumption(db.Model):
 
     __tablename__ = "consumptions"
 
+    # En MySQL la tabla está particionada por ``period_end`` (migración
+    # b6d2f8a4c1e7): la clave primaria real es ``(id, period_end)`` y no hay
+    # clave foránea; ``migrations/env.py`` la excluye de ``--autogenerate``.
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     customer_id: Mapped[int] = mapped_column(ForeignKey("customers.id"), nullable=False, index=True)
     period_start: Mapped[date] = mapped_column(Date, nullable=False)
@@ -54,6 +57,9 @@ class Consumption(db.Model):
 
     __table_args__ = (
         CheckConstraint("period_end >= period_start", name="ck_consumptions_period"),
+        Index("ix_consumptions_customer_period_end", "customer_id", "period_end", "id"),
+        Index("ux_consumptions_customer_period", "customer_id", "period_start", "period_end", unique=True),
+        Index("ix_consumptions_period_start", "period_start", "customer_id", "data_used_mb", "voice_minutes"),
     )
 
     def __repr__(self) -> str:
@@ -65,6 +71,7 @@ class Billing(db.Model):
 
     __tablename__ = "billings"
 
+    # Particionada por ``billing_date`` en MySQL, como ``consumptions``.
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     customer_id: Mapped[int] = mapped_column(ForeignKey("customers.id"), nullable=False, index=True)
     billing_date: Mapped[date] = mapped_column(Date, nullable=False)
@@ -76,8 +83,73 @@ class Billing(db.Model):
 
     customer: Mapped[Customer] = relationship("Customer", back_populates="billings")
 
+    __table_args__ = (
+        Index("ix_billings_customer_paid_amount", "customer_id", "paid", "amount"),
+    )
+
     def __repr__(self) -> str:
         return f"<Billing id={self.id} customer_id={self.customer_id} amount={self.amount}>"
 
 
-__all__ = ["Customer", "Consumption", "Billing"]
+class CustomerSummary(db.Model):
+    """Resumen materializado del último consumo y el saldo pendiente de un cliente."""
+
+    __tablename__ = "customer_summaries"
+
+    customer_id: Mapped[int] = mapped_column(
+        ForeignKey("customers.id", ondelete="CASCADE"), primary_key=True, autoincrement=False
+    )
+    latest_consumption_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    latest_period_start: Mapped[date | None] = mapped_column(Date, nullable=True)
+    latest_period_end: Mapped[date | None] = mapped_column(Date, nullable=True)
+    data_used_mb: Mapped[float | None] = mapped_column(Float, nullable=True)
+    voice_minutes: Mapped[float | None] = mapped_column(Float, nullable=True)
+    outstanding_balance: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=False, default=Decimal("0"))
+    billing_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<CustomerSummary customer_id={self.customer_id} balance={self.outstanding_balance}>"
+
+
+class ConsumptionRollup(db.Model):
+    """Totales precalculados de consumo de todos los clientes por día o mes de inicio de periodo."""
+
+    __tablename__ = "consumption_rollups"
+
+    granularity: Mapped[str] = mapped_column(String(8), primary_key=True)
+    bucket: Mapped[date] = mapped_column(Date, primary_key=True)
+    data_used_mb: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    voice_minutes: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    customer_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    record_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    refreshed_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<ConsumptionRollup {self.granularity} {self.bucket} records={self.record_count}>"
+
+
+class ConsumptionArchive(db.Model):
+    """Consumo histórico trasladado fuera de ``consumptions``; conserva el id original."""
+
+    __tablename__ = "consumptions_archive"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    customer_id: Mapped[int] = mapped_column(ForeignKey("customers.id", ondelete="CASCADE"), nullable=False)
+    period_start: Mapped[date] = mapped_column(Date, nullable=False)
+    period_end: Mapped[date] = mapped_column(Date, nullable=False)
+    data_used_mb: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    voice_minutes: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    archived_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_consumptions_archive_customer_period_end", "customer_id", "period_end", "id"),
+        Index("ix_consumptions_archive_period_start", "period_start", "customer_id", "data_used_mb", "voice_minutes"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<ConsumptionArchive id={self.id} customer_id={self.customer_id}>"
+
+
+__all__ = ["Customer", "Consumption", "Billing", "CustomerSummary", "ConsumptionRollup", "ConsumptionArchive"]
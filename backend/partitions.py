@@ -0,0 +1,70 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+"""Mantiene las particiones mensuales de ``consumptions`` y ``billings`` en MySQL.
+
+Con ``--retencion`` los consumos caducados se archivan en
+``consumptions_archive`` antes de eliminar sus particiones; las particiones
+con facturas sin pagar o con el último consumo de un cliente se conservan.
+
+Uso::
+
+    python -m backend.partitions --meses-futuros 3
+    python -m backend.partitions --retencion 36 --simular
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import date
+from typing import Sequence
+
+from backend.app_factory import create_app
+from backend.models import db
+from backend.services.partition_service import (
+    DEFAULT_MONTHS_AHEAD,
+    PartitionError,
+    maintain_partitions,
+    partition_name,
+)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Crea particiones futuras y retira las caducadas.")
+    parser.add_argument(
+        "--meses-futuros", type=int, default=DEFAULT_MONTHS_AHEAD, help="Meses por delante del actual con partición."
+    )
+    parser.add_argument("--retencion", type=int, help="Meses que se conservan; sin valor no se retira nada.")
+    parser.add_argument("--fecha", type=date.fromisoformat, help="Fecha de referencia (AAAA-MM-DD); hoy por defecto.")
+    parser.add_argument("--simular", action="store_true", help="Muestra el plan sin aplicarlo.")
+    args = parser.parse_args(argv)
+
+    app = create_app()
+    with app.app_context():
+        started = time.perf_counter()
+        try:
+            with db.engine.connect() as connection:
+                plans = maintain_partitions(
+                    connection,
+                    today=args.fecha,
+                    months_ahead=args.meses_futuros,
+                    retention_months=args.retencion,
+                    dry_run=args.simular,
+                )
+        except PartitionError as error:
+            app.logger.error("%s", error)
+            return 1
+        for plan in plans:
+            app.logger.info(
+                "%s%s: nuevas [%s], retiradas [%s], conservadas [%s]",
+                "(simulación) " if args.simular else "",
+                plan.table,
+                ", ".join(partition_name(month) for month in plan.create),
+                ", ".join(partition.name for partition in plan.expire),
+                ", ".join(partition.name for partition in plan.retained),
+            )
+        app.logger.info("Mantenimiento de particiones completado en %.2fs", time.perf_counter() - started)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
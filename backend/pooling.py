@@ -0,0 +1,147 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+"""Configuración e instrumentación del pool de conexiones."""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Any, Dict
+
+from flask import Flask
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+from backend.metrics import Histogram
+
+
+POOL_DEFAULTS: Dict[str, Any] = {
+    "pool_size": 10,
+    "max_overflow": 20,
+    "pool_recycle": 1800,
+    "pool_timeout": 30,
+    "pool_pre_ping": True,
+}
+
+_POOL_CONFIG_KEYS = {
+    "pool_size": ("DB_POOL_SIZE", int),
+    "max_overflow": ("DB_MAX_OVERFLOW", int),
+    "pool_recycle": ("DB_POOL_RECYCLE", int),
+    "pool_timeout": ("DB_POOL_TIMEOUT", float),
+    "pool_pre_ping": ("DB_POOL_PRE_PING", lambda value: str(value).lower() not in {"0", "false", "no"}),
+}
+
+
+class PoolStats:
+    """Contadores de uso del pool y tiempos de espera al obtener conexiones."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait_seconds = Histogram()
+
+    def increment(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """``QueuePool`` que mide el tiempo de espera de cada ``connect``."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def connect(self) -> Any:
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            self.stats.increment("timeouts")
+            raise
+        finally:
+            self.stats.wait_seconds.observe(time.perf_counter() - started)
+
+
+def pool_engine_options(app: Flask, uri: str) -> Dict[str, Any]:
+    """Calcula las opciones del pool a partir de la configuración o del entorno.
+
+    SQLite no usa un pool de colas configurable, así que solo se devuelven
+    opciones para los demás backends.
+    """
+
+    if uri.startswith("sqlite"):
+        return {}
+    options: Dict[str, Any] = {"poolclass": InstrumentedQueuePool}
+    for option, (key, cast) in _POOL_CONFIG_KEYS.items():
+        value = app.config.get(key)
+        if value is None:
+            value = os.getenv(key)
+        options[option] = cast(value) if value is not None else POOL_DEFAULTS[option]
+    return options
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Registra los eventos del pool que alimentan ``pool_status``."""
+
+    def _stats() -> PoolStats | None:
+        return getattr(engine.pool, "stats", None)
+
+    def _counter(name: str):
+        def _listener(*_args: Any) -> None:
+            stats = _stats()
+            if stats is not None:
+                stats.increment(name)
+
+        return _listener
+
+    event.listen(engine, "connect", _counter("connects"))
+    event.listen(engine, "checkout", _counter("checkouts"))
+    event.listen(engine, "checkin", _counter("checkins"))
+    event.listen(engine, "invalidate", _counter("invalidations"))
+
+
+def pool_status(engine: Engine) -> Dict[str, Any]:
+    """Devuelve el estado actual del pool y los contadores acumulados."""
+
+    pool = engine.pool
+    status: Dict[str, Any] = {"pool": type(pool).__name__}
+    for name, attribute in (
+        ("size", "size"),
+        ("checked_out", "checkedout"),
+        ("idle", "checkedin"),
+        ("overflow", "overflow"),
+    ):
+        method = getattr(pool, attribute, None)
+        if callable(method):
+            status[name] = method()
+
+    stats = getattr(pool, "stats", None)
+    if isinstance(stats, PoolStats):
+        status.update(
+            {
+                "connects": stats.connects,
+                "checkouts": stats.checkouts,
+                "checkins": stats.checkins,
+                "invalidations": stats.invalidations,
+                "timeouts": stats.timeouts,
+                "wait_seconds": stats.wait_seconds.snapshot(),
+            }
+        )
+    return status
+
+
+__all__ = [
+    "InstrumentedQueuePool",
+    "POOL_DEFAULTS",
+    "PoolStats",
+    "instrument_engine",
+    "pool_engine_options",
+    "pool_status",
+]
@@ -0,0 +1,53 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+"""Precalcula los rollups de consumo de los rangos más consultados.
+
+Solo se guardan los intervalos cerrados; el que contiene la fecha actual se
+calcula siempre en la consulta.
+
+Uso::
+
+    python -m backend.rollups --granularidad mes --desde 2024-01-01 --hasta 2024-12-31
+    python -m backend.rollups --granularidad dia --ultimos 90
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import date, timedelta
+from typing import Sequence
+
+from backend.app_factory import create_app
+from backend.models import db
+from backend.services.aggregation_service import GRANULARITIES, bucket_range, refresh_rollups
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Recalcula los rollups de consumo.")
+    parser.add_argument("--granularidad", choices=GRANULARITIES, default="mes", help="Tamaño del intervalo.")
+    parser.add_argument("--desde", type=date.fromisoformat, help="Primera fecha (AAAA-MM-DD).")
+    parser.add_argument("--hasta", type=date.fromisoformat, help="Última fecha (AAAA-MM-DD); hoy por defecto.")
+    parser.add_argument("--ultimos", type=int, default=30, help="Días hacia atrás si no se indica --desde.")
+    args = parser.parse_args(argv)
+
+    end = args.hasta or date.today()
+    start = args.desde or end - timedelta(days=args.ultimos)
+    buckets = bucket_range(start, end, args.granularidad)
+
+    app = create_app()
+    with app.app_context():
+        started = time.perf_counter()
+        with db.engine.begin() as connection:
+            totals = refresh_rollups(connection, args.granularidad, buckets)
+        app.logger.info(
+            "Rollups por %s recalculados: %s intervalos cerrados (%s con consumos) en %.2fs",
+            args.granularidad,
+            len(totals),
+            sum(1 for total in totals if total.record_count),
+            time.perf_counter() - started,
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -3,32 +3,184 @@
 """Endpoints REST para consumo y datos de clientes."""
 from __future__ import annotations
 
-from flask import Blueprint, current_app, jsonify, request
+from datetime import date
+from typing import Any, Callable, Dict, List
 
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+from werkzeug.http import is_resource_modified
+
+from backend.routing import replica_reads
 from backend.services import (
     CustomerNotFoundError,
     CustomerServiceError,
+    CustomerValidators,
+    get_consumption_history,
     get_consumption_summary,
     get_customer_profile,
+    get_customer_profiles,
+    get_customer_validators,
+    get_dashboard_view,
+    get_usage_aggregates,
+    iter_consumption_history,
 )
+from backend.services.aggregation_service import GRANULARITIES
+from backend.services.history_service import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 consumption_bp = Blueprint("consumption", __name__)
 
+MAX_BATCH_SIZE = 1000
+DEFAULT_CACHE_CONTROL = "private, no-cache"
 
-def _obtener_id_cliente() -> str:
-    customer_id = request.args.get("customer_id")
+
+# Validación y composición independientes de Flask: ``backend.asgi`` las
+# reutiliza para que ambos modos de servicio respondan igual.
+
+
+def validar_id_cliente(customer_id: str | None) -> str:
     if not customer_id:
         raise ValueError("El parámetro de consulta 'customer_id' es obligatorio")
     return customer_id
 
 
+def validar_ids_lote(body: Any) -> List[str]:
+    customer_ids = body.get("customer_ids") if isinstance(body, dict) else None
+    if not isinstance(customer_ids, list) or not customer_ids:
+        raise ValueError("El cuerpo debe incluir una lista no vacía 'customer_ids'")
+    if not all(isinstance(customer_id, str) and customer_id for customer_id in customer_ids):
+        raise ValueError("Todos los elementos de 'customer_ids' deben ser cadenas no vacías")
+    if len(customer_ids) > MAX_BATCH_SIZE:
+        raise ValueError(f"Se admiten como máximo {MAX_BATCH_SIZE} clientes por petición")
+    return customer_ids
+
+
+def componer_lote(
+    customer_ids: List[str], profiles: Dict[str, Dict[str, float | str]]
+) -> Dict[str, List[Dict[str, Any]]]:
+    """Perfiles encontrados y errores por identificador, en el orden de la petición."""
+
+    clientes = []
+    errores = []
+    for customer_id in dict.fromkeys(customer_ids):
+        profile = profiles.get(customer_id)
+        if profile is None:
+            errores.append({"cliente_id": customer_id, "mensaje": str(CustomerNotFoundError(customer_id))})
+        else:
+            clientes.append(profile)
+    return {"clientes": clientes, "errores": errores}
+
+
+def etiqueta_version(namespace: str, validators: CustomerValidators) -> str:
+    return f"{namespace}-{validators.version}"
+
+
+def _obtener_id_cliente() -> str:
+    return validar_id_cliente(request.args.get("customer_id"))
+
+
+def _obtener_ids_lote() -> List[str]:
+    return validar_ids_lote(request.get_json(silent=True))
+
+
+def _obtener_limite() -> int:
+    raw_value = request.args.get("limite")
+    if raw_value is None:
+        return DEFAULT_PAGE_SIZE
+    try:
+        limit = int(raw_value)
+    except ValueError as exc:
+        raise ValueError("El parámetro 'limite' debe ser un entero") from exc
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"El parámetro 'limite' debe estar entre 1 y {MAX_PAGE_SIZE}")
+    return limit
+
+
+def _obtener_fecha(name: str) -> date:
+    raw_value = request.args.get(name)
+    if not raw_value:
+        raise ValueError(f"El parámetro de consulta '{name}' es obligatorio")
+    try:
+        return date.fromisoformat(raw_value)
+    except ValueError as exc:
+        raise ValueError(f"El parámetro '{name}' debe tener formato AAAA-MM-DD") from exc
+
+
+def _obtener_granularidad() -> str:
+    granularity = request.args.get("granularidad", "mes")
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"El parámetro 'granularidad' debe ser uno de: {', '.join(GRANULARITIES)}")
+    return granularity
+
+
+def _obtener_clientes() -> List[str] | None:
+    raw_value = request.args.get("clientes")
+    if raw_value is None:
+        return None
+    customer_ids = list(dict.fromkeys(value.strip() for value in raw_value.split(",") if value.strip()))
+    if not customer_ids:
+        raise ValueError("El parámetro 'clientes' no puede estar vacío")
+    if len(customer_ids) > MAX_BATCH_SIZE:
+        raise ValueError(f"Se admiten como máximo {MAX_BATCH_SIZE} clientes por petición")
+    return customer_ids
+
+
+def _incluir_archivo() -> bool:
+    raw_value = request.args.get("archivo")
+    if raw_value is None:
+        return False
+    if raw_value.lower() in {"1", "true", "si", "sí"}:
+        return True
+    if raw_value.lower() in {"0", "false", "no"}:
+        return False
+    raise ValueError("El parámetro 'archivo' debe ser 'true' o 'false'")
+
+
+def _quiere_ndjson() -> bool:
+    if request.args.get("formato") == "ndjson":
+        return True
+    best = request.accept_mimetypes.best_match(["application/json", "application/x-ndjson"])
+    return best == "application/x-ndjson"
+
+
+def _respuesta_condicional(namespace: str, build: Callable[..., Dict[str, Any]]) -> Response:
+    """Responde con validadores HTTP y evita construir el cuerpo si no cambió.
+
+    La versión del cliente se obtiene con una consulta indexada; si coincide
+    con ``If-None-Match`` (o no hay cambios desde ``If-Modified-Since``) se
+    devuelve 304 sin cuerpo.
+    """
+
+    customer_id = _obtener_id_cliente()
+    # Validadores y cuerpo se leen de la misma réplica para que el ETag
+    # corresponda exactamente a la representación devuelta.
+    with replica_reads():
+        validators = get_customer_validators(customer_id)
+        return _respuesta_validada(
+            namespace, validators, lambda: build(customer_id, version=validators.version)
+        )
+
+
+def _respuesta_validada(
+    namespace: str, validators: CustomerValidators, build: Callable[[], Dict[str, Any]]
+) -> Response:
+    """Devuelve 304 si los validadores coinciden con la petición o el cuerpo de ``build``."""
+
+    etag = etiqueta_version(namespace, validators)
+    if is_resource_modified(request.environ, etag=etag, last_modified=validators.last_modified):
+        response = jsonify(build())
+    else:
+        response = current_app.response_class(status=304)
+
+    response.set_etag(etag)
+    response.last_modified = validators.last_modified
+    response.headers["Cache-Control"] = current_app.config.get("API_CACHE_CONTROL", DEFAULT_CACHE_CONTROL)
+    return response
+
+
 @consumption_bp.route("/api/consumo", methods=["GET"])
-def get_consumption() -> tuple:
+def get_consumption() -> Response | tuple:
     """Devuelve el consumo de datos y minutos del cliente indicado."""
     try:
-        customer_id = _obtener_id_cliente()
-        payload = get_consumption_summary(customer_id)
-        return jsonify(payload), 200
+        return _respuesta_condicional("consumo", get_consumption_summary)
     except ValueError as error:
         return jsonify({"mensaje": str(error)}), 400
     except CustomerNotFoundError as error:
@@ -39,12 +191,10 @@ def get_consumption() -> tuple:
 
 
 @consumption_bp.route("/api/cliente", methods=["GET"])
-def get_customer_profile_endpoint() -> tuple:
+def get_customer_profile_endpoint() -> Response | tuple:
     """Devuelve la información general del cliente indicado."""
     try:
-        customer_id = _obtener_id_cliente()
-        payload = get_customer_profile(customer_id)
-        return jsonify(payload), 200
+        return _respuesta_condicional("perfil", get_customer_profile)
     except ValueError as error:
         return jsonify({"mensaje": str(error)}), 400
     except CustomerNotFoundError as error:
@@ -52,3 +202,104 @@ def get_customer_profile_endpoint() -> tuple:
     except CustomerServiceError as error:
         current_app.logger.exception("Error consultando datos de cliente: %s", error)
         return jsonify({"mensaje": "Error interno del servidor"}), 500
+
+
+@consumption_bp.route("/api/dashboard", methods=["GET"])
+def get_dashboard() -> Response | tuple:
+    """Devuelve el perfil y el consumo del cliente indicado en una sola respuesta.
+
+    Los validadores y el cuerpo salen de la misma consulta, así que tanto la
+    respuesta 200 como la 304 cuestan un único viaje a la base de datos.
+    """
+    try:
+        view = get_dashboard_view(_obtener_id_cliente())
+        return _respuesta_validada("dashboard", view.validators, lambda: view.data)
+    except ValueError as error:
+        return jsonify({"mensaje": str(error)}), 400
+    except CustomerNotFoundError as error:
+        return jsonify({"mensaje": str(error)}), 404
+    except CustomerServiceError as error:
+        current_app.logger.exception("Error consultando el panel del cliente: %s", error)
+        return jsonify({"mensaje": "Error interno del servidor"}), 500
+
+
+@consumption_bp.route("/api/clientes/batch", methods=["POST"])
+def get_customer_profiles_batch() -> tuple:
+    """Devuelve los perfiles de varios clientes y los errores por identificador."""
+    try:
+        customer_ids = _obtener_ids_lote()
+        profiles = get_customer_profiles(customer_ids)
+    except ValueError as error:
+        return jsonify({"mensaje": str(error)}), 400
+    except CustomerServiceError as error:
+        current_app.logger.exception("Error consultando lote de clientes: %s", error)
+        return jsonify({"mensaje": "Error interno del servidor"}), 500
+    return jsonify(componer_lote(customer_ids, profiles)), 200
+
+
+@consumption_bp.route("/api/consumo/historial", methods=["GET"])
+def get_consumption_history_endpoint() -> Response | tuple:
+    """Devuelve el historial de consumos del cliente, del periodo más reciente al más antiguo.
+
+    Por defecto pagina con ``limite`` y ``cursor``; con ``formato=ndjson`` (o
+    ``Accept: application/x-ndjson``) transmite el historial completo, un
+    periodo por línea, a partir del cursor indicado. Con ``archivo=true``
+    incluye los periodos trasladados a ``consumptions_archive``.
+    """
+    try:
+        customer_id = _obtener_id_cliente()
+        cursor = request.args.get("cursor") or None
+        include_archive = _incluir_archivo()
+        if _quiere_ndjson():
+            periods = iter_consumption_history(customer_id, cursor, include_archive)
+            lines = (current_app.json.dumps(period) + "\n" for period in periods)
+            return Response(stream_with_context(lines), mimetype="application/x-ndjson")
+        page = get_consumption_history(customer_id, _obtener_limite(), cursor, include_archive)
+    except ValueError as error:
+        return jsonify({"mensaje": str(error)}), 400
+    except CustomerNotFoundError as error:
+        return jsonify({"mensaje": str(error)}), 404
+    except CustomerServiceError as error:
+        current_app.logger.exception("Error consultando historial de consumo: %s", error)
+        return jsonify({"mensaje": "Error interno del servidor"}), 500
+    return jsonify({"cliente_id": customer_id, "periodos": page.periods, "siguiente": page.next_cursor}), 200
+
+
+@consumption_bp.route("/api/consumo/agregado", methods=["GET"])
+def get_usage_aggregates_endpoint() -> tuple:
+    """Devuelve los totales de datos y minutos por día o mes entre ``desde`` y ``hasta``.
+
+    Sin ``clientes`` los totales se leen de la tabla de rollups (si
+    ``CONSUMPTION_ROLLUPS_ENABLED`` no la desactiva); con ``clientes`` se
+    agrupan en la base de datos en cada petición.
+    """
+    try:
+        granularity = _obtener_granularidad()
+        start, end = _obtener_fecha("desde"), _obtener_fecha("hasta")
+        customer_ids = _obtener_clientes()
+        use_rollups = customer_ids is None and bool(current_app.config.get("CONSUMPTION_ROLLUPS_ENABLED", True))
+        buckets = get_usage_aggregates(granularity, start, end, customer_ids, use_rollups=use_rollups)
+    except ValueError as error:
+        return jsonify({"mensaje": str(error)}), 400
+    except CustomerServiceError as error:
+        current_app.logger.exception("Error agregando consumos: %s", error)
+        return jsonify({"mensaje": "Error interno del servidor"}), 500
+
+    periodos = [
+        {
+            "periodo": bucket.bucket.isoformat(),
+            "consumo_mb": bucket.data_used_mb,
+            "minutos": bucket.voice_minutes,
+            "clientes": bucket.customer_count,
+            "registros": bucket.record_count,
+        }
+        for bucket in buckets
+    ]
+    response = {
+        "granularidad": granularity,
+        "desde": start.isoformat(),
+        "hasta": end.isoformat(),
+        "fuente": "rollup" if use_rollups else "consulta",
+        "periodos": periodos,
+    }
+    return jsonify(response), 200
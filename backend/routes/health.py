@@ -0,0 +1,58 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+"""Endpoints operativos para inspeccionar el estado del servicio."""
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+from flask import Blueprint, Response, jsonify
+
+from backend.instrumentation import get_request_metrics
+from backend.metrics import PROMETHEUS_CONTENT_TYPE, render_histogram, render_metric
+from backend.models import db
+from backend.pooling import pool_status
+from backend.routing import get_router
+
+health_bp = Blueprint("health", __name__)
+
+
+@health_bp.route("/estado/pool", methods=["GET"])
+def get_pool_status() -> tuple:
+    """Devuelve el uso del pool de conexiones y los tiempos de espera."""
+    status = pool_status(db.engine)
+    router = get_router()
+    if router is not None:
+        status.update(router.status())
+    return jsonify(status), 200
+
+
+def _pool_metrics(status: Dict[str, Any]) -> List[str]:
+    lines: List[str] = []
+    for name, documentation in (
+        ("size", "Tamaño configurado del pool."),
+        ("checked_out", "Conexiones en uso."),
+        ("idle", "Conexiones libres en el pool."),
+        ("overflow", "Conexiones abiertas por encima del tamaño del pool."),
+    ):
+        if name in status:
+            lines.extend(render_metric(f"telcox_db_pool_{name}", "gauge", documentation, [({}, status[name])]))
+    for name in ("connects", "checkouts", "invalidations", "timeouts"):
+        if name in status:
+            lines.extend(
+                render_metric(f"telcox_db_pool_{name}_total", "counter", f"Total de {name} del pool.", [({}, status[name])])
+            )
+    if "wait_seconds" in status:
+        lines.append("# HELP telcox_db_pool_wait_seconds Espera para obtener una conexión del pool.")
+        lines.append("# TYPE telcox_db_pool_wait_seconds histogram")
+        lines.extend(render_histogram("telcox_db_pool_wait_seconds", status["wait_seconds"]))
+    return lines
+
+
+@health_bp.route("/metrics", methods=["GET"])
+def get_metrics() -> Response:
+    """Expone las métricas del proceso en formato de texto de Prometheus."""
+    lines = _pool_metrics(pool_status(db.engine))
+    metrics = get_request_metrics()
+    if metrics is not None:
+        lines.extend(metrics.render())
+    return Response("\n".join(lines) + "\n", content_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,423 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+"""Selección perezosa del engine principal, de respaldo o de réplica.
+
+La decisión se toma al usar la base de datos y no al crear la aplicación: la
+primera sesión abre una conexión con el engine principal y, si falla, un
+*circuit breaker* desvía el tráfico al engine de respaldo durante
+``retry_after`` segundos antes de volver a intentarlo.
+
+Las consultas ejecutadas dentro de ``replica_reads`` (o de funciones
+decoradas con ``reads_from_replica``) se envían a una réplica de lectura
+sana y sin retraso excesivo; si no hay ninguna disponible se usa el engine
+principal.
+"""
+from __future__ import annotations
+
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List, Sequence, TypeVar
+
+from flask import current_app, has_app_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.engine.interfaces import ExceptionContext
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.sql.dml import UpdateBase
+
+
+ROUTER_EXTENSION_KEY = "db_router"
+DEFAULT_PROBE_TIMEOUT = 2.0
+REPLICA_STRATEGIES = ("round_robin", "least_connections")
+_WROTE_PRIMARY_KEY = "routing_wrote_primary"
+
+# Réplica elegida para el bloque ``replica_reads`` en curso (``None`` fuera de él).
+_replica_scope: ContextVar[Dict[str, Engine] | None] = ContextVar("replica_scope", default=None)
+# Marca las conexiones abiertas por ``_probe`` en el hilo actual.
+_probing = threading.local()
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class CircuitBreaker:
+    """Circuit breaker clásico de tres estados: cerrado, abierto y semiabierto.
+
+    Empieza semiabierto para que la primera petición compruebe el engine
+    principal; ``failure_threshold`` fallos seguidos lo abren y, pasado
+    ``retry_after``, vuelve a semiabierto para permitir un nuevo intento.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self, failure_threshold: int = 1, retry_after: float = 30.0, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        if failure_threshold <= 0:
+            raise ValueError("failure_threshold debe ser mayor que cero")
+        self.failure_threshold = failure_threshold
+        self.retry_after = retry_after
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.HALF_OPEN
+        self._failures = 0
+        self._opened_at = 0.0
+        self.trips = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.retry_after:
+                self._state = self.HALF_OPEN
+            return self._state
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.trips += 1
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+
+
+def _track_connect_errors(engine: Engine, breaker: CircuitBreaker) -> None:
+    def _on_error(context: ExceptionContext) -> None:
+        # Sin conexión asociada el error se produjo al conectar.
+        if context.connection is None or context.is_disconnect:
+            breaker.record_failure()
+
+    event.listen(engine, "handle_error", _on_error)
+
+
+def _limit_probe_timeout(engine: Engine, timeout: float) -> None:
+    """Aplica ``connect_timeout`` a las conexiones MySQL que abre ``_probe``.
+
+    El resto de conexiones del engine conservan el tiempo de espera del driver.
+    """
+
+    if engine.dialect.name != "mysql":
+        return
+
+    def _on_connect(dialect: Any, connection_record: Any, cargs: Any, cparams: Dict[str, Any]) -> None:
+        if getattr(_probing, "active", False):
+            cparams["connect_timeout"] = timeout
+
+    event.listen(engine, "do_connect", _on_connect)
+
+
+def _probe(engine: Engine, breaker: CircuitBreaker, lock: threading.Lock, wait: float = 0.0) -> bool:
+    """Comprueba un engine semiabierto con una conexión real y actualiza el breaker.
+
+    Solo un hilo comprueba a la vez. Los demás esperan como mucho ``wait``
+    segundos al resultado de esa prueba; si se agota, se comportan como si el
+    engine siguiera caído.
+    """
+
+    if not lock.acquire(timeout=wait):
+        return False
+    try:
+        if breaker.state != CircuitBreaker.HALF_OPEN:
+            return breaker.state == CircuitBreaker.CLOSED
+        _probing.active = True
+        try:
+            with engine.connect():
+                pass
+        except DBAPIError:
+            return False
+        finally:
+            _probing.active = False
+        breaker.record_success()
+        return True
+    finally:
+        lock.release()
+
+
+def replica_lag(engine: Engine) -> float | None:
+    """Segundos de retraso de una réplica MySQL, o ``None`` si no aplica.
+
+    Una réplica con la replicación detenida devuelve ``inf``.
+    """
+
+    if engine.dialect.name != "mysql":
+        return None
+    with engine.connect() as connection:
+        row = connection.exec_driver_sql("SHOW REPLICA STATUS").mappings().first()
+    if row is None:
+        return None
+    lag = row.get("Seconds_Behind_Source")
+    return float(lag) if lag is not None else float("inf")
+
+
+class Replica:
+    """Réplica de lectura con su circuit breaker, conexiones en uso y retraso medido."""
+
+    def __init__(
+        self,
+        engine: Engine,
+        breaker: CircuitBreaker | None = None,
+        max_lag: float | None = None,
+        lag_probe: Callable[[Engine], float | None] = replica_lag,
+        lag_check_interval: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+        probe_timeout: float = DEFAULT_PROBE_TIMEOUT,
+    ) -> None:
+        self.engine = engine
+        self.breaker = breaker or CircuitBreaker(clock=clock)
+        self.max_lag = max_lag
+        self.lag: float | None = None
+        self.in_use = 0
+        self._lag_probe = lag_probe
+        self._lag_check_interval = lag_check_interval
+        self._lag_checked_at: float | None = None
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.probe_lock = threading.Lock()
+        _track_connect_errors(engine, self.breaker)
+        _limit_probe_timeout(engine, probe_timeout)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+
+    def _on_checkout(self, *_args: Any) -> None:
+        with self._lock:
+            self.in_use += 1
+
+    def _on_checkin(self, *_args: Any) -> None:
+        with self._lock:
+            self.in_use = max(0, self.in_use - 1)
+
+    def lag_ok(self) -> bool:
+        """Indica si el retraso (medido como mucho cada ``lag_check_interval``) es aceptable."""
+
+        if self.max_lag is None:
+            return True
+        now = self._clock()
+        if self._lag_checked_at is None or now - self._lag_checked_at >= self._lag_check_interval:
+            self._lag_checked_at = now
+            try:
+                self.lag = self._lag_probe(self.engine)
+            except DBAPIError:
+                return False
+        return self.lag is None or self.lag <= self.max_lag
+
+    def available(self) -> bool:
+        state = self.breaker.state
+        if state == CircuitBreaker.OPEN:
+            return False
+        if state == CircuitBreaker.HALF_OPEN and not _probe(self.engine, self.breaker, self.probe_lock):
+            return False
+        return self.lag_ok()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "url": self.engine.url.render_as_string(hide_password=True),
+            "estado": self.breaker.state,
+            "conexiones_en_uso": self.in_use,
+            "retraso": self.lag,
+        }
+
+
+class ReplicaSet:
+    """Elige una réplica disponible por turno rotatorio o por menos conexiones en uso."""
+
+    def __init__(self, replicas: Sequence[Replica], strategy: str = "round_robin") -> None:
+        if strategy not in REPLICA_STRATEGIES:
+            raise ValueError(f"Estrategia de réplicas no soportada: {strategy!r}")
+        self.replicas = list(replicas)
+        self.strategy = strategy
+        self._turn = itertools.count()
+
+    def _candidates(self) -> List[Replica]:
+        if not self.replicas:
+            return []
+        start = next(self._turn) % len(self.replicas)
+        rotated = self.replicas[start:] + self.replicas[:start]
+        if self.strategy == "least_connections":
+            rotated.sort(key=lambda replica: replica.in_use)
+        return rotated
+
+    def choose(self) -> Engine | None:
+        for replica in self._candidates():
+            if replica.available():
+                return replica.engine
+        return None
+
+
+class DatabaseRouter:
+    """Elige el engine de cada sesión: principal, respaldo o réplica de lectura."""
+
+    def __init__(
+        self,
+        primary: Engine,
+        fallback: Engine | None = None,
+        breaker: CircuitBreaker | None = None,
+        replicas: ReplicaSet | None = None,
+        probe_timeout: float = DEFAULT_PROBE_TIMEOUT,
+        probe_wait: float | None = None,
+    ) -> None:
+        self.primary = primary
+        self.fallback = fallback
+        self.breaker = breaker or CircuitBreaker()
+        self.replicas = replicas
+        self._probe_lock = threading.Lock()
+        # Las peticiones concurrentes esperan a la prueba del principal para
+        # no repartir escrituras entre ambas bases mientras se decide.
+        self.probe_wait = 2 * probe_timeout if probe_wait is None else probe_wait
+        if fallback is not None:
+            _track_connect_errors(primary, self.breaker)
+            _limit_probe_timeout(primary, probe_timeout)
+
+    def active_engine(self) -> Engine:
+        """Devuelve el engine de escritura, comprobando el principal si toca."""
+
+        if self.fallback is None:
+            return self.primary
+        state = self.breaker.state
+        if state == CircuitBreaker.CLOSED:
+            return self.primary
+        if state == CircuitBreaker.HALF_OPEN and _probe(self.primary, self.breaker, self._probe_lock, self.probe_wait):
+            return self.primary
+        return self.fallback
+
+    def read_engine(self) -> Engine:
+        """Devuelve una réplica disponible o, si no hay, el engine de escritura."""
+
+        replica = self.replicas.choose() if self.replicas is not None else None
+        return replica or self.active_engine()
+
+    def engines(self) -> List[Engine]:
+        """Engines propios del enrutador (sin el principal, que gestiona Flask-SQLAlchemy)."""
+
+        engines = [self.fallback] if self.fallback is not None else []
+        if self.replicas is not None:
+            engines.extend(replica.engine for replica in self.replicas.replicas)
+        return engines
+
+    @contextmanager
+    def connect(self) -> Iterator[Connection]:
+        """Abre una conexión con el engine activo (para comandos y migraciones)."""
+
+        with self.active_engine().connect() as connection:
+            yield connection
+
+    def status(self) -> Dict[str, Any]:
+        status: Dict[str, Any] = {}
+        if self.fallback is not None:
+            state = self.breaker.state
+            status["respaldo"] = {
+                "estado": state,
+                "usa_respaldo": state == CircuitBreaker.OPEN,
+                "aperturas": self.breaker.trips,
+            }
+        if self.replicas is not None:
+            status["replicas"] = [replica.status() for replica in self.replicas.replicas]
+        return status
+
+
+def get_router() -> DatabaseRouter | None:
+    """Devuelve el enrutador de la aplicación activa, si se configuró respaldo o réplicas."""
+
+    if not has_app_context():
+        return None
+    return current_app.extensions.get(ROUTER_EXTENSION_KEY)
+
+
+def active_database_uri() -> str:
+    """URI completa del engine de escritura activo, para procesos que abren su propio engine.
+
+    Parte del engine ya creado y no de ``SQLALCHEMY_DATABASE_URI``: así
+    conserva la ruta SQLite resuelta en ``instance_path`` y respeta el
+    respaldo si el *circuit breaker* está abierto.
+    """
+
+    router = get_router()
+    engine = router.active_engine() if router is not None else current_app.extensions["sqlalchemy"].engine
+    return engine.url.render_as_string(hide_password=False)
+
+
+@contextmanager
+def replica_reads() -> Iterator[None]:
+    """Envía a una misma réplica las lecturas de la sesión dentro del bloque.
+
+    Los bloques anidados reutilizan la réplica elegida por el exterior, así
+    que varias consultas de una misma petición ven el mismo estado.
+    """
+
+    if _replica_scope.get() is not None:
+        yield
+        return
+    token = _replica_scope.set({})
+    try:
+        yield
+    finally:
+        _replica_scope.reset(token)
+
+
+def reads_from_replica(fn: F) -> F:
+    """Decora un servicio de solo lectura para que consulte las réplicas."""
+
+    @wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        with replica_reads():
+            return fn(*args, **kwargs)
+
+    return wrapper  # type: ignore[return-value]
+
+
+class RoutingSession(Session):
+    """Sesión de Flask-SQLAlchemy que consulta al enrutador antes de usar el engine principal.
+
+    Las escrituras (flush y sentencias DML) van siempre al engine de escritura
+    y, tras ellas, el resto de la transacción también lee de él para ver sus
+    propios cambios.
+    """
+
+    def get_bind(self, mapper: Any | None = None, clause: Any | None = None, bind: Any | None = None, **kwargs: Any):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        router = get_router()
+        if router is None or engine is not router.primary:
+            return engine
+
+        if self._flushing or isinstance(clause, UpdateBase):
+            self.info[_WROTE_PRIMARY_KEY] = True
+            return router.active_engine()
+
+        scope = _replica_scope.get()
+        if scope is not None and router.replicas is not None and not self.info.get(_WROTE_PRIMARY_KEY):
+            if "engine" not in scope:
+                scope["engine"] = router.read_engine()
+            return scope["engine"]
+        return router.active_engine()
+
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _forget_primary_writes(session: Session, transaction: Any) -> None:
+    if transaction.parent is None:
+        session.info.pop(_WROTE_PRIMARY_KEY, None)
+
+
+__all__ = [
+    "DEFAULT_PROBE_TIMEOUT",
+    "REPLICA_STRATEGIES",
+    "CircuitBreaker",
+    "DatabaseRouter",
+    "Replica",
+    "ReplicaSet",
+    "RoutingSession",
+    "active_database_uri",
+    "get_router",
+    "reads_from_replica",
+    "replica_lag",
+    "replica_reads",
+]
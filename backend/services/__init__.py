@@ -3,16 +3,52 @@
 """Paquete de servicios de dominio."""
 from __future__ import annotations
 
+from .aggregation_service import GRANULARITIES, UsageBucket, get_usage_aggregates
+from .cache import (
+    CacheBackend,
+    MemoryCache,
+    RedisCache,
+    SQLiteCache,
+    get_cache,
+    init_cache,
+    invalidate_customers,
+)
 from .customer_service import (
     CustomerNotFoundError,
     CustomerServiceError,
+    CustomerValidators,
+    DashboardView,
     get_consumption_summary,
     get_customer_profile,
+    get_customer_profiles,
+    get_customer_validators,
+    get_dashboard_data,
+    get_dashboard_view,
 )
+from .history_service import HistoryPage, get_consumption_history, iter_consumption_history
 
 __all__ = [
+    "GRANULARITIES",
+    "UsageBucket",
+    "get_usage_aggregates",
+    "CacheBackend",
+    "MemoryCache",
+    "RedisCache",
+    "SQLiteCache",
+    "get_cache",
+    "init_cache",
+    "invalidate_customers",
     "CustomerNotFoundError",
     "CustomerServiceError",
+    "CustomerValidators",
+    "DashboardView",
     "get_consumption_summary",
     "get_customer_profile",
+    "get_customer_profiles",
+    "get_customer_validators",
+    "get_dashboard_data",
+    "get_dashboard_view",
+    "HistoryPage",
+    "get_consumption_history",
+    "iter_consumption_history",
 ]
@@ -0,0 +1,330 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+"""Totales de consumo agrupados por día o mes y su tabla de rollups.
+
+Los periodos se asignan al intervalo de su ``period_start``. El agrupado se
+resuelve en la base de datos con una función de truncado de fechas propia de
+cada dialecto sobre ``consumptions`` y ``consumptions_archive`` a la vez, de
+modo que archivar consumos no cambia los totales; cada tabla se recorre por su
+índice cubriente de ``period_start``.
+
+Sin filtro de clientes, los intervalos cerrados (anteriores al que contiene
+la fecha actual) se sirven desde ``consumption_rollups``. Las lecturas nunca
+escriben: los intervalos abiertos y los que faltan en la tabla se calculan en
+la consulta, y solo ``python -m backend.rollups`` guarda intervalos cerrados.
+Los cambios en ``consumptions`` eliminan los intervalos afectados para que se
+vuelvan a calcular hasta el siguiente precálculo.
+"""
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from itertools import chain
+from typing import Any, Dict, Iterable, List, NamedTuple, Sequence, Set, Tuple
+
+from sqlalchemy import Date, Select, delete, event, func, insert, inspect, select, tuple_, union_all
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.functions import FunctionElement
+
+from backend.models import Consumption, ConsumptionArchive, ConsumptionRollup, Customer, db
+from backend.services.customer_service import CustomerServiceError
+
+
+GRANULARITIES = ("dia", "mes")
+MAX_BUCKETS = 5_000
+
+_hooks_registered = False
+
+
+class date_bucket(FunctionElement):
+    """Trunca una fecha al inicio de su día o mes según el dialecto."""
+
+    type = Date()
+    inherit_cache = True
+
+    def __init__(self, column: Any, granularity: str) -> None:
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Granularidad no soportada: {granularity!r}")
+        self.granularity = granularity
+        super().__init__(column)
+
+
+@compiles(date_bucket)
+def _date_bucket_default(element: date_bucket, compiler: Any, **kw: Any) -> str:
+    unit = "day" if element.granularity == "dia" else "month"
+    return f"CAST(date_trunc('{unit}', {compiler.process(element.clauses, **kw)}) AS DATE)"
+
+
+@compiles(date_bucket, "sqlite")
+def _date_bucket_sqlite(element: date_bucket, compiler: Any, **kw: Any) -> str:
+    column = compiler.process(element.clauses, **kw)
+    if element.granularity == "dia":
+        return f"date({column})"
+    return f"strftime('%Y-%m-01', {column})"
+
+
+@compiles(date_bucket, "mysql")
+def _date_bucket_mysql(element: date_bucket, compiler: Any, **kw: Any) -> str:
+    column = compiler.process(element.clauses, **kw)
+    if element.granularity == "dia":
+        return f"DATE({column})"
+    return f"CAST(DATE_FORMAT({column}, '%%Y-%%m-01') AS DATE)"
+
+
+class UsageBucket(NamedTuple):
+    """Totales de consumo de un intervalo."""
+
+    bucket: date
+    data_used_mb: float
+    voice_minutes: float
+    customer_count: int
+    record_count: int
+
+
+def bucket_start(value: date, granularity: str) -> date:
+    return value if granularity == "dia" else value.replace(day=1)
+
+
+def _next_bucket(value: date, granularity: str) -> date:
+    if granularity == "dia":
+        return value + timedelta(days=1)
+    return date(value.year + value.month // 12, value.month % 12 + 1, 1)
+
+
+def open_bucket(granularity: str, today: date | None = None) -> date:
+    """Intervalo que contiene ``today``: todavía puede recibir consumos."""
+
+    return bucket_start(today or date.today(), granularity)
+
+
+def closed_buckets(buckets: Iterable[date], granularity: str, today: date | None = None) -> List[date]:
+    """Intervalos de ``buckets`` anteriores al intervalo abierto, sin repetir y ordenados."""
+
+    current = open_bucket(granularity, today)
+    return sorted({bucket for bucket in buckets if bucket < current})
+
+
+def _contiguous_runs(buckets: Sequence[date], granularity: str) -> List[Tuple[date, date]]:
+    """Agrupa intervalos ordenados en tramos consecutivos ``(primero, último)``."""
+
+    runs: List[Tuple[date, date]] = []
+    for bucket in buckets:
+        if runs and _next_bucket(runs[-1][1], granularity) == bucket:
+            runs[-1] = (runs[-1][0], bucket)
+        else:
+            runs.append((bucket, bucket))
+    return runs
+
+
+def bucket_range(start: date, end: date, granularity: str) -> List[date]:
+    """Intervalos que cubren ``[start, end]`` o ``ValueError`` si son demasiados."""
+
+    if end < start:
+        raise ValueError("'hasta' no puede ser anterior a 'desde'")
+    buckets: List[date] = []
+    current = bucket_start(start, granularity)
+    while current <= end:
+        buckets.append(current)
+        if len(buckets) > MAX_BUCKETS:
+            raise ValueError(f"El rango supera el máximo de {MAX_BUCKETS} intervalos")
+        current = _next_bucket(current, granularity)
+    return buckets
+
+
+def _as_date(value: Any) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _usage_rows(model: Any, start: date, end: date, customer_ids: Sequence[str] | None) -> Select:
+    statement = select(model.customer_id, model.period_start, model.data_used_mb, model.voice_minutes).where(
+        model.period_start >= start, model.period_start <= end
+    )
+    if customer_ids is not None:
+        statement = statement.where(
+            model.customer_id.in_(select(Customer.id).where(Customer.external_id.in_(customer_ids)))
+        )
+    return statement
+
+
+def aggregate_statement(granularity: str, start: date, end: date, customer_ids: Sequence[str] | None = None) -> Select:
+    """``GROUP BY`` por intervalo sobre los periodos, activos o archivados, que empiezan en ``[start, end]``."""
+
+    usage = union_all(
+        _usage_rows(Consumption, start, end, customer_ids),
+        _usage_rows(ConsumptionArchive, start, end, customer_ids),
+    ).subquery("usage")
+    bucket = date_bucket(usage.c.period_start, granularity).label("bucket")
+    return (
+        select(
+            bucket,
+            func.coalesce(func.sum(usage.c.data_used_mb), 0.0),
+            func.coalesce(func.sum(usage.c.voice_minutes), 0.0),
+            func.count(func.distinct(usage.c.customer_id)),
+            func.count(),
+        )
+        .group_by(bucket)
+        .order_by(bucket)
+    )
+
+
+def _live_totals(
+    connection: Connection, granularity: str, start: date, end: date, customer_ids: Sequence[str] | None = None
+) -> List[UsageBucket]:
+    rows = connection.execute(aggregate_statement(granularity, start, end, customer_ids))
+    return [
+        UsageBucket(_as_date(bucket), float(data_used), float(minutes), int(customers), int(records))
+        for bucket, data_used, minutes, customers, records in rows
+    ]
+
+
+def refresh_rollups(
+    connection: Connection, granularity: str, buckets: Iterable[date], today: date | None = None
+) -> List[UsageBucket]:
+    """Recalcula y guarda los intervalos cerrados indicados (también los vacíos) en la transacción actual.
+
+    Los intervalos abiertos se ignoran: sus totales cambian con cada carga y
+    se calculan siempre en la consulta.
+    """
+
+    buckets = closed_buckets(buckets, granularity, today)
+    if not buckets:
+        return []
+    start, end = buckets[0], _next_bucket(buckets[-1], granularity) - timedelta(days=1)
+    computed = {row.bucket: row for row in _live_totals(connection, granularity, start, end)}
+    totals = [computed.get(bucket, UsageBucket(bucket, 0.0, 0.0, 0, 0)) for bucket in buckets]
+
+    connection.execute(
+        delete(ConsumptionRollup).where(
+            ConsumptionRollup.granularity == granularity, ConsumptionRollup.bucket.in_(buckets)
+        )
+    )
+    refreshed_at = datetime.utcnow()
+    connection.execute(
+        insert(ConsumptionRollup),
+        [
+            {
+                "granularity": granularity,
+                "bucket": total.bucket,
+                "data_used_mb": total.data_used_mb,
+                "voice_minutes": total.voice_minutes,
+                "customer_count": total.customer_count,
+                "record_count": total.record_count,
+                "refreshed_at": refreshed_at,
+            }
+            for total in totals
+        ],
+    )
+    return totals
+
+
+def invalidate_rollups(connection: Connection, period_starts: Iterable[date]) -> None:
+    """Elimina los intervalos de todas las granularidades que contienen las fechas indicadas."""
+
+    keys = {(granularity, bucket_start(value, granularity)) for value in period_starts for granularity in GRANULARITIES}
+    if not keys:
+        return
+    connection.execute(
+        delete(ConsumptionRollup).where(tuple_(ConsumptionRollup.granularity, ConsumptionRollup.bucket).in_(sorted(keys)))
+    )
+
+
+def _rollup_totals(
+    connection: Connection, granularity: str, start: date, end: date, today: date | None = None
+) -> List[UsageBucket]:
+    buckets = bucket_range(start, end, granularity)
+    rows = connection.execute(
+        select(
+            ConsumptionRollup.bucket,
+            ConsumptionRollup.data_used_mb,
+            ConsumptionRollup.voice_minutes,
+            ConsumptionRollup.customer_count,
+            ConsumptionRollup.record_count,
+        ).where(
+            ConsumptionRollup.granularity == granularity,
+            ConsumptionRollup.bucket >= buckets[0],
+            ConsumptionRollup.bucket <= buckets[-1],
+            ConsumptionRollup.bucket < open_bucket(granularity, today),
+        )
+    )
+    totals: Dict[date, UsageBucket] = {}
+    for bucket, data_used, minutes, customers, records in rows:
+        bucket = _as_date(bucket)
+        totals[bucket] = UsageBucket(bucket, float(data_used), float(minutes), int(customers), int(records))
+
+    pending = [bucket for bucket in buckets if bucket not in totals]
+    for first, last in _contiguous_runs(pending, granularity):
+        last_day = _next_bucket(last, granularity) - timedelta(days=1)
+        totals.update((total.bucket, total) for total in _live_totals(connection, granularity, first, last_day))
+    return [totals[bucket] for bucket in buckets if bucket in totals and totals[bucket].record_count]
+
+
+def get_usage_aggregates(
+    granularity: str,
+    start: date,
+    end: date,
+    customer_ids: Sequence[str] | None = None,
+    use_rollups: bool = True,
+) -> List[UsageBucket]:
+    """Devuelve los totales por intervalo de los periodos que empiezan en ``[start, end]``.
+
+    Con ``customer_ids`` el agrupado se hace siempre sobre los consumos;
+    sin él, y con ``use_rollups``, los intervalos cerrados se leen de
+    ``consumption_rollups``. No escribe en la base de datos. Los intervalos
+    sin consumos no se incluyen.
+    """
+
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"La granularidad debe ser una de: {', '.join(GRANULARITIES)}")
+    bucket_range(start, end, granularity)
+    try:
+        if use_rollups and customer_ids is None:
+            return _rollup_totals(db.session.connection(), granularity, start, end)
+        return _live_totals(db.session.connection(), granularity, start, end, customer_ids)
+    except SQLAlchemyError as exc:
+        raise CustomerServiceError("Error al agregar los consumos") from exc
+
+
+def _changed_period_starts(session: Session) -> Set[date]:
+    period_starts: Set[date] = set()
+    for instance in chain(session.new, session.dirty, session.deleted):
+        if isinstance(instance, Consumption):
+            history = inspect(instance).attrs["period_start"].history
+            period_starts.update(value for value in chain(*history) if value)
+    return period_starts
+
+
+def _invalidate_after_flush(session: Session, flush_context: Any) -> None:
+    period_starts = _changed_period_starts(session)
+    if period_starts:
+        invalidate_rollups(session.connection(), period_starts)
+
+
+def register_rollup_hooks() -> None:
+    """Registra una única vez el evento de sesión que invalida los rollups."""
+
+    global _hooks_registered
+    if _hooks_registered:
+        return
+    event.listen(Session, "after_flush", _invalidate_after_flush)
+    _hooks_registered = True
+
+
+__all__ = [
+    "GRANULARITIES",
+    "UsageBucket",
+    "aggregate_statement",
+    "bucket_range",
+    "closed_buckets",
+    "date_bucket",
+    "get_usage_aggregates",
+    "invalidate_rollups",
+    "open_bucket",
+    "refresh_rollups",
+    "register_rollup_hooks",
+]
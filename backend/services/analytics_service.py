@@ -0,0 +1,230 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+"""Analítica por lotes de saldos y consumo de todos los clientes con NumPy.
+
+Pensado para procesos nocturnos (reclamación de impagos, informes de uso
+razonable) que recorren todos los clientes: las filas se leen con un cursor
+de servidor en bloques de ``chunk_size``, se convierten a arrays y se
+acumulan por cliente con operaciones vectorizadas.
+
+Los importes se convierten a céntimos enteros en la propia consulta
+(``ROUND(amount * 100)``), de modo que sumas y saldos son exactos y solo se
+pasan a ``Decimal`` al presentarlos. ``numpy`` es una dependencia opcional
+(``requirements-analytics.txt``).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal
+from typing import Any, Dict, Iterator, Mapping, Sequence, Tuple
+
+from sqlalchemy import BigInteger, CompoundSelect, Select, and_, case, cast, func, select, union_all
+from sqlalchemy.engine import Connection
+
+from backend.models import Billing, Consumption, ConsumptionArchive, Customer
+
+
+DEFAULT_CHUNK_SIZE = 100_000
+DEFAULT_PERCENTILES = (50.0, 90.0, 95.0, 99.0)
+
+
+class AnalyticsError(Exception):
+    """Error que impide calcular un informe."""
+
+
+def _require_numpy() -> Any:
+    try:
+        import numpy
+    except ImportError as exc:
+        raise AnalyticsError("El paquete 'numpy' es necesario para la analítica por lotes") from exc
+    return numpy
+
+
+def cents_to_decimal(cents: int) -> Decimal:
+    return Decimal(int(cents)).scaleb(-2)
+
+
+def group_sum(ids: Any, values: Any) -> Tuple[Any, Any]:
+    """Suma las columnas de ``values`` por identificador; devuelve ids ordenados y sumas."""
+
+    np = _require_numpy()
+    unique_ids, inverse = np.unique(ids, return_inverse=True)
+    sums = np.zeros((unique_ids.size, values.shape[1]), dtype=values.dtype)
+    np.add.at(sums, inverse.ravel(), values)
+    return unique_ids, sums
+
+
+def _accumulate(
+    chunks: Iterator[Sequence[Any]], dtype: Any, columns: int
+) -> Tuple[Any, Any, int]:
+    """Agrupa por la primera columna bloque a bloque, sin retener las filas leídas."""
+
+    np = _require_numpy()
+    ids = np.empty(0, dtype=np.int64)
+    sums = np.empty((0, columns), dtype=dtype)
+    rows_read = 0
+    for rows in chunks:
+        if not rows:
+            continue
+        chunk_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        chunk_values = np.array([tuple(row[1:]) for row in rows], dtype=dtype).reshape(len(rows), columns)
+        ids, sums = group_sum(np.concatenate((ids, chunk_ids)), np.concatenate((sums, chunk_values)))
+        rows_read += len(rows)
+    return ids, sums, rows_read
+
+
+def _streamed(connection: Connection, statement: Select | CompoundSelect, chunk_size: int) -> Iterator[Sequence[Any]]:
+    result = connection.execute(statement.execution_options(stream_results=True, yield_per=chunk_size))
+    yield from result.partitions()
+
+
+def unpaid_billings_statement(as_of: date) -> Select:
+    """Facturas pendientes en céntimos enteros y con marca de vencidas a ``as_of``."""
+
+    overdue = case((and_(Billing.due_date.is_not(None), Billing.due_date < as_of), 1), else_=0)
+    cents = cast(func.round(Billing.amount * 100), BigInteger)
+    return select(Billing.customer_id, cents, cents * overdue).where(Billing.paid.is_(False))
+
+
+def usage_statement(start: date, end: date) -> CompoundSelect:
+    """Consumos, activos o archivados, cuyo periodo empieza en ``[start, end]``.
+
+    Cada rama recorre su índice cubriente (``ix_consumptions_period_start`` e
+    ``ix_consumptions_archive_period_start``).
+    """
+
+    return union_all(
+        *(
+            select(model.customer_id, model.data_used_mb, model.voice_minutes).where(
+                model.period_start >= start, model.period_start <= end
+            )
+            for model in (Consumption, ConsumptionArchive)
+        )
+    )
+
+
+@dataclass
+class BalanceReport:
+    """Saldo pendiente y vencido, en céntimos, de cada cliente con facturas sin pagar."""
+
+    as_of: date
+    customer_ids: Any
+    outstanding_cents: Any
+    overdue_cents: Any
+    rows_read: int = 0
+
+    @property
+    def total_outstanding(self) -> Decimal:
+        return cents_to_decimal(self.outstanding_cents.sum())
+
+    @property
+    def total_overdue(self) -> Decimal:
+        return cents_to_decimal(self.overdue_cents.sum())
+
+    def overdue(self, minimum_cents: int = 1) -> "BalanceReport":
+        """Subconjunto de clientes con al menos ``minimum_cents`` vencidos."""
+
+        mask = self.overdue_cents >= minimum_cents
+        return BalanceReport(
+            self.as_of, self.customer_ids[mask], self.outstanding_cents[mask], self.overdue_cents[mask], self.rows_read
+        )
+
+    def records(self, external_ids: Mapping[int, str]) -> Iterator[Dict[str, Any]]:
+        for customer_id, outstanding, overdue in zip(
+            self.customer_ids.tolist(), self.outstanding_cents.tolist(), self.overdue_cents.tolist()
+        ):
+            yield {
+                "cliente_id": external_ids.get(customer_id, str(customer_id)),
+                "saldo": cents_to_decimal(outstanding),
+                "vencido": cents_to_decimal(overdue),
+            }
+
+
+@dataclass
+class UsageReport:
+    """Consumo total por cliente en un rango y sus percentiles entre clientes."""
+
+    start: date
+    end: date
+    customer_ids: Any
+    data_used_mb: Any
+    voice_minutes: Any
+    percentiles: Dict[str, Dict[float, float]] = field(default_factory=dict)
+    rows_read: int = 0
+
+    def above(self, percentile: float, metric: str = "data_used_mb") -> Any:
+        """Clientes cuyo consumo supera el percentil indicado de ``metric``."""
+
+        np = _require_numpy()
+        values = getattr(self, metric)
+        if values.size == 0:
+            return values.astype(np.int64)
+        return self.customer_ids[values > np.percentile(values, percentile)]
+
+    def records(self, external_ids: Mapping[int, str]) -> Iterator[Dict[str, Any]]:
+        for customer_id, data_used, minutes in zip(
+            self.customer_ids.tolist(), self.data_used_mb.tolist(), self.voice_minutes.tolist()
+        ):
+            yield {
+                "cliente_id": external_ids.get(customer_id, str(customer_id)),
+                "consumo_mb": data_used,
+                "minutos": minutes,
+            }
+
+
+def compute_balances(
+    connection: Connection, as_of: date | None = None, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> BalanceReport:
+    """Calcula saldo pendiente y vencido (``due_date`` anterior a ``as_of``) de todos los clientes."""
+
+    np = _require_numpy()
+    as_of = as_of or date.today()
+    ids, sums, rows_read = _accumulate(
+        _streamed(connection, unpaid_billings_statement(as_of), chunk_size), np.int64, 2
+    )
+    return BalanceReport(as_of, ids, sums[:, 0], sums[:, 1], rows_read)
+
+
+def compute_usage(
+    connection: Connection,
+    start: date,
+    end: date,
+    percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> UsageReport:
+    """Suma datos y minutos por cliente en ``[start, end]`` y calcula los percentiles indicados."""
+
+    if end < start:
+        raise AnalyticsError("'hasta' no puede ser anterior a 'desde'")
+    np = _require_numpy()
+    ids, sums, rows_read = _accumulate(_streamed(connection, usage_statement(start, end), chunk_size), np.float64, 2)
+    report = UsageReport(start, end, ids, sums[:, 0], sums[:, 1], rows_read=rows_read)
+    if ids.size:
+        for metric in ("data_used_mb", "voice_minutes"):
+            values = np.percentile(getattr(report, metric), list(percentiles))
+            report.percentiles[metric] = dict(zip(percentiles, values.tolist()))
+    return report
+
+
+def load_external_ids(connection: Connection) -> Dict[int, str]:
+    """Precarga el mapa ``customer_id`` → ``external_id`` para presentar los informes."""
+
+    rows = connection.execute(select(Customer.id, Customer.external_id).execution_options(yield_per=10_000))
+    return {customer_id: external_id for customer_id, external_id in rows}
+
+
+__all__ = [
+    "DEFAULT_CHUNK_SIZE",
+    "DEFAULT_PERCENTILES",
+    "AnalyticsError",
+    "BalanceReport",
+    "UsageReport",
+    "cents_to_decimal",
+    "compute_balances",
+    "compute_usage",
+    "group_sum",
+    "load_external_ids",
+    "unpaid_billings_statement",
+    "usage_statement",
+]
@@ -0,0 +1,167 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+"""Traslado de consumos históricos de ``consumptions`` a ``consumptions_archive``.
+
+Los periodos que terminan antes del corte de retención se copian al archivo
+y se borran de la tabla caliente en lotes pequeños, cada uno en su propia
+transacción y con una pausa opcional entre lotes, para no mantener bloqueos
+largos sobre ``consumptions`` ni saturar la replicación. Cada lote continúa
+tras la clave ``(period_start, id)`` del anterior en lugar de volver a
+recorrer los consumos que se conservan. El último consumo de cada cliente
+nunca se archiva: es el que alimenta ``customer_summaries``. Las agregaciones
+y los rollups suman ``consumptions_archive``, así que no cambian al archivar.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import NamedTuple, Tuple
+
+from sqlalchemy import and_, delete, exists, insert, or_, select
+from sqlalchemy.engine import Connection
+
+from backend.models import Consumption, ConsumptionArchive, CustomerSummary
+from backend.services.periods import add_months, month_start
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RETENTION_MONTHS = 24
+DEFAULT_BATCH_SIZE = 1_000
+
+ArchiveKey = Tuple[date, int]
+
+_ARCHIVE_COLUMNS = [
+    Consumption.id,
+    Consumption.customer_id,
+    Consumption.period_start,
+    Consumption.period_end,
+    Consumption.data_used_mb,
+    Consumption.voice_minutes,
+    Consumption.created_at,
+]
+
+
+@dataclass
+class ArchiveStats:
+    """Filas archivadas, lotes confirmados y tiempo empleado."""
+
+    rows: int = 0
+    batches: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+
+class ArchiveBatch(NamedTuple):
+    """Consumos movidos en un lote y clave ``(period_start, id)`` del último."""
+
+    rows: int
+    last_key: ArchiveKey | None
+
+
+def archive_cutoff(retention_months: int, today: date | None = None) -> date:
+    """Primer día del mes ``retention_months`` meses antes de ``today``."""
+
+    if retention_months < 0:
+        raise ValueError("La retención debe ser un número de meses no negativo")
+    return add_months(month_start(today or date.today()), -retention_months)
+
+
+def _archivable(cutoff: date, after: ArchiveKey | None = None):
+    """Consumos cuyo periodo termina antes de ``cutoff`` y que no son el último del cliente.
+
+    La condición sobre ``period_start`` permite recorrer el índice
+    ``ix_consumptions_period_start`` y, en MySQL, ``period_end`` poda las
+    particiones recientes. Con ``after`` solo se consideran las claves
+    ``(period_start, id)`` posteriores.
+    """
+
+    is_latest = exists().where(
+        CustomerSummary.customer_id == Consumption.customer_id,
+        CustomerSummary.latest_consumption_id == Consumption.id,
+    )
+    criteria = [Consumption.period_start < cutoff, Consumption.period_end < cutoff, ~is_latest]
+    if after is not None:
+        period_start, consumption_id = after
+        criteria.append(
+            or_(
+                Consumption.period_start > period_start,
+                and_(Consumption.period_start == period_start, Consumption.id > consumption_id),
+            )
+        )
+    return and_(*criteria)
+
+
+def archive_batch(
+    connection: Connection, cutoff: date, batch_size: int = DEFAULT_BATCH_SIZE, after: ArchiveKey | None = None
+) -> ArchiveBatch:
+    """Archiva hasta ``batch_size`` consumos posteriores a ``after`` en una transacción."""
+
+    rows = connection.execute(
+        select(*_ARCHIVE_COLUMNS)
+        .where(_archivable(cutoff, after))
+        .order_by(Consumption.period_start, Consumption.id)
+        .limit(batch_size)
+    ).all()
+    if not rows:
+        connection.rollback()
+        return ArchiveBatch(0, after)
+    archived_at = datetime.utcnow()
+    connection.execute(
+        insert(ConsumptionArchive),
+        [{**row._asdict(), "archived_at": archived_at} for row in rows],
+    )
+    connection.execute(
+        delete(Consumption).where(Consumption.id.in_([row.id for row in rows]), Consumption.period_end < cutoff)
+    )
+    connection.commit()
+    return ArchiveBatch(len(rows), (rows[-1].period_start, rows[-1].id))
+
+
+def archive_consumptions(
+    connection: Connection,
+    cutoff: date,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    pause: float = 0.0,
+    max_batches: int | None = None,
+) -> ArchiveStats:
+    """Archiva por lotes todos los consumos anteriores a ``cutoff``.
+
+    ``pause`` son los segundos de espera entre lotes y ``max_batches`` limita
+    el trabajo de una ejecución, de modo que el proceso puede repartirse en
+    varias ventanas de mantenimiento. ``connection`` no debe tener una
+    transacción ajena en curso.
+    """
+
+    if batch_size <= 0:
+        raise ValueError("El tamaño de lote debe ser positivo")
+    stats = ArchiveStats()
+    started = time.perf_counter()
+    after: ArchiveKey | None = None
+    while max_batches is None or stats.batches < max_batches:
+        moved, after = archive_batch(connection, cutoff, batch_size, after)
+        if not moved:
+            break
+        stats.rows += moved
+        stats.batches += 1
+        logger.debug("Archivados %s consumos en %s lotes", stats.rows, stats.batches)
+        if pause:
+            time.sleep(pause)
+    stats.elapsed = time.perf_counter() - started
+    return stats
+
+
+__all__ = [
+    "DEFAULT_BATCH_SIZE",
+    "DEFAULT_RETENTION_MONTHS",
+    "ArchiveBatch",
+    "ArchiveStats",
+    "archive_batch",
+    "archive_consumptions",
+    "archive_cutoff",
+]
@@ -0,0 +1,66 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+"""Variantes asíncronas de los servicios de clientes sobre ``AsyncSession``.
+
+Cada servicio ejecuta la misma función ``query_*`` de ``customer_service``
+con ``AsyncSession.run_sync``: el código de consulta es síncrono, pero la E/S
+con la base de datos se cede al bucle de eventos a través de ``greenlet``,
+de modo que ambos modos de servicio comparten consultas, respuestas y errores.
+"""
+from __future__ import annotations
+
+from typing import Dict, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.services.customer_service import (
+    BATCH_CHUNK_SIZE,
+    CustomerValidators,
+    DashboardView,
+    query_consumption_summary,
+    query_customer_profile,
+    query_customer_profiles,
+    query_customer_validators,
+    query_dashboard_view,
+)
+
+
+async def get_consumption_summary(session: AsyncSession, external_id: str) -> Dict[str, float | str]:
+    """Devuelve el consumo de datos y minutos para un cliente."""
+
+    return await session.run_sync(query_consumption_summary, external_id)
+
+
+async def get_customer_profile(session: AsyncSession, external_id: str) -> Dict[str, float | str]:
+    """Devuelve la información general de un cliente."""
+
+    return await session.run_sync(query_customer_profile, external_id)
+
+
+async def get_dashboard_view(session: AsyncSession, external_id: str) -> DashboardView:
+    """Devuelve en una sola consulta el panel del cliente y sus validadores HTTP."""
+
+    return await session.run_sync(query_dashboard_view, external_id)
+
+
+async def get_customer_profiles(
+    session: AsyncSession, external_ids: Sequence[str], chunk_size: int = BATCH_CHUNK_SIZE
+) -> Dict[str, Dict[str, float | str]]:
+    """Devuelve los perfiles de varios clientes indexados por identificador externo."""
+
+    return await session.run_sync(query_customer_profiles, external_ids, chunk_size)
+
+
+async def get_customer_validators(session: AsyncSession, external_id: str) -> CustomerValidators:
+    """Devuelve la versión y la fecha de última modificación de un cliente."""
+
+    return await session.run_sync(query_customer_validators, external_id)
+
+
+__all__ = [
+    "get_consumption_summary",
+    "get_customer_profile",
+    "get_customer_profiles",
+    "get_customer_validators",
+    "get_dashboard_view",
+]
@@ -0,0 +1,379 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+"""Caché de resultados de los servicios de clientes."""
+from __future__ import annotations
+
+import copy
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import wraps
+from itertools import chain
+from typing import Any, Callable, Dict, Iterable, Set, Tuple, TypeVar
+
+from flask import Flask, current_app, has_app_context
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from backend.models import Customer
+from backend.services.summary_service import changed_customer_ids
+
+
+CACHE_EXTENSION_KEY = "customer_cache"
+_PENDING_INVALIDATIONS_KEY = "customer_cache_pending"
+
+_namespaces: Set[str] = set()
+_hooks_registered = False
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class CacheBackend(ABC):
+    """Interfaz común de los almacenes de caché."""
+
+    @abstractmethod
+    def get(self, key: str) -> Any | None:
+        """Devuelve el valor almacenado o ``None`` si no existe o expiró."""
+
+    @abstractmethod
+    def set(self, key: str, value: Any) -> None:
+        """Almacena un valor bajo la clave indicada."""
+
+    @abstractmethod
+    def delete_many(self, keys: Iterable[str]) -> None:
+        """Elimina las claves indicadas si existen."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Vacía la caché."""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, int]:
+        """Devuelve los contadores de aciertos, fallos y desalojos."""
+
+
+class MemoryCache(CacheBackend):
+    """Caché LRU acotada por número de entradas y con expiración por TTL."""
+
+    def __init__(self, max_entries: int = 10_000, ttl: float = 60.0, clock: Callable[[], float] = time.monotonic) -> None:
+        if max_entries <= 0:
+            raise ValueError("max_entries debe ser mayor que cero")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                self._expirations += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+            }
+
+
+class _Counters:
+    """Contadores de aciertos y fallos locales al proceso."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+
+class SQLiteCache(CacheBackend):
+    """Caché compartida entre procesos de un mismo host sobre un fichero SQLite.
+
+    Cada hilo abre su propia conexión en modo WAL y se reconecta tras un
+    ``fork``. El desalojo es FIFO, no LRU: como todas las entradas viven
+    ``ttl`` segundos, ordenar por ``expires_at`` equivale a desalojar primero
+    las escritas hace más tiempo, y las lecturas no escriben. Para no contar
+    la tabla en cada escritura, las entradas expiradas y el exceso sobre
+    ``max_entries`` se eliminan cada ``trim_interval`` escrituras de cada
+    proceso, así que el límite puede superarse temporalmente en ese margen.
+    Los contadores de aciertos y fallos son locales a cada proceso.
+    """
+
+    def __init__(
+        self, path: str, max_entries: int = 10_000, ttl: float = 60.0, trim_interval: int | None = None
+    ) -> None:
+        if max_entries <= 0:
+            raise ValueError("max_entries debe ser mayor que cero")
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.trim_interval = trim_interval or max(1, min(1_000, max_entries // 100))
+        self._local = threading.local()
+        self._counters = _Counters()
+        self._evictions = 0
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._connection().execute(
+            "CREATE INDEX IF NOT EXISTS ix_cache_entries_expires_at ON cache_entries (expires_at)"
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def get(self, key: str) -> Any | None:
+        row = self._connection().execute(
+            "SELECT value FROM cache_entries WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        self._counters.record(row is not None)
+        return json.loads(row[0]) if row is not None else None
+
+    def set(self, key: str, value: Any) -> None:
+        now = time.time()
+        connection = self._connection()
+        connection.execute(
+            "INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, json.dumps(value), now + self.ttl),
+        )
+        with self._writes_lock:
+            self._writes += 1
+            due = self._writes % self.trim_interval == 0
+        if due:
+            self._trim(connection, now)
+
+    def _trim(self, connection: sqlite3.Connection, now: float) -> None:
+        connection.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (now,))
+        overflow = connection.execute(
+            "DELETE FROM cache_entries WHERE key IN ("
+            "SELECT key FROM cache_entries ORDER BY expires_at "
+            "LIMIT max(0, (SELECT COUNT(*) FROM cache_entries) - ?))",
+            (self.max_entries,),
+        ).rowcount
+        if overflow > 0:
+            self._evictions += overflow
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        self._connection().executemany("DELETE FROM cache_entries WHERE key = ?", [(key,) for key in keys])
+
+    def clear(self) -> None:
+        self._connection().execute("DELETE FROM cache_entries")
+
+    def stats(self) -> Dict[str, int]:
+        entries = self._connection().execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+        return {
+            "entries": entries,
+            "hits": self._counters.hits,
+            "misses": self._counters.misses,
+            "evictions": self._evictions,
+        }
+
+
+class RedisCache(CacheBackend):
+    """Caché compartida sobre cualquier servidor que hable el protocolo Redis.
+
+    ``client`` debe exponer ``get``, ``set(ex=...)``, ``delete`` y
+    ``scan_iter``; si se omite se crea con ``redis.Redis.from_url``. La
+    expiración y el límite de memoria los gestiona el propio servidor.
+    """
+
+    def __init__(self, url: str | None = None, ttl: float = 60.0, prefix: str = "telcox:", client: Any = None) -> None:
+        if client is None:
+            try:
+                import redis
+            except ImportError as exc:
+                raise RuntimeError("El paquete 'redis' es necesario para usar RedisCache") from exc
+            client = redis.Redis.from_url(url or "redis://localhost:6379/0")
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self._counters = _Counters()
+
+    def get(self, key: str) -> Any | None:
+        raw_value = self.client.get(self.prefix + key)
+        self._counters.record(raw_value is not None)
+        return json.loads(raw_value) if raw_value is not None else None
+
+    def set(self, key: str, value: Any) -> None:
+        self.client.set(self.prefix + key, json.dumps(value), ex=max(1, int(self.ttl)))
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        prefixed = [self.prefix + key for key in keys]
+        if prefixed:
+            self.client.delete(*prefixed)
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(match=f"{self.prefix}*"))
+        if keys:
+            self.client.delete(*keys)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self._counters.hits, "misses": self._counters.misses}
+
+
+def cache_key(namespace: str, external_id: str) -> str:
+    return f"{namespace}:{external_id}"
+
+
+def get_cache() -> CacheBackend | None:
+    """Devuelve la caché registrada en la aplicación activa, si existe."""
+
+    if not has_app_context():
+        return None
+    return current_app.extensions.get(CACHE_EXTENSION_KEY)
+
+
+def cached(namespace: str) -> Callable[[F], F]:
+    """Decora un servicio ``fn(external_id)`` para leer a través de la caché.
+
+    El envoltorio acepta un argumento opcional ``version``; si se indica, una
+    entrada almacenada con otra versión se trata como un fallo y se recalcula.
+    """
+
+    _namespaces.add(namespace)
+
+    def decorator(fn: F) -> F:
+        @wraps(fn)
+        def wrapper(external_id: str, *args: Any, version: str | None = None, **kwargs: Any) -> Any:
+            cache = get_cache()
+            if cache is None:
+                return fn(external_id, *args, **kwargs)
+            key = cache_key(namespace, external_id)
+            entry = cache.get(key)
+            if entry is not None and (version is None or entry["version"] == version):
+                return copy.deepcopy(entry["value"])
+            value = fn(external_id, *args, **kwargs)
+            cache.set(key, {"version": version, "value": value})
+            return copy.deepcopy(value)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def invalidate_customers(external_ids: Iterable[str]) -> None:
+    """Elimina de la caché todas las entradas de los clientes indicados."""
+
+    cache = get_cache()
+    if cache is None:
+        return
+    keys = [cache_key(namespace, external_id) for external_id in external_ids for namespace in _namespaces]
+    if keys:
+        cache.delete_many(keys)
+
+
+def _collect_changed_customers(session: Session, flush_context: Any) -> None:
+    """Registra los clientes afectados por el flush para invalidarlos al confirmar."""
+
+    external_ids: Set[str] = set()
+    for instance in chain(session.new, session.dirty, session.deleted):
+        if isinstance(instance, Customer):
+            history = inspect(instance).attrs["external_id"].history
+            external_ids.update(value for value in chain(*history) if value)
+
+    customer_ids = changed_customer_ids(session)
+    if customer_ids:
+        external_ids.update(
+            session.execute(select(Customer.external_id).where(Customer.id.in_(customer_ids))).scalars()
+        )
+    if external_ids:
+        session.info.setdefault(_PENDING_INVALIDATIONS_KEY, set()).update(external_ids)
+
+
+def _invalidate_after_commit(session: Session) -> None:
+    pending = session.info.pop(_PENDING_INVALIDATIONS_KEY, None)
+    if pending:
+        invalidate_customers(pending)
+
+
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_INVALIDATIONS_KEY, None)
+
+
+def register_invalidation_hooks() -> None:
+    """Registra una única vez los eventos de sesión que invalidan la caché."""
+
+    global _hooks_registered
+    if _hooks_registered:
+        return
+    event.listen(Session, "after_flush", _collect_changed_customers)
+    event.listen(Session, "after_commit", _invalidate_after_commit)
+    event.listen(Session, "after_rollback", _discard_after_rollback)
+    _hooks_registered = True
+
+
+def init_cache(app: Flask, cache: CacheBackend | None) -> None:
+    """Asocia la caché a la aplicación y activa la invalidación automática."""
+
+    if cache is None:
+        app.extensions.pop(CACHE_EXTENSION_KEY, None)
+        return
+    app.extensions[CACHE_EXTENSION_KEY] = cache
+    register_invalidation_hooks()
+
+
+__all__ = [
+    "CacheBackend",
+    "MemoryCache",
+    "RedisCache",
+    "SQLiteCache",
+    "cached",
+    "get_cache",
+    "init_cache",
+    "invalidate_customers",
+]
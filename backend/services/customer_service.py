@@ -3,13 +3,23 @@
 """Servicios de consulta de clientes respaldados por base de datos."""
 from __future__ import annotations
 
+import hashlib
+from datetime import datetime
 from decimal import Decimal
-from typing import Dict
+from typing import Dict, Iterator, List, NamedTuple, Sequence
 
-from sqlalchemy import func, select
+from sqlalchemy import Select, null, select
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
 
-from backend.models import Billing, Consumption, Customer, db
+from backend.models import Customer, CustomerSummary, db
+from backend.routing import reads_from_replica
+from backend.services.cache import cached
+
+
+# Límite conservador de parámetros por sentencia: SQLite compilado con los
+# valores por defecto antiguos admite 999 y MySQL penaliza listas ``IN`` enormes.
+BATCH_CHUNK_SIZE = 900
 
 
 class CustomerServiceError(Exception):
@@ -24,94 +34,282 @@ class CustomerNotFoundError(CustomerServiceError):
         self.external_id = external_id
 
 
-def _get_customer_by_external_id(external_id: str) -> Customer:
-    """Recupera un cliente por su identificador externo o lanza un error."""
+class CustomerSnapshot(NamedTuple):
+    """Fila ligera con los datos de cliente, último consumo y saldo pendiente."""
+
+    external_id: str
+    full_name: str
+    data_used_mb: float | None
+    voice_minutes: float | None
+    balance: Decimal | float | None
+
+
+def _customer_snapshot_statement(include_balance: bool = True) -> Select:
+    """Construye la consulta única que resuelve cliente, último consumo y saldo.
+
+    Los datos derivados se leen de ``customer_summaries`` por clave primaria,
+    así que el coste no crece con el historial de consumos y facturas.
+    """
+
+    balance = CustomerSummary.outstanding_balance if include_balance else null()
+    return (
+        select(
+            Customer.external_id,
+            Customer.full_name,
+            CustomerSummary.data_used_mb,
+            CustomerSummary.voice_minutes,
+            balance.label("balance"),
+        )
+        .select_from(Customer)
+        .outerjoin(CustomerSummary, CustomerSummary.customer_id == Customer.id)
+    )
+
 
-    session = db.session
-    customer = session.execute(
-        select(Customer).where(Customer.external_id == external_id)
-    ).scalar_one_or_none()
-    if customer is None:
+def _fetch_customer_snapshot(session: Session, external_id: str, include_balance: bool = True) -> CustomerSnapshot:
+    """Recupera en una sola consulta la fila del cliente o lanza un error."""
+
+    row = session.execute(
+        _customer_snapshot_statement(include_balance).where(Customer.external_id == external_id)
+    ).one_or_none()
+    if row is None:
         raise CustomerNotFoundError(external_id)
-    return customer
+    return CustomerSnapshot(*row)
+
+
+class CustomerValidators(NamedTuple):
+    """Validadores HTTP de la representación de un cliente."""
 
+    version: str
+    last_modified: datetime
 
-def _get_latest_consumption(customer_id: int) -> Consumption | None:
-    """Obtiene el registro de consumo más reciente para un cliente."""
 
-    session = db.session
+def _customer_validators_statement() -> Select:
+    """Consulta los marcadores de cambio del cliente sin construir su perfil."""
+
     return (
-        session.execute(
-            select(Consumption)
-            .where(Consumption.customer_id == customer_id)
-            .order_by(Consumption.period_end.desc(), Consumption.id.desc())
+        select(
+            Customer.updated_at,
+            CustomerSummary.updated_at,
+            CustomerSummary.latest_consumption_id,
+            CustomerSummary.data_used_mb,
+            CustomerSummary.voice_minutes,
+            CustomerSummary.billing_count,
+            CustomerSummary.outstanding_balance,
         )
-        .scalars()
-        .first()
+        .select_from(Customer)
+        .outerjoin(CustomerSummary, CustomerSummary.customer_id == Customer.id)
+    )
+
+
+def _validators_from_row(external_id: str, row: Sequence[object]) -> CustomerValidators:
+    customer_updated_at, summary_updated_at = row[0], row[1]
+    fingerprint = "|".join(str(value) for value in (external_id, *row))
+    last_modified = max(value for value in (customer_updated_at, summary_updated_at) if value is not None)
+    return CustomerValidators(
+        version=hashlib.sha256(fingerprint.encode()).hexdigest()[:32],
+        last_modified=last_modified,
     )
 
 
-def _calculate_outstanding_balance(customer_id: int) -> float:
-    """Calcula el saldo pendiente a partir de facturas no pagadas."""
+def _as_float(value: Decimal | float | None) -> float:
+    return float(value) if value is not None else 0.0
 
-    session = db.session
-    raw_balance: Decimal | float | None = session.execute(
-        select(func.coalesce(func.sum(Billing.amount), 0))
-        .where(Billing.customer_id == customer_id, Billing.paid.is_(False))
-    ).scalar_one()
-    if raw_balance is None:
-        return 0.0
-    return float(raw_balance)
 
+def _summary_payload(snapshot: CustomerSnapshot) -> Dict[str, float | str]:
+    return {
+        "cliente_id": snapshot.external_id,
+        "consumo_mb": _as_float(snapshot.data_used_mb),
+        "minutos": _as_float(snapshot.voice_minutes),
+    }
 
-def get_consumption_summary(external_id: str) -> Dict[str, float | str]:
-    """Devuelve el consumo de datos y minutos para un cliente."""
+
+def _profile_payload(snapshot: CustomerSnapshot) -> Dict[str, float | str]:
+    return {
+        "cliente_id": snapshot.external_id,
+        "nombre": snapshot.full_name,
+        "saldo": _as_float(snapshot.balance),
+        "consumo_mb": _as_float(snapshot.data_used_mb),
+        "minutos": _as_float(snapshot.voice_minutes),
+    }
+
+
+def _chunked(values: Sequence[str], size: int) -> Iterator[Sequence[str]]:
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+class DashboardView(NamedTuple):
+    """Panel de un cliente junto con los validadores HTTP de la misma fila."""
+
+    validators: CustomerValidators
+    data: Dict[str, Dict[str, float | str]]
+
+
+def _dashboard_view_statement() -> Select:
+    """Marcadores de cambio y datos del panel en una sola fila.
+
+    Las primeras columnas coinciden con ``_customer_validators_statement`` para
+    que la versión calculada sea la misma que la de ``get_customer_validators``.
+    """
+
+    return _customer_validators_statement().add_columns(Customer.external_id, Customer.full_name)
+
+
+# Consultas sobre una sesión explícita. Los servicios síncronos las ejecutan
+# con ``db.session`` y ``async_customer_service`` con ``AsyncSession.run_sync``,
+# así que ambos modos de servicio comparten consultas, respuestas y errores.
+
+
+def query_customer_validators(session: Session, external_id: str) -> CustomerValidators:
+    """Devuelve la versión y la fecha de última modificación de un cliente."""
 
     try:
-        customer = _get_customer_by_external_id(external_id)
-        latest_consumption = _get_latest_consumption(customer.id)
+        row = session.execute(
+            _customer_validators_statement().where(Customer.external_id == external_id)
+        ).one_or_none()
+    except SQLAlchemyError as exc:
+        raise CustomerServiceError("Error al consultar la versión del cliente") from exc
+    if row is None:
+        raise CustomerNotFoundError(external_id)
+    return _validators_from_row(external_id, row)
 
-        data_used = float(latest_consumption.data_used_mb) if latest_consumption else 0.0
-        minutes = float(latest_consumption.voice_minutes) if latest_consumption else 0.0
 
-        return {
-            "cliente_id": customer.external_id,
-            "consumo_mb": data_used,
-            "minutos": minutes,
-        }
+def query_consumption_summary(session: Session, external_id: str) -> Dict[str, float | str]:
+    """Devuelve el consumo de datos y minutos para un cliente."""
+
+    try:
+        return _summary_payload(_fetch_customer_snapshot(session, external_id, include_balance=False))
     except CustomerServiceError:
         raise
     except SQLAlchemyError as exc:
         raise CustomerServiceError("Error al consultar el consumo del cliente") from exc
 
 
-def get_customer_profile(external_id: str) -> Dict[str, float | str]:
+def query_customer_profile(session: Session, external_id: str) -> Dict[str, float | str]:
     """Devuelve la información general de un cliente."""
 
     try:
-        customer = _get_customer_by_external_id(external_id)
-        latest_consumption = _get_latest_consumption(customer.id)
-        balance = _calculate_outstanding_balance(customer.id)
-
-        data_used = float(latest_consumption.data_used_mb) if latest_consumption else 0.0
-        minutes = float(latest_consumption.voice_minutes) if latest_consumption else 0.0
-
-        return {
-            "cliente_id": customer.external_id,
-            "nombre": customer.full_name,
-            "saldo": balance,
-            "consumo_mb": data_used,
-            "minutos": minutes,
-        }
+        return _profile_payload(_fetch_customer_snapshot(session, external_id))
     except CustomerServiceError:
         raise
     except SQLAlchemyError as exc:
         raise CustomerServiceError("Error al consultar los datos del cliente") from exc
 
 
+def query_dashboard_data(session: Session, external_id: str) -> Dict[str, Dict[str, float | str]]:
+    """Devuelve el perfil y el resumen de consumo de un cliente en una sola consulta."""
+
+    try:
+        snapshot = _fetch_customer_snapshot(session, external_id)
+    except CustomerServiceError:
+        raise
+    except SQLAlchemyError as exc:
+        raise CustomerServiceError("Error al consultar el panel del cliente") from exc
+    return {"perfil": _profile_payload(snapshot), "consumo": _summary_payload(snapshot)}
+
+
+def query_dashboard_view(session: Session, external_id: str) -> DashboardView:
+    """Devuelve en una sola consulta el panel del cliente y sus validadores HTTP."""
+
+    try:
+        row = session.execute(_dashboard_view_statement().where(Customer.external_id == external_id)).one_or_none()
+    except SQLAlchemyError as exc:
+        raise CustomerServiceError("Error al consultar el panel del cliente") from exc
+    if row is None:
+        raise CustomerNotFoundError(external_id)
+    validators = _validators_from_row(external_id, row[:7])
+    snapshot = CustomerSnapshot(
+        row.external_id, row.full_name, row.data_used_mb, row.voice_minutes, row.outstanding_balance
+    )
+    return DashboardView(validators, {"perfil": _profile_payload(snapshot), "consumo": _summary_payload(snapshot)})
+
+
+def query_customer_profiles(
+    session: Session, external_ids: Sequence[str], chunk_size: int = BATCH_CHUNK_SIZE
+) -> Dict[str, Dict[str, float | str]]:
+    """Devuelve los perfiles de varios clientes indexados por identificador externo.
+
+    Los identificadores se resuelven en listas ``IN`` de como máximo
+    ``chunk_size`` elementos, con una consulta por bloque. Los clientes
+    inexistentes no aparecen en el resultado.
+    """
+
+    unique_ids: List[str] = list(dict.fromkeys(external_ids))
+    profiles: Dict[str, Dict[str, float | str]] = {}
+    try:
+        for chunk in _chunked(unique_ids, chunk_size):
+            rows = session.execute(_customer_snapshot_statement().where(Customer.external_id.in_(chunk)))
+            for row in rows:
+                snapshot = CustomerSnapshot(*row)
+                profiles[snapshot.external_id] = _profile_payload(snapshot)
+    except SQLAlchemyError as exc:
+        raise CustomerServiceError("Error al consultar los datos de los clientes") from exc
+    return profiles
+
+
+@reads_from_replica
+def get_customer_validators(external_id: str) -> CustomerValidators:
+    """Devuelve la versión y la fecha de última modificación de un cliente."""
+
+    return query_customer_validators(db.session, external_id)
+
+
+@cached("consumo")
+@reads_from_replica
+def get_consumption_summary(external_id: str) -> Dict[str, float | str]:
+    """Devuelve el consumo de datos y minutos para un cliente."""
+
+    return query_consumption_summary(db.session, external_id)
+
+
+@cached("perfil")
+@reads_from_replica
+def get_customer_profile(external_id: str) -> Dict[str, float | str]:
+    """Devuelve la información general de un cliente."""
+
+    return query_customer_profile(db.session, external_id)
+
+
+@reads_from_replica
+def get_dashboard_view(external_id: str) -> DashboardView:
+    """Devuelve en una sola consulta el panel del cliente y sus validadores HTTP."""
+
+    return query_dashboard_view(db.session, external_id)
+
+
+@cached("dashboard")
+@reads_from_replica
+def get_dashboard_data(external_id: str) -> Dict[str, Dict[str, float | str]]:
+    """Devuelve el perfil y el resumen de consumo de un cliente en una sola consulta."""
+
+    return query_dashboard_data(db.session, external_id)
+
+
+@reads_from_replica
+def get_customer_profiles(
+    external_ids: Sequence[str], chunk_size: int = BATCH_CHUNK_SIZE
+) -> Dict[str, Dict[str, float | str]]:
+    """Devuelve los perfiles de varios clientes indexados por identificador externo."""
+
+    return query_customer_profiles(db.session, external_ids, chunk_size)
+
+
 __all__ = [
     "CustomerServiceError",
     "CustomerNotFoundError",
+    "CustomerSnapshot",
+    "CustomerValidators",
+    "DashboardView",
     "get_consumption_summary",
     "get_customer_profile",
+    "get_customer_profiles",
+    "get_customer_validators",
+    "get_dashboard_data",
+    "get_dashboard_view",
+    "query_consumption_summary",
+    "query_customer_profile",
+    "query_customer_profiles",
+    "query_customer_validators",
+    "query_dashboard_data",
+    "query_dashboard_view",
 ]
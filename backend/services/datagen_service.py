@@ -0,0 +1,336 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+"""Generador determinista de clientes, consumos y facturas a gran escala.
+
+Cada cliente usa su propio ``random.Random`` derivado de la semilla y de su
+``id``, de modo que el resultado no depende del tamaño de bloque ni del
+número de procesos: ``--seed 42`` produce siempre las mismas filas.
+
+Distribuciones:
+
+* Antigüedad con cola larga (Pareto): la mayoría de clientes tiene pocos
+  meses de historial y unos pocos llegan a ``months``.
+* Consumo sesgado: datos y minutos base log-normales por cliente, con
+  variación mensual log-normal; una fracción de clientes solo usa datos.
+* Facturas mensuales de una tarifa base más exceso por GB sobre la
+  franquicia, en céntimos exactos; ``unpaid_fraction`` de los clientes
+  arrastra sus últimas facturas sin pagar.
+"""
+from __future__ import annotations
+
+import csv
+import logging
+import math
+import multiprocessing
+import random
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.pool import NullPool
+
+from backend.models import Billing, Consumption, Customer
+from backend.services.aggregation_service import invalidate_rollups
+from backend.services.summary_service import rebuild_customer_summaries
+
+
+logger = logging.getLogger(__name__)
+
+CUSTOMER_COLUMNS = ("id", "external_id", "full_name", "email")
+CONSUMPTION_COLUMNS = ("customer_id", "period_start", "period_end", "data_used_mb", "voice_minutes")
+BILLING_COLUMNS = ("customer_id", "billing_date", "amount", "currency", "due_date", "paid")
+
+_FIRST_NAMES = ("Ana", "Luis", "María", "Carlos", "Lucía", "Javier", "Sofía", "Pedro", "Elena", "Diego", "Laura", "Andrés")
+_LAST_NAMES = ("Pérez", "Gómez", "López", "Martínez", "Rodríguez", "Sánchez", "Díaz", "Torres", "Ramírez", "Flores")
+_PLANS = ((Decimal("9.99"), 2_048), (Decimal("14.99"), 5_120), (Decimal("24.99"), 15_360), (Decimal("39.99"), 51_200))
+_PLAN_WEIGHTS = (40, 30, 20, 10)
+_OVERAGE_PER_GB = Decimal("2.50")
+_CENT = Decimal("0.01")
+
+Row = Tuple[Any, ...]
+
+
+@dataclass(frozen=True)
+class GeneratorSpec:
+    """Parámetros del conjunto generado."""
+
+    customers: int
+    months: int = 24
+    last_month: date = date(2024, 12, 1)
+    seed: int = 42
+    unpaid_fraction: float = 0.15
+    data_only_fraction: float = 0.10
+    currency: str = "EUR"
+    first_id: int = 1
+
+
+@dataclass
+class GeneratorStats:
+    """Filas generadas por tabla y tiempo empleado."""
+
+    customers: int = 0
+    consumptions: int = 0
+    billings: int = 0
+    elapsed: float = 0.0
+    files: List[Path] = field(default_factory=list)
+
+    @property
+    def rows(self) -> int:
+        return self.customers + self.consumptions + self.billings
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def merge(self, other: "GeneratorStats") -> None:
+        self.customers += other.customers
+        self.consumptions += other.consumptions
+        self.billings += other.billings
+        self.files.extend(other.files)
+
+
+def external_id(customer_id: int) -> str:
+    return f"{customer_id:010d}"
+
+
+def _month_start(last_month: date, months_back: int) -> date:
+    index = last_month.year * 12 + last_month.month - 1 - months_back
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _month_end(start: date) -> date:
+    following = date(start.year + start.month // 12, start.month % 12 + 1, 1)
+    return following - timedelta(days=1)
+
+
+def generate_customer(spec: GeneratorSpec, customer_id: int) -> Tuple[Row, List[Row], List[Row]]:
+    """Genera la fila del cliente, sus consumos y sus facturas de forma determinista."""
+
+    rng = random.Random(spec.seed * 1_000_003 + customer_id)
+    first, last = rng.choice(_FIRST_NAMES), rng.choice(_LAST_NAMES)
+    customer = (customer_id, external_id(customer_id), f"{first} {last}", f"cliente{customer_id}@example.com")
+
+    tenure = min(spec.months, max(1, int(rng.paretovariate(1.1) * 3)))
+    base_data = rng.lognormvariate(7.0, 1.2)
+    base_minutes = 0.0 if rng.random() < spec.data_only_fraction else rng.lognormvariate(4.5, 1.0)
+    price, allowance_mb = rng.choices(_PLANS, weights=_PLAN_WEIGHTS)[0]
+    unpaid_months = rng.randint(1, min(3, tenure)) if rng.random() < spec.unpaid_fraction else 0
+
+    consumptions: List[Row] = []
+    billings: List[Row] = []
+    for months_back in range(tenure - 1, -1, -1):
+        start = _month_start(spec.last_month, months_back)
+        end = _month_end(start)
+        data_used = round(base_data * rng.lognormvariate(0.0, 0.3), 2)
+        minutes = round(base_minutes * rng.lognormvariate(0.0, 0.3), 1)
+        consumptions.append((customer_id, start, end, data_used, minutes))
+
+        overage_gb = math.ceil((data_used - allowance_mb) / 1024) if data_used > allowance_mb else 0
+        amount = (price + _OVERAGE_PER_GB * overage_gb).quantize(_CENT)
+        billing_date = end + timedelta(days=1)
+        billings.append(
+            (customer_id, billing_date, amount, spec.currency, billing_date + timedelta(days=20), months_back >= unpaid_months)
+        )
+    return customer, consumptions, billings
+
+
+def generate_range(spec: GeneratorSpec, first_id: int, last_id: int) -> Tuple[List[Row], List[Row], List[Row]]:
+    """Filas de los clientes con ``id`` en ``[first_id, last_id)``."""
+
+    customers: List[Row] = []
+    consumptions: List[Row] = []
+    billings: List[Row] = []
+    for customer_id in range(first_id, last_id):
+        customer, customer_consumptions, customer_billings = generate_customer(spec, customer_id)
+        customers.append(customer)
+        consumptions.extend(customer_consumptions)
+        billings.extend(customer_billings)
+    return customers, consumptions, billings
+
+
+def id_ranges(spec: GeneratorSpec, chunk_size: int) -> Iterator[Tuple[int, int]]:
+    last = spec.first_id + spec.customers
+    for first in range(spec.first_id, last, chunk_size):
+        yield first, min(first + chunk_size, last)
+
+
+def next_customer_id(connection: Connection) -> int:
+    return (connection.execute(select(func.max(Customer.id))).scalar() or 0) + 1
+
+
+def _as_records(columns: Sequence[str], rows: Sequence[Row]) -> List[Dict[str, Any]]:
+    return [dict(zip(columns, row)) for row in rows]
+
+
+def insert_range(connection: Connection, spec: GeneratorSpec, first_id: int, last_id: int) -> GeneratorStats:
+    """Inserta un rango de clientes con ``executemany`` y confirma la transacción."""
+
+    customers, consumptions, billings = generate_range(spec, first_id, last_id)
+    connection.execute(Customer.__table__.insert(), _as_records(CUSTOMER_COLUMNS, customers))
+    if consumptions:
+        connection.execute(Consumption.__table__.insert(), _as_records(CONSUMPTION_COLUMNS, consumptions))
+    if billings:
+        connection.execute(Billing.__table__.insert(), _as_records(BILLING_COLUMNS, billings))
+    connection.commit()
+    return GeneratorStats(len(customers), len(consumptions), len(billings))
+
+
+def write_csv_range(directory: Path, spec: GeneratorSpec, first_id: int, last_id: int) -> GeneratorStats:
+    """Escribe un rango en ``customers-``, ``consumptions-`` y ``billings-<id>.csv`` sin cabecera.
+
+    El formato (coma, fechas ISO, booleanos 0/1) es el que espera
+    ``LOAD DATA INFILE ... FIELDS TERMINATED BY ','``.
+    """
+
+    stats = GeneratorStats()
+    for table, rows in zip(("customers", "consumptions", "billings"), generate_range(spec, first_id, last_id)):
+        path = directory / f"{table}-{first_id:010d}.csv"
+        with path.open("w", newline="", encoding="utf-8") as handle:
+            writer = csv.writer(handle)
+            if table == "billings":
+                writer.writerows(row[:5] + (int(row[5]),) for row in rows)
+            else:
+                writer.writerows(rows)
+        setattr(stats, table, len(rows))
+        stats.files.append(path)
+    return stats
+
+
+_LOAD_COLUMNS = {
+    "customers": CUSTOMER_COLUMNS,
+    "consumptions": CONSUMPTION_COLUMNS,
+    "billings": BILLING_COLUMNS,
+}
+_LOAD_TIMESTAMPS = {
+    "customers": "created_at = NOW(), updated_at = NOW()",
+    "consumptions": "created_at = NOW()",
+    "billings": "created_at = NOW()",
+}
+
+
+def write_load_script(directory: Path, files: Sequence[Path]) -> Path:
+    """Escribe ``load_data.sql`` con un ``LOAD DATA LOCAL INFILE`` por fichero, clientes primero."""
+
+    order = {table: index for index, table in enumerate(_LOAD_COLUMNS)}
+    statements = []
+    for path in sorted(files, key=lambda item: (order[item.name.split("-")[0]], item.name)):
+        table = path.name.split("-")[0]
+        statements.append(
+            f"LOAD DATA LOCAL INFILE '{path.resolve()}' INTO TABLE {table}\n"
+            f"  FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' LINES TERMINATED BY '\\r\\n'\n"
+            f"  ({', '.join(_LOAD_COLUMNS[table])})\n"
+            f"  SET {_LOAD_TIMESTAMPS[table]};"
+        )
+    script = directory / "load_data.sql"
+    script.write_text("\n".join(statements) + "\n", encoding="utf-8")
+    return script
+
+
+_worker_engine = None
+
+
+def _init_worker(database_uri: str | None) -> None:
+    global _worker_engine
+    if database_uri:
+        _worker_engine = create_engine(database_uri, poolclass=NullPool)
+
+
+def _generate_task(task: Tuple[GeneratorSpec, int, int, str | None]) -> GeneratorStats:
+    spec, first_id, last_id, directory = task
+    if directory is not None:
+        return write_csv_range(Path(directory), spec, first_id, last_id)
+    with _worker_engine.connect() as connection:
+        return insert_range(connection, spec, first_id, last_id)
+
+
+@contextmanager
+def _connection(connection: Connection | None, database_uri: str | None) -> Iterator[Connection]:
+    if connection is not None:
+        yield connection
+        return
+    engine = create_engine(database_uri, poolclass=NullPool)
+    try:
+        with engine.connect() as owned:
+            yield owned
+    finally:
+        engine.dispose()
+
+
+def generate_dataset(
+    spec: GeneratorSpec,
+    database_uri: str | None = None,
+    connection: Connection | None = None,
+    directory: str | Path | None = None,
+    chunk_size: int = 5_000,
+    workers: int = 1,
+) -> GeneratorStats:
+    """Genera el conjunto en la base de datos o en ficheros CSV.
+
+    Con ``directory`` se escriben CSV; si no, se inserta por ``connection``
+    (un proceso) o con ``workers`` procesos, cada uno con su propio engine
+    sobre ``database_uri``, que debe ser la URI ya resuelta del engine
+    (``routing.active_database_uri()``). Tras insertar en base de datos se
+    reconstruyen los resúmenes de los clientes generados y se invalidan los
+    rollups de los meses generados.
+    """
+
+    if chunk_size <= 0 or workers <= 0:
+        raise ValueError("El tamaño de bloque y el número de procesos deben ser positivos")
+    if directory is None and connection is None and database_uri is None:
+        raise ValueError("Indica una conexión, una URI de base de datos o un directorio de salida")
+
+    started = time.perf_counter()
+    total = GeneratorStats()
+    output = str(Path(directory)) if directory is not None else None
+    if output is not None:
+        Path(output).mkdir(parents=True, exist_ok=True)
+    tasks = [(spec, first, last, output) for first, last in id_ranges(spec, chunk_size)]
+
+    if workers > 1:
+        with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(None if output else database_uri,)) as pool:
+            for stats in pool.imap_unordered(_generate_task, tasks):
+                total.merge(stats)
+                logger.debug("Generados %s clientes", total.customers)
+    elif output is not None:
+        for _, first, last, _ in tasks:
+            total.merge(write_csv_range(Path(output), spec, first, last))
+    else:
+        with _connection(connection, database_uri) as target:
+            for _, first, last, _ in tasks:
+                total.merge(insert_range(target, spec, first, last))
+
+    if output is not None:
+        total.files.append(write_load_script(Path(output), total.files))
+    else:
+        with _connection(connection, database_uri) as target:
+            invalidate_rollups(target, [_month_start(spec.last_month, months_back) for months_back in range(spec.months)])
+            target.commit()
+            rebuild_customer_summaries(
+                target, batch_size=chunk_size, first_id=spec.first_id, last_id=spec.first_id + spec.customers - 1
+            )
+
+    total.elapsed = time.perf_counter() - started
+    return total
+
+
+__all__ = [
+    "BILLING_COLUMNS",
+    "CONSUMPTION_COLUMNS",
+    "CUSTOMER_COLUMNS",
+    "GeneratorSpec",
+    "GeneratorStats",
+    "external_id",
+    "generate_customer",
+    "generate_dataset",
+    "generate_range",
+    "insert_range",
+    "next_customer_id",
+    "write_csv_range",
+    "write_load_script",
+]
@@ -0,0 +1,352 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+"""Exportación en streaming de consumos y facturas a Parquet o Arrow IPC.
+
+Las filas se leen con un cursor de servidor (``stream_results``) en bloques
+de ``batch_size``, se convierten a ``RecordBatch`` de Arrow y se escriben en
+un directorio por mes con el esquema de particiones de Hive::
+
+    <destino>/consumption/mes=2024-05/part-00000.parquet
+
+La consulta no ordena las filas para no forzar una ordenación en el
+servidor: cada partición mantiene su propio escritor abierto y, si se
+supera ``max_open_files``, se cierra el menos usado y la siguiente fila de
+ese mes abre un fichero ``part-NNNNN`` nuevo. La memoria queda acotada por
+un bloque de filas más los búferes de los escritores abiertos.
+
+Los ficheros se escriben en un directorio temporal dentro del destino y,
+solo si la exportación termina, cada mes sustituye por completo a su
+directorio anterior: repetir una exportación no duplica filas y una que
+falla deja intacta la anterior.
+
+``pyarrow`` es una dependencia opcional (``requirements-export.txt``).
+"""
+from __future__ import annotations
+
+import shutil
+import tempfile
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import date
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Sequence, Set, Tuple
+
+from sqlalchemy import Select, select, union_all
+from sqlalchemy.engine import Connection
+
+from backend.models import Billing, Consumption, ConsumptionArchive, Customer
+
+
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+DEFAULT_BATCH_SIZE = 50_000
+DEFAULT_MAX_OPEN_FILES = 32
+
+
+class ExportError(Exception):
+    """Error que impide completar la exportación."""
+
+
+class ExportKind(NamedTuple):
+    """Consulta (filtrada por ``start``/``end``), columna de partición y tipos Arrow de una tabla exportable."""
+
+    statement: Callable[[date | None, date | None], Select]
+    partition_column: str
+    arrow_types: Tuple[Tuple[str, str], ...]
+
+
+def _in_range(statement: Select, column: Any, start: date | None, end: date | None) -> Select:
+    if start is not None:
+        statement = statement.where(column >= start)
+    if end is not None:
+        statement = statement.where(column <= end)
+    return statement
+
+
+def _consumption_rows(model: Any, start: date | None, end: date | None) -> Select:
+    return _in_range(
+        select(
+            model.id,
+            model.customer_id,
+            model.period_start,
+            model.period_end,
+            model.data_used_mb,
+            model.voice_minutes,
+        ),
+        model.period_start,
+        start,
+        end,
+    )
+
+
+def _consumption_statement(start: date | None, end: date | None) -> Select:
+    """Consumos activos y archivados; el rango se filtra en cada rama para usar sus índices."""
+
+    usage = union_all(
+        _consumption_rows(Consumption, start, end),
+        _consumption_rows(ConsumptionArchive, start, end),
+    ).subquery("usage")
+    return select(
+        usage.c.id,
+        Customer.external_id,
+        usage.c.period_start,
+        usage.c.period_end,
+        usage.c.data_used_mb,
+        usage.c.voice_minutes,
+    ).join(Customer, Customer.id == usage.c.customer_id)
+
+
+def _billing_statement(start: date | None, end: date | None) -> Select:
+    statement = select(
+        Billing.id,
+        Customer.external_id,
+        Billing.billing_date,
+        Billing.amount,
+        Billing.currency,
+        Billing.due_date,
+        Billing.paid,
+    ).join(Customer, Customer.id == Billing.customer_id)
+    return _in_range(statement, Billing.billing_date, start, end)
+
+
+EXPORT_KINDS: Dict[str, ExportKind] = {
+    "consumption": ExportKind(
+        _consumption_statement,
+        "period_start",
+        (
+            ("id", "int64"),
+            ("external_id", "string"),
+            ("period_start", "date32"),
+            ("period_end", "date32"),
+            ("data_used_mb", "float64"),
+            ("voice_minutes", "float64"),
+        ),
+    ),
+    "billing": ExportKind(
+        _billing_statement,
+        "billing_date",
+        (
+            ("id", "int64"),
+            ("external_id", "string"),
+            ("billing_date", "date32"),
+            ("amount", "decimal128(10, 2)"),
+            ("currency", "string"),
+            ("due_date", "date32"),
+            ("paid", "bool"),
+        ),
+    ),
+}
+
+
+@dataclass
+class ExportStats:
+    """Resultado de una exportación."""
+
+    rows: int = 0
+    batches: int = 0
+    files: List[Path] = field(default_factory=list)
+    bytes_written: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+
+def _require_pyarrow() -> Any:
+    try:
+        import pyarrow
+    except ImportError as exc:
+        raise ExportError("El paquete 'pyarrow' es necesario para exportar a Parquet o Arrow") from exc
+    return pyarrow
+
+
+def arrow_schema(kind: str) -> Any:
+    pa = _require_pyarrow()
+    types = {
+        "int64": pa.int64(),
+        "string": pa.string(),
+        "date32": pa.date32(),
+        "float64": pa.float64(),
+        "decimal128(10, 2)": pa.decimal128(10, 2),
+        "bool": pa.bool_(),
+    }
+    return pa.schema([(name, types[arrow_type]) for name, arrow_type in EXPORT_KINDS[kind].arrow_types])
+
+
+def partition_key(value: date) -> str:
+    return f"mes={value.year:04d}-{value.month:02d}"
+
+
+def columns_by_partition(rows: Sequence[Any], columns: Sequence[str], partition_column: str) -> Dict[str, Dict[str, list]]:
+    """Reparte un bloque de filas en columnas agrupadas por mes de la columna de partición."""
+
+    index = columns.index(partition_column)
+    partitions: Dict[str, Dict[str, list]] = {}
+    for row in rows:
+        key = partition_key(row[index])
+        data = partitions.get(key)
+        if data is None:
+            data = partitions[key] = {name: [] for name in columns}
+        for name, value in zip(columns, row):
+            data[name].append(value)
+    return partitions
+
+
+def _partitions_in_range(directory: Path, start: date | None, end: date | None) -> Set[str]:
+    """Meses ya exportados en ``directory`` que cubre el rango ``[start, end]``."""
+
+    if not directory.is_dir():
+        return set()
+    return {
+        path.name
+        for path in directory.iterdir()
+        if path.is_dir()
+        and path.name.startswith("mes=")
+        and (start is None or path.name >= partition_key(start))
+        and (end is None or path.name <= partition_key(end))
+    }
+
+
+def _replace_partitions(staging: Path, directory: Path, keys: Iterable[str]) -> None:
+    """Sustituye cada ``directory/<mes>`` por el de ``staging`` o lo elimina si no se escribió."""
+
+    directory.mkdir(parents=True, exist_ok=True)
+    for key in sorted(keys):
+        current = directory / key
+        if current.exists():
+            current.rename(staging / f".anterior-{key}")
+        if (staging / key).exists():
+            (staging / key).rename(current)
+    shutil.rmtree(staging)
+
+
+class _PartitionWriters:
+    """Escritores abiertos por partición con cierre LRU al superar el límite."""
+
+    def __init__(self, directory: Path, schema: Any, file_format: str, max_open_files: int, stats: ExportStats) -> None:
+        self._directory = directory
+        self._schema = schema
+        self._format = file_format
+        self._max_open_files = max_open_files
+        self._stats = stats
+        self._open: "OrderedDict[str, Tuple[Any, Path]]" = OrderedDict()
+        self._parts: Dict[str, int] = {}
+
+    def _new_writer(self, key: str) -> Tuple[Any, Path]:
+        part = self._parts.get(key, 0)
+        self._parts[key] = part + 1
+        path = self._directory / key / f"part-{part:05d}{FORMATS[self._format]}"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if self._format == "parquet":
+            import pyarrow.parquet as pq
+
+            writer = pq.ParquetWriter(path, self._schema, compression="snappy")
+        else:
+            import pyarrow.ipc as ipc
+
+            writer = ipc.new_file(str(path), self._schema)
+        self._stats.files.append(path)
+        return writer, path
+
+    def write(self, key: str, batch: Any) -> None:
+        entry = self._open.pop(key, None)
+        if entry is None:
+            if len(self._open) >= self._max_open_files:
+                self._close(*self._open.popitem(last=False))
+            entry = self._new_writer(key)
+        self._open[key] = entry
+        entry[0].write_batch(batch)
+
+    def _close(self, key: str, entry: Tuple[Any, Path]) -> None:
+        writer, path = entry
+        writer.close()
+        self._stats.bytes_written += path.stat().st_size
+
+    def close(self) -> None:
+        while self._open:
+            self._close(*self._open.popitem(last=False))
+
+
+def export_table(
+    connection: Connection,
+    kind: str,
+    destination: str | Path,
+    file_format: str = "parquet",
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_open_files: int = DEFAULT_MAX_OPEN_FILES,
+    start: date | None = None,
+    end: date | None = None,
+) -> ExportStats:
+    """Exporta una tabla a ``<destination>/<kind>/mes=AAAA-MM/`` y devuelve las estadísticas.
+
+    ``start`` y ``end`` filtran por la columna de partición (``period_start``
+    o ``billing_date``), ambos incluidos. Al terminar se sustituyen los meses
+    del rango que ya existían en el destino; los de fuera se conservan.
+    """
+
+    if kind not in EXPORT_KINDS:
+        raise ExportError(f"Tipo de registro no soportado: {kind!r}")
+    if file_format not in FORMATS:
+        raise ExportError(f"Formato no soportado: {file_format!r}")
+    if batch_size <= 0 or max_open_files <= 0:
+        raise ExportError("El tamaño de lote y el número de ficheros abiertos deben ser positivos")
+
+    pa = _require_pyarrow()
+    export_kind = EXPORT_KINDS[kind]
+    schema = arrow_schema(kind)
+    columns = [name for name, _ in export_kind.arrow_types]
+    stats = ExportStats()
+    directory = Path(destination) / kind
+    directory.parent.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(prefix=f".{kind}-", dir=directory.parent))
+    writers = _PartitionWriters(staging, schema, file_format, max_open_files, stats)
+
+    started = time.perf_counter()
+    statement = export_kind.statement(start, end).execution_options(
+        stream_results=True, yield_per=batch_size
+    )
+    try:
+        try:
+            result = connection.execute(statement)
+            for rows in result.partitions():
+                for key, data in columns_by_partition(rows, columns, export_kind.partition_column).items():
+                    writers.write(key, pa.RecordBatch.from_pydict(data, schema=schema))
+                    stats.batches += 1
+                stats.rows += len(rows)
+        finally:
+            writers.close()
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    written = {path.parent.name for path in stats.files}
+    _replace_partitions(staging, directory, written | _partitions_in_range(directory, start, end))
+    stats.files = [directory / path.relative_to(staging) for path in stats.files]
+    stats.elapsed = time.perf_counter() - started
+    return stats
+
+
+def iter_export_tables(
+    connection: Connection, kinds: Iterable[str], destination: str | Path, **options: Any
+) -> Iterator[Tuple[str, ExportStats]]:
+    """Exporta varias tablas en orden, cerrando la transacción de lectura entre una y otra."""
+
+    for kind in kinds:
+        stats = export_table(connection, kind, destination, **options)
+        connection.commit()
+        yield kind, stats
+
+
+__all__ = [
+    "DEFAULT_BATCH_SIZE",
+    "DEFAULT_MAX_OPEN_FILES",
+    "EXPORT_KINDS",
+    "FORMATS",
+    "ExportError",
+    "ExportStats",
+    "arrow_schema",
+    "columns_by_partition",
+    "export_table",
+    "iter_export_tables",
+    "partition_key",
+]
@@ -0,0 +1,164 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+"""Historial de consumos por cliente con paginación por cursor."""
+from __future__ import annotations
+
+import base64
+from datetime import date
+from typing import Dict, Iterator, List, NamedTuple, Tuple, Type
+
+from sqlalchemy import Select, and_, or_, select, union_all
+from sqlalchemy.exc import SQLAlchemyError
+
+from backend.models import Consumption, ConsumptionArchive, Customer, db
+from backend.routing import reads_from_replica, replica_reads
+from backend.services.customer_service import CustomerNotFoundError, CustomerServiceError, _as_float
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+STREAM_BATCH_SIZE = 500
+
+
+class HistoryPage(NamedTuple):
+    """Página del historial y cursor para pedir la siguiente, si existe."""
+
+    periods: List[Dict[str, float | str]]
+    next_cursor: str | None
+
+
+def encode_cursor(period_end: date, consumption_id: int) -> str:
+    """Codifica la posición ``(period_end, id)`` de la última fila devuelta."""
+
+    raw = f"{period_end.isoformat()}|{consumption_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[date, int]:
+    """Decodifica un cursor de ``encode_cursor`` o lanza ``ValueError``."""
+
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        period_end, consumption_id = raw.split("|")
+        return date.fromisoformat(period_end), int(consumption_id)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("El parámetro 'cursor' no es válido") from exc
+
+
+def _customer_id(external_id: str) -> int:
+    customer_id = db.session.execute(
+        select(Customer.id).where(Customer.external_id == external_id)
+    ).scalar_one_or_none()
+    if customer_id is None:
+        raise CustomerNotFoundError(external_id)
+    return customer_id
+
+
+def _history_select(
+    model: Type[Consumption] | Type[ConsumptionArchive], customer_id: int, position: Tuple[date, int] | None
+) -> Select:
+    statement = select(
+        model.id,
+        model.period_start,
+        model.period_end,
+        model.data_used_mb,
+        model.voice_minutes,
+    ).where(model.customer_id == customer_id)
+    if position:
+        period_end, consumption_id = position
+        statement = statement.where(
+            model.period_end <= period_end,
+            or_(
+                model.period_end < period_end,
+                and_(model.period_end == period_end, model.id < consumption_id),
+            ),
+        )
+    return statement
+
+
+def _history_statement(customer_id: int, cursor: str | None, include_archive: bool = False) -> Select:
+    """Historial del más reciente al más antiguo a partir del cursor.
+
+    La condición de continuación se expande en ``OR``/``AND`` en lugar de
+    comparar tuplas para que MySQL y SQLite recorran el rango del índice
+    ``ix_consumptions_customer_period_end`` sin ``OFFSET``; la cota explícita
+    sobre ``period_end`` permite además podar las particiones posteriores.
+    Con ``include_archive`` se une ``consumptions_archive``, que conserva los
+    ids originales, así que los cursores valen para ambas tablas.
+    """
+
+    position = decode_cursor(cursor) if cursor else None
+    statement = _history_select(Consumption, customer_id, position)
+    if not include_archive:
+        return statement.order_by(Consumption.period_end.desc(), Consumption.id.desc())
+    history = union_all(statement, _history_select(ConsumptionArchive, customer_id, position)).subquery()
+    return select(history).order_by(history.c.period_end.desc(), history.c.id.desc())
+
+
+def _period_payload(row) -> Dict[str, float | str]:
+    return {
+        "periodo_inicio": row.period_start.isoformat(),
+        "periodo_fin": row.period_end.isoformat(),
+        "consumo_mb": _as_float(row.data_used_mb),
+        "minutos": _as_float(row.voice_minutes),
+    }
+
+
+@reads_from_replica
+def get_consumption_history(
+    external_id: str, limit: int = DEFAULT_PAGE_SIZE, cursor: str | None = None, include_archive: bool = False
+) -> HistoryPage:
+    """Devuelve una página del historial de consumos de un cliente.
+
+    Con ``include_archive`` incluye los periodos trasladados a ``consumptions_archive``.
+    """
+
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    try:
+        customer_id = _customer_id(external_id)
+        rows = db.session.execute(_history_statement(customer_id, cursor, include_archive).limit(limit + 1)).all()
+    except SQLAlchemyError as exc:
+        raise CustomerServiceError("Error al consultar el historial del cliente") from exc
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(rows[-1].period_end, rows[-1].id) if has_more else None
+    return HistoryPage([_period_payload(row) for row in rows], next_cursor)
+
+
+def iter_consumption_history(
+    external_id: str, cursor: str | None = None, include_archive: bool = False
+) -> Iterator[Dict[str, float | str]]:
+    """Recorre todo el historial de un cliente sin cargarlo en memoria.
+
+    El cliente se valida al llamar a la función, antes de devolver el
+    generador, para poder responder 404 antes de empezar a transmitir. Las
+    filas se leen en bloques de ``STREAM_BATCH_SIZE`` con ``yield_per``.
+    """
+
+    with replica_reads():
+        try:
+            customer_id = _customer_id(external_id)
+        except SQLAlchemyError as exc:
+            raise CustomerServiceError("Error al consultar el historial del cliente") from exc
+    statement = _history_statement(customer_id, cursor, include_archive).execution_options(
+        yield_per=STREAM_BATCH_SIZE
+    )
+
+    def _rows() -> Iterator[Dict[str, float | str]]:
+        with replica_reads():
+            for row in db.session.execute(statement):
+                yield _period_payload(row)
+
+    return _rows()
+
+
+__all__ = [
+    "DEFAULT_PAGE_SIZE",
+    "MAX_PAGE_SIZE",
+    "HistoryPage",
+    "decode_cursor",
+    "encode_cursor",
+    "get_consumption_history",
+    "iter_consumption_history",
+]
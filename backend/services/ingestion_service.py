@@ -0,0 +1,583 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+"""Carga masiva en streaming de consumos y facturas desde CSV o JSON Lines."""
+from __future__ import annotations
+
+import csv
+import json
+import logging
+import math
+import multiprocessing
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, NamedTuple, Set, Tuple
+
+from sqlalchemy import Table, create_engine, func, insert, select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.pool import NullPool
+from sqlalchemy.sql.expression import Executable
+
+from backend.models import Billing, Consumption, ConsumptionArchive, Customer
+from backend.services.aggregation_service import invalidate_rollups
+from backend.services.summary_service import refresh_customer_summaries
+
+
+logger = logging.getLogger(__name__)
+
+JSON_LINES_SUFFIXES = {".jsonl", ".ndjson"}
+_TRUE_VALUES = {"1", "true", "t", "yes", "y", "si", "sí"}
+_FALSE_VALUES = {"0", "false", "f", "no", "n", ""}
+_AMOUNT_QUANTUM = Decimal("0.01")
+_MAX_AMOUNT = Decimal("99999999.99")
+
+Record = Dict[str, Any]
+Parser = Callable[[Mapping[str, Any], Mapping[str, int]], Record]
+
+
+class IngestionError(Exception):
+    """Error que impide continuar con la carga."""
+
+
+class RowValidationError(ValueError):
+    """Se lanza cuando una fila no cumple las restricciones del modelo."""
+
+
+@dataclass
+class IngestionStats:
+    """Resultado de una carga."""
+
+    read: int = 0
+    inserted: int = 0
+    rejected: int = 0
+    elapsed: float = 0.0
+    customer_ids: Set[int] = field(default_factory=set)
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.inserted / self.elapsed if self.elapsed > 0 else 0.0
+
+    def merge(self, other: "IngestionStats") -> None:
+        self.read += other.read
+        self.inserted += other.inserted
+        self.rejected += other.rejected
+        self.customer_ids.update(other.customer_ids)
+
+
+def _required(raw: Mapping[str, Any], name: str) -> Any:
+    value = raw.get(name)
+    if value is None or (isinstance(value, str) and not value.strip()):
+        raise RowValidationError(f"falta el campo '{name}'")
+    return value.strip() if isinstance(value, str) else value
+
+
+def _parse_date(raw: Mapping[str, Any], name: str, required: bool = True) -> date | None:
+    value = raw.get(name)
+    if value in (None, "") and not required:
+        return None
+    value = _required(raw, name)
+    try:
+        return date.fromisoformat(str(value))
+    except ValueError as exc:
+        raise RowValidationError(f"fecha inválida en '{name}': {value!r}") from exc
+
+
+def _parse_non_negative_float(raw: Mapping[str, Any], name: str) -> float:
+    value = raw.get(name)
+    if value in (None, ""):
+        return 0.0
+    try:
+        number = float(value)
+    except (TypeError, ValueError) as exc:
+        raise RowValidationError(f"número inválido en '{name}': {value!r}") from exc
+    if number < 0 or not math.isfinite(number):
+        raise RowValidationError(f"'{name}' debe ser un número no negativo")
+    return number
+
+
+def _customer_id(raw: Mapping[str, Any], customer_ids: Mapping[str, int]) -> int:
+    external_id = str(_required(raw, "external_id"))
+    try:
+        return customer_ids[external_id]
+    except KeyError as exc:
+        raise RowValidationError(f"cliente desconocido '{external_id}'") from exc
+
+
+def parse_consumption(raw: Mapping[str, Any], customer_ids: Mapping[str, int]) -> Record:
+    """Valida una fila de consumo y la convierte en parámetros de inserción."""
+
+    period_start = _parse_date(raw, "period_start")
+    period_end = _parse_date(raw, "period_end")
+    if period_end < period_start:
+        raise RowValidationError("'period_end' no puede ser anterior a 'period_start'")
+    return {
+        "customer_id": _customer_id(raw, customer_ids),
+        "period_start": period_start,
+        "period_end": period_end,
+        "data_used_mb": _parse_non_negative_float(raw, "data_used_mb"),
+        "voice_minutes": _parse_non_negative_float(raw, "voice_minutes"),
+    }
+
+
+def parse_billing(raw: Mapping[str, Any], customer_ids: Mapping[str, int]) -> Record:
+    """Valida una fila de facturación y la convierte en parámetros de inserción."""
+
+    raw_amount = _required(raw, "amount")
+    try:
+        amount = Decimal(str(raw_amount))
+    except InvalidOperation as exc:
+        raise RowValidationError(f"importe inválido: {raw_amount!r}") from exc
+    if not amount.is_finite() or amount.quantize(_AMOUNT_QUANTUM) != amount or abs(amount) > _MAX_AMOUNT:
+        raise RowValidationError(f"el importe {raw_amount!r} no cabe en NUMERIC(10, 2)")
+
+    currency = str(raw.get("currency") or "EUR").strip().upper()
+    if len(currency) > 8:
+        raise RowValidationError(f"moneda inválida: {currency!r}")
+
+    raw_paid = raw.get("paid", "")
+    paid_text = str(raw_paid).strip().lower()
+    if paid_text in _TRUE_VALUES:
+        paid = True
+    elif paid_text in _FALSE_VALUES:
+        paid = False
+    else:
+        raise RowValidationError(f"valor inválido en 'paid': {raw_paid!r}")
+
+    return {
+        "customer_id": _customer_id(raw, customer_ids),
+        "billing_date": _parse_date(raw, "billing_date"),
+        "amount": amount,
+        "currency": currency,
+        "due_date": _parse_date(raw, "due_date", required=False),
+        "paid": paid,
+    }
+
+
+class RecordKind(NamedTuple):
+    """Destino, validación y clave natural de un tipo de registro."""
+
+    table: Table
+    parser: Parser
+    conflict_columns: Tuple[str, ...] = ()
+
+
+RECORD_KINDS: Dict[str, RecordKind] = {
+    "consumption": RecordKind(
+        Consumption.__table__, parse_consumption, ("customer_id", "period_start", "period_end")
+    ),
+    "billing": RecordKind(Billing.__table__, parse_billing),
+}
+
+
+def _insert_statement(connection: Connection, kind: RecordKind) -> Executable:
+    """Construye la inserción del tipo; con clave natural es un upsert idempotente.
+
+    MySQL usa ``ON DUPLICATE KEY UPDATE`` y SQLite ``ON CONFLICT DO UPDATE``;
+    en otros dialectos se recurre a un ``INSERT`` simple.
+    """
+
+    if not kind.conflict_columns:
+        return insert(kind.table)
+
+    update_columns = [
+        column.name
+        for column in kind.table.columns
+        if column.name not in kind.conflict_columns and not column.primary_key and column.name != "created_at"
+    ]
+    dialect = connection.dialect.name
+    if dialect == "mysql":
+        statement = mysql_insert(kind.table)
+        return statement.on_duplicate_key_update({name: statement.inserted[name] for name in update_columns})
+    if dialect == "sqlite":
+        statement = sqlite_insert(kind.table)
+        return statement.on_conflict_do_update(
+            index_elements=list(kind.conflict_columns),
+            set_={name: statement.excluded[name] for name in update_columns},
+        )
+    return insert(kind.table)
+
+
+def read_records(path: str | Path) -> Iterator[Tuple[int, Mapping[str, Any]]]:
+    """Itera las filas del fichero con su número de línea sin cargarlo en memoria."""
+
+    path = Path(path)
+    with path.open(newline="", encoding="utf-8") as handle:
+        if path.suffix.lower() in JSON_LINES_SUFFIXES:
+            for line_number, line in enumerate(handle, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    yield line_number, {"__invalid__": line}
+                    continue
+                yield line_number, record if isinstance(record, dict) else {"__invalid__": line}
+        else:
+            reader = csv.DictReader(handle)
+            for row in reader:
+                yield reader.line_num, row
+
+
+def load_customer_ids(connection: Connection) -> Dict[str, int]:
+    """Precarga el mapa ``external_id`` → ``customer_id``."""
+
+    rows = connection.execute(select(Customer.external_id, Customer.id).execution_options(yield_per=10_000))
+    return {external_id: customer_id for external_id, customer_id in rows}
+
+
+def validate_records(
+    records: Iterable[Tuple[int, Mapping[str, Any]]],
+    parser: Parser,
+    customer_ids: Mapping[str, int],
+    stats: IngestionStats,
+    source: str = "",
+) -> Iterator[Record]:
+    """Convierte las filas válidas y contabiliza las rechazadas."""
+
+    for line_number, raw in records:
+        stats.read += 1
+        try:
+            if "__invalid__" in raw:
+                raise RowValidationError("JSON inválido")
+            yield parser(raw, customer_ids)
+        except RowValidationError as error:
+            stats.rejected += 1
+            logger.warning("Fila %s:%s descartada: %s", source, line_number, error)
+
+
+def _batches(records: Iterable[Record], batch_size: int) -> Iterator[List[Record]]:
+    batch: List[Record] = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _drop_archived(
+    connection: Connection, batch: List[Record], archived_until: date, stats: IngestionStats
+) -> List[Record]:
+    """Descarta los consumos cuyo periodo ya está en ``consumptions_archive``.
+
+    El upsert solo ve la tabla caliente: sin esta comprobación un periodo
+    archivado se cargaría de nuevo y contaría dos veces en los agregados.
+    """
+
+    candidates = [record for record in batch if record["period_start"] <= archived_until]
+    if not candidates:
+        return batch
+    key = select(ConsumptionArchive.customer_id, ConsumptionArchive.period_start, ConsumptionArchive.period_end)
+    archived = set(
+        connection.execute(
+            key.where(
+                ConsumptionArchive.customer_id.in_({record["customer_id"] for record in candidates}),
+                ConsumptionArchive.period_end.in_({record["period_end"] for record in candidates}),
+            )
+        ).tuples()
+    )
+    if not archived:
+        return batch
+    kept = []
+    for record in batch:
+        if (record["customer_id"], record["period_start"], record["period_end"]) in archived:
+            stats.rejected += 1
+            logger.warning(
+                "Consumo del cliente %s (%s - %s) descartado: el periodo ya está archivado",
+                record["customer_id"],
+                record["period_start"],
+                record["period_end"],
+            )
+        else:
+            kept.append(record)
+    return kept
+
+
+def write_batches(
+    connection: Connection,
+    kind: RecordKind,
+    records: Iterable[Record],
+    stats: IngestionStats,
+    batch_size: int = 5_000,
+    batches_per_transaction: int = 10,
+    on_commit: Callable[[Set[int]], None] | None = None,
+) -> None:
+    """Inserta los registros con ``executemany`` y confirma cada pocos lotes.
+
+    Los resúmenes de los clientes afectados se recalculan, y los rollups de
+    los periodos cargados se invalidan, en la misma transacción, ya que las
+    inserciones Core no disparan los eventos del ORM. Los consumos de
+    periodos ya archivados se descartan como filas rechazadas.
+    """
+
+    statement = _insert_statement(connection, kind)
+    tracks_periods = kind.table is Consumption.__table__
+    archived_until = (
+        connection.execute(select(func.max(ConsumptionArchive.period_start))).scalar() if tracks_periods else None
+    )
+    pending_customers: Set[int] = set()
+    pending_periods: Set[date] = set()
+    pending_batches = 0
+
+    def _commit() -> None:
+        nonlocal pending_batches
+        refresh_customer_summaries(connection, pending_customers)
+        invalidate_rollups(connection, pending_periods)
+        connection.commit()
+        if on_commit is not None:
+            on_commit(set(pending_customers))
+        stats.customer_ids.update(pending_customers)
+        pending_customers.clear()
+        pending_periods.clear()
+        pending_batches = 0
+
+    for batch in _batches(records, batch_size):
+        if archived_until is not None:
+            batch = _drop_archived(connection, batch, archived_until, stats)
+            if not batch:
+                continue
+        connection.execute(statement, batch)
+        stats.inserted += len(batch)
+        pending_customers.update(record["customer_id"] for record in batch)
+        if tracks_periods:
+            pending_periods.update(record["period_start"] for record in batch)
+        pending_batches += 1
+        if pending_batches >= batches_per_transaction:
+            _commit()
+    if pending_batches:
+        _commit()
+
+
+def ingest_file(
+    connection: Connection,
+    path: str | Path,
+    kind: str,
+    batch_size: int = 5_000,
+    batches_per_transaction: int = 10,
+    customer_ids: Mapping[str, int] | None = None,
+    on_commit: Callable[[Set[int]], None] | None = None,
+) -> IngestionStats:
+    """Carga un fichero completo de consumos o facturas en memoria constante."""
+
+    if kind not in RECORD_KINDS:
+        raise IngestionError(f"Tipo de registro no soportado: {kind!r}")
+    if batch_size <= 0 or batches_per_transaction <= 0:
+        raise IngestionError("El tamaño de lote y de transacción deben ser mayores que cero")
+
+    record_kind = RECORD_KINDS[kind]
+    if customer_ids is None:
+        customer_ids = load_customer_ids(connection)
+        connection.commit()
+
+    stats = IngestionStats()
+    started = time.perf_counter()
+    try:
+        records = validate_records(read_records(path), record_kind.parser, customer_ids, stats, source=str(path))
+        write_batches(connection, record_kind, records, stats, batch_size, batches_per_transaction, on_commit)
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        stats.elapsed = time.perf_counter() - started
+    return stats
+
+
+def split_byte_ranges(path: str | Path, data_start: int, parts: int) -> List[Tuple[int, int]]:
+    """Divide el fichero en ``parts`` rangos de bytes alineados a inicio de línea."""
+
+    size = os.path.getsize(path)
+    if size <= data_start:
+        return []
+    step = max(1, (size - data_start) // max(1, parts))
+    boundaries = [data_start]
+    with open(path, "rb") as handle:
+        for index in range(1, parts):
+            target = data_start + index * step
+            if target <= boundaries[-1]:
+                continue
+            handle.seek(target - 1)
+            handle.readline()
+            position = handle.tell()
+            if position >= size:
+                break
+            if position > boundaries[-1]:
+                boundaries.append(position)
+    boundaries.append(size)
+    return list(zip(boundaries, boundaries[1:]))
+
+
+def read_header(path: str | Path) -> Tuple[List[str] | None, int]:
+    """Devuelve las columnas del CSV (``None`` en JSON Lines) y el byte donde empiezan los datos."""
+
+    if Path(path).suffix.lower() in JSON_LINES_SUFFIXES:
+        return None, 0
+    with open(path, "rb") as handle:
+        header = handle.readline()
+    fieldnames = next(csv.reader([header.decode("utf-8-sig")]), [])
+    return [name.strip() for name in fieldnames], len(header)
+
+
+def read_byte_range(
+    path: str | Path, start: int, end: int, fieldnames: List[str] | None
+) -> Iterator[Tuple[int, Mapping[str, Any]]]:
+    """Itera las filas cuyo inicio está en ``[start, end)`` junto con su desplazamiento.
+
+    Cada línea debe contener un registro completo: no se admiten saltos de
+    línea dentro de campos CSV entrecomillados.
+    """
+
+    with open(path, "rb") as handle:
+        handle.seek(start)
+        position = start
+        while position < end:
+            line = handle.readline()
+            if not line:
+                break
+            offset = position
+            position += len(line)
+            text = line.decode("utf-8").rstrip("\r\n")
+            if not text.strip():
+                continue
+            if fieldnames is None:
+                try:
+                    record = json.loads(text)
+                except json.JSONDecodeError:
+                    record = None
+                yield offset, record if isinstance(record, dict) else {"__invalid__": text}
+            else:
+                yield offset, dict(zip(fieldnames, next(csv.reader([text]))))
+
+
+class ChunkResult(NamedTuple):
+    """Resultado de cargar un rango de bytes en un proceso trabajador."""
+
+    start: int
+    end: int
+    stats: IngestionStats
+    error: str | None = None
+
+
+_worker_engine: Engine | None = None
+_worker_customer_ids: Dict[str, int] = {}
+
+
+def _init_worker(database_uri: str) -> None:
+    """Crea el engine propio del proceso y precarga el mapa de clientes."""
+
+    global _worker_engine, _worker_customer_ids
+    _worker_engine = create_engine(database_uri, poolclass=NullPool)
+    with _worker_engine.connect() as connection:
+        _worker_customer_ids = load_customer_ids(connection)
+
+
+def _ingest_range(
+    task: Tuple[str, str, int, int, List[str] | None, int, int],
+) -> ChunkResult:
+    path, kind, start, end, fieldnames, batch_size, batches_per_transaction = task
+    stats = IngestionStats()
+    started = time.perf_counter()
+    try:
+        with _worker_engine.connect() as connection:
+            try:
+                records = validate_records(
+                    read_byte_range(path, start, end, fieldnames),
+                    RECORD_KINDS[kind].parser,
+                    _worker_customer_ids,
+                    stats,
+                    source=f"{path}@byte",
+                )
+                write_batches(connection, RECORD_KINDS[kind], records, stats, batch_size, batches_per_transaction)
+            except Exception:
+                connection.rollback()
+                raise
+    except Exception as error:  # noqa: BLE001 - el error se devuelve al proceso principal
+        logger.exception("Fallo cargando %s [%s, %s)", path, start, end)
+        return ChunkResult(start, end, stats, f"{type(error).__name__}: {error}")
+    finally:
+        stats.elapsed = time.perf_counter() - started
+    return ChunkResult(start, end, stats)
+
+
+def ingest_file_parallel(
+    database_uri: str,
+    path: str | Path,
+    kind: str,
+    workers: int,
+    batch_size: int = 5_000,
+    batches_per_transaction: int = 10,
+    chunks_per_worker: int = 4,
+    retries: int = 2,
+) -> Tuple[IngestionStats, List[ChunkResult]]:
+    """Carga un fichero repartiendo rangos de bytes entre un pool de procesos.
+
+    Cada proceso usa su propio engine y confirma por lotes. Solo se admite
+    para tipos con clave natural, cuyo upsert hace que reintentar un rango
+    fallido (total o parcialmente confirmado) sea seguro. Devuelve las
+    estadísticas agregadas y los rangos que siguieron fallando tras
+    ``retries`` reintentos.
+
+    ``database_uri`` debe ser la URI ya resuelta del engine de escritura
+    (``routing.active_database_uri()``): los procesos hijos no conocen el
+    ``instance_path`` de la aplicación ni el estado del respaldo.
+    """
+
+    if kind not in RECORD_KINDS:
+        raise IngestionError(f"Tipo de registro no soportado: {kind!r}")
+    if not RECORD_KINDS[kind].conflict_columns:
+        raise IngestionError(f"El tipo {kind!r} no tiene clave natural y no admite carga paralela")
+    if workers <= 0 or batch_size <= 0 or batches_per_transaction <= 0:
+        raise IngestionError("Los procesos, el tamaño de lote y de transacción deben ser mayores que cero")
+
+    fieldnames, data_start = read_header(path)
+    ranges = split_byte_ranges(path, data_start, workers * max(1, chunks_per_worker))
+    total = IngestionStats()
+    started = time.perf_counter()
+
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(database_uri,)) as pool:
+        pending = ranges
+        failed: List[ChunkResult] = []
+        for attempt in range(retries + 1):
+            tasks = [
+                (str(path), kind, start, end, fieldnames, batch_size, batches_per_transaction)
+                for start, end in pending
+            ]
+            failed = []
+            for result in pool.imap_unordered(_ingest_range, tasks):
+                if result.error is None:
+                    total.merge(result.stats)
+                else:
+                    failed.append(result)
+            if not failed:
+                break
+            pending = [(result.start, result.end) for result in failed]
+            if attempt < retries:
+                logger.warning("Reintentando %s rangos fallidos de %s", len(pending), path)
+
+    for result in failed:
+        total.merge(result.stats)
+    total.elapsed = time.perf_counter() - started
+    return total, failed
+
+
+__all__ = [
+    "ChunkResult",
+    "IngestionError",
+    "IngestionStats",
+    "RECORD_KINDS",
+    "RowValidationError",
+    "ingest_file",
+    "ingest_file_parallel",
+    "load_customer_ids",
+    "parse_billing",
+    "parse_consumption",
+    "read_byte_range",
+    "read_header",
+    "read_records",
+    "split_byte_ranges",
+]
@@ -0,0 +1,280 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+"""Particionado mensual por rango de ``consumptions`` y ``billings`` en MySQL.
+
+``consumptions`` se particiona por ``period_end`` y ``billings`` por
+``billing_date`` con ``RANGE COLUMNS``: una partición ``pAAAAMM`` por mes y
+una última ``pmax`` que recoge cualquier fecha posterior. El mantenimiento
+divide ``pmax`` para crear los meses futuros y retira los meses fuera de la
+retención sin perder datos vivos:
+
+* Los consumos se trasladan antes a ``consumptions_archive`` con
+  ``archive_service`` (la única vía de archivado) y solo se elimina una
+  partición cuando queda vacía; el último consumo de cada cliente la retiene.
+* Una partición de ``billings`` con facturas sin pagar nunca se elimina. Al
+  eliminar una con facturas pagadas se recalculan los resúmenes de sus
+  clientes.
+"""
+from __future__ import annotations
+
+import logging
+from datetime import date
+from typing import Dict, List, NamedTuple, Sequence, Set
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from backend.services.archive_service import archive_consumptions
+from backend.services.periods import add_months, month_start
+from backend.services.summary_service import refresh_customer_summaries
+
+
+logger = logging.getLogger(__name__)
+
+
+PARTITIONED_TABLES: Dict[str, str] = {"consumptions": "period_end", "billings": "billing_date"}
+FUTURE_PARTITION = "pmax"
+DEFAULT_MONTHS_AHEAD = 3
+
+
+class PartitionError(Exception):
+    """Error al consultar o modificar las particiones."""
+
+
+class Partition(NamedTuple):
+    """Partición existente; ``upper_bound`` es ``None`` para ``MAXVALUE``."""
+
+    name: str
+    upper_bound: date | None
+
+
+class MaintenancePlan(NamedTuple):
+    """Meses que hay que crear y particiones que hay que retirar en una tabla.
+
+    ``retained`` son las particiones caducadas que se conservan porque aún
+    contienen facturas sin pagar o el último consumo de algún cliente.
+    """
+
+    table: str
+    create: List[date]
+    expire: List[Partition]
+    retained: List[Partition]
+
+
+def partition_name(month: date) -> str:
+    return f"p{month:%Y%m}"
+
+
+def partition_definition(month: date) -> str:
+    return f"PARTITION {partition_name(month)} VALUES LESS THAN ('{add_months(month, 1).isoformat()}')"
+
+
+def _future_definition() -> str:
+    return f"PARTITION {FUTURE_PARTITION} VALUES LESS THAN (MAXVALUE)"
+
+
+def _months(first_month: date, last_month: date) -> List[date]:
+    months = []
+    month = month_start(first_month)
+    while month <= last_month:
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def partitioning_clause(table: str, first_month: date, last_month: date) -> str:
+    """Cláusula ``PARTITION BY`` con un mes por partición de ``first_month`` a ``last_month``.
+
+    La primera partición recoge también todas las fechas anteriores.
+    """
+
+    definitions = [partition_definition(month) for month in _months(first_month, last_month)]
+    definitions.append(_future_definition())
+    return f"PARTITION BY RANGE COLUMNS({PARTITIONED_TABLES[table]}) (\n  " + ",\n  ".join(definitions) + "\n)"
+
+
+def add_partitions_statement(table: str, months: Sequence[date]) -> str:
+    """Divide ``pmax`` en los meses indicados, que deben ser posteriores a la última partición."""
+
+    definitions = [partition_definition(month) for month in months] + [_future_definition()]
+    return (
+        f"ALTER TABLE {table} REORGANIZE PARTITION {FUTURE_PARTITION} INTO (\n  "
+        + ",\n  ".join(definitions)
+        + "\n)"
+    )
+
+
+def expire_statement(table: str, partition: Partition) -> str:
+    return f"ALTER TABLE {table} DROP PARTITION {partition.name}"
+
+
+# Filas que impiden eliminar una partición caducada. Con ``dry_run`` los
+# consumos aún no se han archivado, así que solo cuentan los que ``archive_service``
+# nunca mueve: el último de cada cliente.
+_BLOCKING_ROWS = {
+    "billings": "paid = 0",
+    "consumptions": None,
+}
+_BLOCKING_ROWS_DRY_RUN = {
+    "billings": "paid = 0",
+    "consumptions": (
+        "EXISTS (SELECT 1 FROM customer_summaries "
+        "WHERE customer_summaries.latest_consumption_id = consumptions.id)"
+    ),
+}
+
+
+def blocking_rows_statement(table: str, partition: Partition, dry_run: bool = False) -> str:
+    """``SELECT`` que devuelve una fila si ``partition`` no se puede eliminar todavía."""
+
+    condition = (_BLOCKING_ROWS_DRY_RUN if dry_run else _BLOCKING_ROWS)[table]
+    where = f" WHERE {condition}" if condition else ""
+    return f"SELECT 1 FROM {table} PARTITION ({partition.name}){where} LIMIT 1"
+
+
+def _require_mysql(connection: Connection) -> None:
+    if connection.dialect.name != "mysql":
+        raise PartitionError(
+            f"El particionado por rango solo está disponible en MySQL (dialecto actual: {connection.dialect.name})"
+        )
+
+
+def _parse_bound(description: str | None) -> date | None:
+    if description is None or description.upper() == "MAXVALUE":
+        return None
+    return date.fromisoformat(description.strip("'"))
+
+
+def list_partitions(connection: Connection, table: str) -> List[Partition]:
+    """Particiones de ``table`` en orden, leídas de ``information_schema``."""
+
+    _require_mysql(connection)
+    rows = connection.execute(
+        text(
+            "SELECT PARTITION_NAME, PARTITION_DESCRIPTION FROM information_schema.PARTITIONS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table AND PARTITION_NAME IS NOT NULL "
+            "ORDER BY PARTITION_ORDINAL_POSITION"
+        ),
+        {"table": table},
+    ).all()
+    if not rows:
+        raise PartitionError(f"La tabla '{table}' no está particionada; aplica antes las migraciones")
+    return [Partition(name, _parse_bound(description)) for name, description in rows]
+
+
+def plan_maintenance(
+    table: str,
+    partitions: Sequence[Partition],
+    today: date,
+    months_ahead: int = DEFAULT_MONTHS_AHEAD,
+    retention_months: int | None = None,
+) -> MaintenancePlan:
+    """Calcula qué meses faltan hasta ``months_ahead`` y qué particiones superan la retención.
+
+    Una partición caduca cuando todas sus fechas son anteriores al primer
+    día del mes ``retention_months`` meses antes del actual; ``pmax`` nunca
+    se retira.
+    """
+
+    bounded = [partition for partition in partitions if partition.upper_bound is not None]
+    current = month_start(today)
+    last_month = add_months(current, months_ahead)
+    next_month = bounded[-1].upper_bound if bounded else current
+    create = _months(next_month, last_month)
+
+    expire: List[Partition] = []
+    if retention_months is not None:
+        cutoff = add_months(current, -retention_months)
+        expire = [partition for partition in bounded if partition.upper_bound <= cutoff]
+    return MaintenancePlan(table, create, expire, [])
+
+
+def plan_statements(plan: MaintenancePlan) -> List[str]:
+    statements = [add_partitions_statement(plan.table, plan.create)] if plan.create else []
+    statements += [expire_statement(plan.table, partition) for partition in plan.expire]
+    return statements
+
+
+def _partition_customers(connection: Connection, table: str, partition: Partition) -> Set[int]:
+    rows = connection.execute(text(f"SELECT DISTINCT customer_id FROM {table} PARTITION ({partition.name})"))
+    return {customer_id for (customer_id,) in rows}
+
+
+def _split_expired(connection: Connection, plan: MaintenancePlan, dry_run: bool) -> MaintenancePlan:
+    expire: List[Partition] = []
+    retained: List[Partition]
+    for partition in plan.expire:
+        blocked = connection.execute(text(blocking_rows_statement(plan.table, partition, dry_run))).first()
+        (retained if blocked else expire).append(partition)
+    connection.rollback()
+    for partition in retained:
+        logger.warning(
+            "Se conserva %s.%s: contiene %s",
+            plan.table,
+            partition.name,
+            "facturas sin pagar" if plan.table == "billings" else "el último consumo de algún cliente",
+        )
+    return plan._replace(expire=expire, retained=retained)
+
+
+def maintain_partitions(
+    connection: Connection,
+    today: date | None = None,
+    months_ahead: int = DEFAULT_MONTHS_AHEAD,
+    retention_months: int | None = None,
+    dry_run: bool = False,
+) -> List[MaintenancePlan]:
+    """Crea las particiones futuras y retira las caducadas de todas las tablas particionadas.
+
+    Con ``retention_months`` los consumos anteriores al corte se archivan
+    primero en ``consumptions_archive``. Con ``dry_run`` solo calcula los
+    planes. Las sentencias DDL de MySQL confirman implícitamente, así que
+    cada una se aplica por separado.
+    """
+
+    _require_mysql(connection)
+    today = today or date.today()
+    if retention_months is not None and not dry_run:
+        archive_consumptions(connection, add_months(month_start(today), -retention_months))
+
+    plans = []
+    for table in PARTITIONED_TABLES:
+        plan = plan_maintenance(table, list_partitions(connection, table), today, months_ahead, retention_months)
+        plan = _split_expired(connection, plan, dry_run)
+        plans.append(plan)
+        if dry_run:
+            continue
+        customers: Set[int] = set()
+        if table == "billings":
+            for partition in plan.expire:
+                customers |= _partition_customers(connection, table, partition)
+            connection.rollback()
+        for statement in plan_statements(plan):
+            connection.execute(text(statement))
+        connection.commit()
+        if customers:
+            refresh_customer_summaries(connection, customers)
+            connection.commit()
+    return plans
+
+
+__all__ = [
+    "DEFAULT_MONTHS_AHEAD",
+    "FUTURE_PARTITION",
+    "PARTITIONED_TABLES",
+    "MaintenancePlan",
+    "Partition",
+    "PartitionError",
+    "add_months",
+    "add_partitions_statement",
+    "blocking_rows_statement",
+    "expire_statement",
+    "list_partitions",
+    "maintain_partitions",
+    "month_start",
+    "partition_definition",
+    "partition_name",
+    "partitioning_clause",
+    "plan_maintenance",
+    "plan_statements",
+]
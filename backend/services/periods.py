@@ -0,0 +1,18 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+"""Aritmética de meses compartida por el particionado, el archivado y los resúmenes."""
+from __future__ import annotations
+
+from datetime import date
+
+
+def month_start(value: date) -> date:
+    return value.replace(day=1)
+
+
+def add_months(month: date, count: int) -> date:
+    year, month_index = divmod(month.year * 12 + month.month - 1 + count, 12)
+    return date(year, month_index + 1, 1)
+
+
+__all__ = ["add_months", "month_start"]
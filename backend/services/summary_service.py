@@ -0,0 +1,207 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+"""Mantenimiento de la tabla materializada ``customer_summaries``."""
+from __future__ import annotations
+
+from datetime import date, datetime
+from itertools import chain
+from typing import Any, Iterable, Set
+
+from sqlalchemy import DateTime, Select, bindparam, delete, event, func, insert, inspect, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.expression import ColumnElement, ScalarSelect
+
+from backend.models import Billing, Consumption, Customer, CustomerSummary
+from backend.services.periods import add_months, month_start
+
+
+_hooks_registered = False
+
+# Meses hacia atrás en los que se busca primero el último consumo de un cliente.
+RECENT_PERIOD_MONTHS = 3
+
+_SUMMARY_COLUMNS = [
+    CustomerSummary.customer_id,
+    CustomerSummary.latest_consumption_id,
+    CustomerSummary.latest_period_start,
+    CustomerSummary.latest_period_end,
+    CustomerSummary.data_used_mb,
+    CustomerSummary.voice_minutes,
+    CustomerSummary.outstanding_balance,
+    CustomerSummary.billing_count,
+    CustomerSummary.updated_at,
+]
+
+
+def recent_period_floor(today: date | None = None) -> date:
+    """Primer día del mes ``RECENT_PERIOD_MONTHS`` meses antes de ``today``."""
+
+    return add_months(month_start(today or date.today()), -RECENT_PERIOD_MONTHS)
+
+
+def _latest_consumption(*criteria: ColumnElement[bool]) -> ScalarSelect:
+    return (
+        select(Consumption.id)
+        .where(Consumption.customer_id == Customer.id, *criteria)
+        .order_by(Consumption.period_end.desc(), Consumption.id.desc())
+        .limit(1)
+        .correlate(Customer)
+        .scalar_subquery()
+    )
+
+
+def _latest_consumption_id(since: date) -> ColumnElement[int]:
+    """Id del consumo más reciente del cliente, buscado primero desde ``since``.
+
+    Con la fecha como constante MySQL poda las particiones mensuales
+    anteriores de ``consumptions``; el historial completo solo se recorre
+    para clientes sin consumos recientes.
+    """
+
+    return func.coalesce(_latest_consumption(Consumption.period_end >= since), _latest_consumption())
+
+
+def _outstanding_balance() -> ScalarSelect:
+    """Subconsulta correlacionada con la suma de facturas no pagadas del cliente."""
+
+    return (
+        select(func.coalesce(func.sum(Billing.amount), 0))
+        .where(Billing.customer_id == Customer.id, Billing.paid.is_(False))
+        .correlate(Customer)
+        .scalar_subquery()
+    )
+
+
+def _billing_count() -> ScalarSelect:
+    return (
+        select(func.count(Billing.id))
+        .where(Billing.customer_id == Customer.id)
+        .correlate(Customer)
+        .scalar_subquery()
+    )
+
+
+def summary_select(criteria: ColumnElement[bool], since: date | None = None) -> Select:
+    """Calcula las filas de resumen de los clientes que cumplen ``criteria``.
+
+    Cada fila se resuelve con búsquedas sobre los índices compuestos de
+    ``consumptions`` y ``billings``, por lo que el coste depende del historial
+    del cliente y no del tamaño de las tablas. ``since`` acota la búsqueda
+    del último consumo (por defecto, ``recent_period_floor()``).
+    """
+
+    return (
+        select(
+            Customer.id,
+            Consumption.id,
+            Consumption.period_start,
+            Consumption.period_end,
+            Consumption.data_used_mb,
+            Consumption.voice_minutes,
+            _outstanding_balance(),
+            _billing_count(),
+            bindparam("summary_updated_at", type_=DateTime),
+        )
+        .select_from(Customer)
+        .outerjoin(Consumption, Consumption.id == _latest_consumption_id(since or recent_period_floor()))
+        .where(criteria)
+    )
+
+
+def _replace_summaries(connection: Connection, criteria: ColumnElement[bool], summary_criteria: ColumnElement[bool]) -> None:
+    connection.execute(delete(CustomerSummary).where(summary_criteria))
+    connection.execute(
+        insert(CustomerSummary).from_select(_SUMMARY_COLUMNS, summary_select(criteria)),
+        {"summary_updated_at": datetime.utcnow()},
+    )
+
+
+def refresh_customer_summaries(connection: Connection, customer_ids: Iterable[int]) -> None:
+    """Recalcula el resumen de los clientes indicados dentro de la transacción actual.
+
+    Debe invocarse tras escrituras que no pasan por el ORM (cargas masivas),
+    ya que los cambios hechos con la sesión se propagan automáticamente.
+    """
+
+    ids = sorted(set(customer_ids))
+    if not ids:
+        return
+    _replace_summaries(connection, Customer.id.in_(ids), CustomerSummary.customer_id.in_(ids))
+
+
+def rebuild_customer_summaries(
+    connection: Connection, batch_size: int = 5_000, first_id: int = 1, last_id: int | None = None
+) -> int:
+    """Reconstruye los resúmenes por rangos de clientes y devuelve cuántos procesó.
+
+    Por defecto recorre todos los clientes; ``first_id`` y ``last_id``
+    (incluidos) limitan la reconstrucción a un rango de ids. Cada rango se
+    confirma por separado para no mantener una transacción larga sobre la
+    tabla de clientes; ``connection`` no debe tener una transacción ajena en
+    curso.
+    """
+
+    processed = 0
+    previous = first_id - 1
+    while True:
+        statement = select(Customer.id).where(Customer.id > previous)
+        if last_id is not None:
+            statement = statement.where(Customer.id <= last_id)
+        ids = connection.execute(statement.order_by(Customer.id).limit(batch_size)).scalars().all()
+        if not ids:
+            break
+        first, previous = ids[0], ids[-1]
+        _replace_summaries(
+            connection,
+            Customer.id.between(first, previous),
+            CustomerSummary.customer_id.between(first, previous),
+        )
+        connection.commit()
+        processed += len(ids)
+    return processed
+
+
+def _history_values(instance: Any, attribute: str) -> Iterable[Any]:
+    history = inspect(instance).attrs[attribute].history
+    return chain(history.deleted or (), history.unchanged or (), history.added or ())
+
+
+def changed_customer_ids(session: Session) -> Set[int]:
+    """Clientes cuyos consumos o facturas forman parte del flush en curso.
+
+    Incluye el cliente anterior cuando un registro cambia de ``customer_id``.
+    """
+
+    customer_ids: Set[int] = set()
+    for instance in chain(session.new, session.dirty, session.deleted):
+        if isinstance(instance, (Consumption, Billing)):
+            customer_ids.update(value for value in _history_values(instance, "customer_id") if value)
+    return customer_ids
+
+
+def _refresh_after_flush(session: Session, flush_context: Any) -> None:
+    customer_ids = changed_customer_ids(session)
+    if customer_ids:
+        refresh_customer_summaries(session.connection(), customer_ids)
+
+
+def register_summary_hooks() -> None:
+    """Registra una única vez el evento de sesión que mantiene los resúmenes."""
+
+    global _hooks_registered
+    if _hooks_registered:
+        return
+    event.listen(Session, "after_flush", _refresh_after_flush)
+    _hooks_registered = True
+
+
+__all__ = [
+    "RECENT_PERIOD_MONTHS",
+    "changed_customer_ids",
+    "rebuild_customer_summaries",
+    "recent_period_floor",
+    "refresh_customer_summaries",
+    "register_summary_hooks",
+    "summary_select",
+]
@@ -0,0 +1,37 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+"""Reconstruye la tabla materializada ``customer_summaries``.
+
+Uso::
+
+    python -m backend.summaries --batch-size 5000
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Sequence
+
+from backend.app_factory import create_app
+from backend.models import db
+from backend.services.summary_service import rebuild_customer_summaries
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Reconstruye los resúmenes de clientes.")
+    parser.add_argument("--batch-size", type=int, default=5_000, help="Clientes por transacción.")
+    args = parser.parse_args(argv)
+
+    app = create_app()
+    with app.app_context():
+        started = time.perf_counter()
+        with db.engine.connect() as connection:
+            processed = rebuild_customer_summaries(connection, batch_size=args.batch_size)
+        app.logger.info(
+            "Resúmenes reconstruidos para %s clientes en %.2fs", processed, time.perf_counter() - started
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
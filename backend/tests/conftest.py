@@ -3,11 +3,14 @@
 """Fixtures de Pytest para la aplicación Flask."""
 from __future__ import annotations
 
+from contextlib import contextmanager
 from datetime import date
 from decimal import Decimal
+from typing import Callable, ContextManager, Iterator, List
 
 import pytest
 from flask.testing import FlaskClient
+from sqlalchemy import event
 
 from backend.app_factory import create_app
 from backend.models import Billing, Consumption, Customer, db
@@ -36,6 +39,26 @@ def client(app) -> FlaskClient:
     return app.test_client()
 
 
+@pytest.fixture
+def count_queries(app) -> Callable[[], ContextManager[List[str]]]:
+    """Registra las sentencias SQL que ejecuta el engine dentro de un bloque ``with``."""
+
+    @contextmanager
+    def _count_queries() -> Iterator[List[str]]:
+        statements: List[str] = []
+
+        def _record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", _record)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, "before_cursor_execute", _record)
+
+    return _count_queries
+
+
 @pytest.fixture
 def sample_customer(app):
     """Crea datos de ejemplo en la base de datos para las pruebas."""
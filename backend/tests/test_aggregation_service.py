@@ -0,0 +1,172 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+"""Pruebas de la agregación de consumos por intervalo y de sus rollups."""
+from __future__ import annotations
+
+from datetime import date
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import mysql, sqlite
+
+from backend.models import Consumption, ConsumptionRollup, Customer, db
+from backend.services.aggregation_service import (
+    bucket_range,
+    closed_buckets,
+    date_bucket,
+    get_usage_aggregates,
+    refresh_rollups,
+)
+
+
+@pytest.fixture
+def usage(sample_customer):
+    other = Customer(external_id="0002", full_name="Luis Gómez")
+    db.session.add(other)
+    db.session.flush()
+    customer_id = db.session.scalar(select(Customer.id).where(Customer.external_id == sample_customer))
+    db.session.add_all(
+        [
+            Consumption(
+                customer_id=other.id,
+                period_start=date(2024, 5, 1),
+                period_end=date(2024, 5, 31),
+                data_used_mb=500.0,
+                voice_minutes=30,
+            ),
+            Consumption(
+                customer_id=customer_id,
+                period_start=date(2024, 6, 1),
+                period_end=date(2024, 6, 30),
+                data_used_mb=2048.0,
+                voice_minutes=60,
+            ),
+        ]
+    )
+    db.session.commit()
+    return other.id
+
+
+def _rollups(granularity: str):
+    rows = db.session.execute(
+        select(ConsumptionRollup.bucket, ConsumptionRollup.record_count)
+        .where(ConsumptionRollup.granularity == granularity)
+        .order_by(ConsumptionRollup.bucket)
+    ).all()
+    return [tuple(row) for row in rows]
+
+
+def _refresh(granularity: str, start: date, end: date, today: date | None = None):
+    with db.engine.begin() as connection:
+        return refresh_rollups(connection, granularity, bucket_range(start, end, granularity), today)
+
+
+def test_date_bucket_compiles_per_dialect():
+    day = str(select(date_bucket(Consumption.period_start, "dia")).compile(dialect=mysql.dialect()))
+    month = str(select(date_bucket(Consumption.period_start, "mes")).compile(dialect=sqlite.dialect()))
+
+    assert "DATE(consumptions.period_start)" in day
+    assert "strftime('%Y-%m-01', consumptions.period_start)" in month
+
+
+def test_bucket_range_rejects_inverted_and_huge_ranges():
+    assert bucket_range(date(2024, 11, 15), date(2025, 1, 1), "mes") == [
+        date(2024, 11, 1),
+        date(2024, 12, 1),
+        date(2025, 1, 1),
+    ]
+    with pytest.raises(ValueError):
+        bucket_range(date(2024, 2, 1), date(2024, 1, 1), "dia")
+    with pytest.raises(ValueError):
+        bucket_range(date(2000, 1, 1), date(2030, 1, 1), "dia")
+
+
+def test_live_aggregation_groups_by_month_and_filters_customers(usage):
+    buckets = get_usage_aggregates("mes", date(2024, 1, 1), date(2024, 12, 31), use_rollups=False)
+
+    assert [(b.bucket, b.data_used_mb, b.voice_minutes, b.customer_count) for b in buckets] == [
+        (date(2024, 5, 1), 1524.0, 150.0, 2),
+        (date(2024, 6, 1), 2048.0, 60.0, 1),
+    ]
+    filtered = get_usage_aggregates("dia", date(2024, 5, 1), date(2024, 6, 30), ["0002"])
+    assert [(b.bucket, b.data_used_mb) for b in filtered] == [(date(2024, 5, 1), 500.0)]
+    assert _rollups("dia") == []
+
+
+def test_closed_buckets_exclude_the_current_interval():
+    buckets = bucket_range(date(2024, 5, 1), date(2024, 7, 31), "mes")
+
+    assert closed_buckets(buckets, "mes", today=date(2024, 6, 15)) == [date(2024, 5, 1)]
+    assert closed_buckets(buckets, "dia", today=date(2024, 6, 15)) == [date(2024, 5, 1), date(2024, 6, 1)]
+
+
+def test_reads_never_write_rollups(usage):
+    first = get_usage_aggregates("mes", date(2024, 4, 1), date(2024, 6, 30))
+
+    assert [(b.bucket, b.record_count) for b in first] == [(date(2024, 5, 1), 2), (date(2024, 6, 1), 1)]
+    assert _rollups("mes") == []
+
+
+def test_refresh_persists_closed_buckets_and_writes_invalidate_them(usage):
+    _refresh("mes", date(2024, 4, 1), date(2024, 6, 30))
+    assert _rollups("mes") == [(date(2024, 4, 1), 0), (date(2024, 5, 1), 2), (date(2024, 6, 1), 1)]
+
+    db.session.add(
+        Consumption(
+            customer_id=usage,
+            period_start=date(2024, 6, 1),
+            period_end=date(2024, 6, 30),
+            data_used_mb=100.0,
+            voice_minutes=5,
+        )
+    )
+    db.session.commit()
+    assert _rollups("mes") == [(date(2024, 4, 1), 0), (date(2024, 5, 1), 2)]
+
+    june = get_usage_aggregates("mes", date(2024, 6, 1), date(2024, 6, 30))
+    assert [(b.data_used_mb, b.customer_count, b.record_count) for b in june] == [(2148.0, 2, 2)]
+
+
+def test_open_bucket_is_never_persisted_nor_read_from_rollups(usage):
+    totals = _refresh("mes", date(2024, 4, 1), date(2024, 6, 30), today=date(2024, 6, 15))
+
+    assert [total.bucket for total in totals] == [date(2024, 4, 1), date(2024, 5, 1)]
+    assert _rollups("mes") == [(date(2024, 4, 1), 0), (date(2024, 5, 1), 2)]
+
+    today = date.today().replace(day=1)
+    db.session.add(
+        Consumption(customer_id=usage, period_start=today, period_end=today, data_used_mb=7.0, voice_minutes=1)
+    )
+    db.session.commit()
+    # Fila obsoleta de una versión que guardaba el intervalo abierto.
+    db.session.add(
+        ConsumptionRollup(
+            granularity="mes", bucket=today, data_used_mb=1.0, voice_minutes=1.0, customer_count=9, record_count=9
+        )
+    )
+    db.session.commit()
+
+    current = get_usage_aggregates("mes", today, today)
+    assert [(b.data_used_mb, b.record_count) for b in current] == [(7.0, 1)]
+
+
+def test_aggregate_endpoint(client, usage):
+    response = client.get("/api/consumo/agregado?granularidad=mes&desde=2024-05-01&hasta=2024-06-30")
+
+    assert response.status_code == 200
+    payload = response.get_json()
+    assert payload["fuente"] == "rollup"
+    assert payload["periodos"][0] == {
+        "periodo": "2024-05-01",
+        "consumo_mb": 1524.0,
+        "minutos": 150.0,
+        "clientes": 2,
+        "registros": 2,
+    }
+
+    filtered = client.get("/api/consumo/agregado?granularidad=dia&desde=2024-05-01&hasta=2024-05-31&clientes=0001")
+    assert filtered.get_json()["fuente"] == "consulta"
+    assert [p["consumo_mb"] for p in filtered.get_json()["periodos"]] == [1024.0]
+
+    assert client.get("/api/consumo/agregado?desde=2024-05-01").status_code == 400
+    assert client.get("/api/consumo/agregado?granularidad=anio&desde=2024-05-01&hasta=2024-06-01").status_code == 400
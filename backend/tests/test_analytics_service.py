@@ -0,0 +1,76 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+"""Pruebas de la analítica vectorizada de saldos y consumos."""
+from __future__ import annotations
+
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from backend.models import Billing, Consumption, Customer, db
+from backend.services.analytics_service import (
+    compute_balances,
+    compute_usage,
+    group_sum,
+    load_external_ids,
+)
+
+
+@pytest.fixture
+def fleet(sample_customer):
+    customers = [Customer(external_id=f"00{number:02d}", full_name=f"Cliente {number}") for number in range(2, 6)]
+    db.session.add_all(customers)
+    db.session.flush()
+    for number, customer in enumerate(customers, start=2):
+        db.session.add(
+            Consumption(
+                customer_id=customer.id,
+                period_start=date(2024, 5, 1),
+                period_end=date(2024, 5, 31),
+                data_used_mb=100.0 * number,
+                voice_minutes=number,
+            )
+        )
+    second = customers[0].id
+    db.session.add_all(
+        Billing(customer_id=second, billing_date=date(2024, 4, 1), amount=Decimal(amount), due_date=due_date)
+        for amount, due_date in (("0.10", date(2024, 4, 30)), ("0.20", date(2024, 4, 30)), ("0.70", None))
+    )
+    db.session.add(
+        Billing(customer_id=second, billing_date=date(2024, 3, 1), amount=Decimal("99.99"), due_date=date(2024, 3, 30), paid=True)
+    )
+    db.session.commit()
+    return {customer.external_id: customer.id for customer in customers}
+
+
+def test_group_sum_accumulates_per_id():
+    ids, sums = group_sum(np.array([3, 1, 3, 2]), np.array([[1, 10], [2, 20], [3, 30], [4, 40]]))
+
+    assert ids.tolist() == [1, 2, 3]
+    assert sums.tolist() == [[2, 20], [4, 40], [4, 40]]
+
+
+def test_balances_use_exact_cents(app, fleet):
+    with db.engine.connect() as connection:
+        report = compute_balances(connection, as_of=date(2024, 5, 15), chunk_size=2)
+        external_ids = load_external_ids(connection)
+
+    records = {record["cliente_id"]: record for record in report.records(external_ids)}
+    assert records["0001"] == {"cliente_id": "0001", "saldo": Decimal("15.50"), "vencido": Decimal("0.00")}
+    assert records["0002"] == {"cliente_id": "0002", "saldo": Decimal("1.00"), "vencido": Decimal("0.30")}
+    assert report.total_outstanding == Decimal("16.50")
+    assert report.rows_read == 4
+    assert report.overdue().customer_ids.tolist() == [fleet["0002"]]
+
+
+def test_usage_totals_and_percentiles(app, fleet):
+    with db.engine.connect() as connection:
+        report = compute_usage(connection, date(2024, 5, 1), date(2024, 5, 31), percentiles=(50.0,), chunk_size=2)
+
+    assert report.rows_read == 5
+    assert sorted(report.data_used_mb.tolist()) == [200.0, 300.0, 400.0, 500.0, 1024.0]
+    assert report.percentiles["data_used_mb"] == {50.0: 400.0}
+    assert report.above(75).size == 1
@@ -0,0 +1,173 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+"""Pruebas del archivado de consumos históricos."""
+from __future__ import annotations
+
+from datetime import date
+
+import pytest
+from sqlalchemy import func, select
+
+from backend.models import Consumption, ConsumptionArchive, Customer, CustomerSummary, db
+from backend.services.aggregation_service import bucket_range, get_usage_aggregates, refresh_rollups
+from backend.services.analytics_service import compute_usage
+from backend.services.archive_service import archive_batch, archive_consumptions, archive_cutoff
+from backend.services.export_service import export_table
+from backend.services.ingestion_service import ingest_file
+
+
+@pytest.fixture
+def customer_with_history(sample_customer):
+    customer_id = db.session.query(Customer.id).filter_by(external_id=sample_customer).scalar()
+    db.session.execute(
+        Consumption.__table__.insert(),
+        [
+            {
+                "customer_id": customer_id,
+                "period_start": date(2023, month, 1),
+                "period_end": date(2023, month, 28),
+                "data_used_mb": float(month),
+                "voice_minutes": float(month * 10),
+            }
+            for month in range(1, 13)
+        ],
+    )
+    db.session.commit()
+    return sample_customer
+
+
+def _count(model) -> int:
+    return db.session.scalar(select(func.count()).select_from(model))
+
+
+def test_archive_cutoff_is_the_first_day_of_the_retention_month():
+    assert archive_cutoff(6, today=date(2024, 5, 20)) == date(2023, 11, 1)
+    with pytest.raises(ValueError):
+        archive_cutoff(-1)
+
+
+def test_archive_moves_old_periods_in_batches(app, customer_with_history):
+    latest_id = db.session.scalar(select(CustomerSummary.latest_consumption_id))
+
+    with db.engine.connect() as connection:
+        stats = archive_consumptions(connection, date(2023, 7, 1), batch_size=4)
+
+    assert (stats.rows, stats.batches) == (6, 2)
+    assert _count(Consumption) == 7
+    assert _count(ConsumptionArchive) == 6
+    assert db.session.scalar(select(func.max(ConsumptionArchive.period_end))) == date(2023, 6, 28)
+    assert db.session.get(Consumption, latest_id) is not None
+
+
+def test_archive_never_moves_the_latest_consumption(app, sample_customer):
+    with db.engine.connect() as connection:
+        stats = archive_consumptions(connection, date(2030, 1, 1))
+
+    assert stats.rows == 0
+    assert _count(Consumption) == 1
+
+
+def test_archive_respects_max_batches(app, customer_with_history):
+    with db.engine.connect() as connection:
+        stats = archive_consumptions(connection, date(2024, 1, 1), batch_size=5, max_batches=1)
+
+    assert (stats.rows, stats.batches) == (5, 1)
+
+
+def test_archive_batches_continue_after_the_previous_key(app, customer_with_history):
+    with db.engine.connect() as connection:
+        first = archive_batch(connection, date(2023, 7, 1), batch_size=2)
+        second = archive_batch(connection, date(2023, 7, 1), batch_size=2, after=(date(2023, 4, 1), 0))
+
+    assert (first.rows, first.last_key[0]) == (2, date(2023, 2, 1))
+    assert (second.rows, second.last_key[0]) == (2, date(2023, 5, 1))
+    assert db.session.scalar(select(func.min(Consumption.period_start))) == date(2023, 3, 1)
+
+
+def test_aggregates_and_rollups_include_archived_periods(app, customer_with_history):
+    before = get_usage_aggregates("mes", date(2023, 1, 1), date(2023, 12, 31))
+    with db.engine.begin() as connection:
+        refresh_rollups(connection, "mes", bucket_range(date(2023, 1, 1), date(2023, 12, 31), "mes"))
+
+    with db.engine.connect() as connection:
+        archive_consumptions(connection, date(2023, 7, 1))
+    with db.engine.begin() as connection:
+        refresh_rollups(connection, "mes", bucket_range(date(2023, 1, 1), date(2023, 6, 30), "mes"))
+
+    assert len(before) == 12
+    assert get_usage_aggregates("mes", date(2023, 1, 1), date(2023, 12, 31)) == before
+    assert get_usage_aggregates("mes", date(2023, 1, 1), date(2023, 12, 31), use_rollups=False) == before
+
+
+def test_reingesting_an_archived_period_is_rejected(app, customer_with_history, tmp_path):
+    with db.engine.connect() as connection:
+        archive_consumptions(connection, date(2023, 7, 1))
+    before = get_usage_aggregates("mes", date(2023, 1, 1), date(2023, 12, 31), use_rollups=False)
+    path = tmp_path / "usage.csv"
+    path.write_text(
+        "external_id,period_start,period_end,data_used_mb,voice_minutes\n"
+        "0001,2023-03-01,2023-03-28,999,1\n"
+        "0001,2023-08-01,2023-08-28,8,80\n",
+        encoding="utf-8",
+    )
+
+    with db.engine.connect() as connection:
+        stats = ingest_file(connection, path, "consumption")
+
+    assert (stats.inserted, stats.rejected) == (1, 1)
+    assert _count(Consumption) + _count(ConsumptionArchive) == 13
+    assert get_usage_aggregates("mes", date(2023, 1, 1), date(2023, 12, 31), use_rollups=False) == before
+
+
+def test_batch_reports_include_archived_periods(app, customer_with_history, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    pytest.importorskip("numpy")
+
+    with db.engine.connect() as connection:
+        archive_consumptions(connection, date(2023, 7, 1))
+        stats = export_table(connection, "consumption", tmp_path)
+        usage = compute_usage(connection, date(2023, 1, 1), date(2023, 12, 31))
+
+    assert stats.rows == pq.read_table(tmp_path / "consumption").num_rows == 13
+    assert (usage.rows_read, usage.data_used_mb.tolist()) == (12, [78.0])
+
+
+def test_history_unions_archive_when_requested(client, customer_with_history):
+    with db.engine.connect() as connection:
+        archive_consumptions(connection, date(2023, 7, 1))
+
+    hot = client.get("/api/consumo/historial", query_string={"customer_id": "0001", "limite": 50}).get_json()
+    assert len(hot["periodos"]) == 7
+
+    seen = []
+    cursor = None
+    while True:
+        query = {"customer_id": "0001", "limite": 4, "archivo": "true"}
+        if cursor:
+            query["cursor"] = cursor
+        payload = client.get("/api/consumo/historial", query_string=query).get_json()
+        seen.extend(period["periodo_fin"] for period in payload["periodos"])
+        cursor = payload["siguiente"]
+        if cursor is None:
+            break
+
+    assert len(seen) == 13
+    assert seen == sorted(seen, reverse=True)
+    assert seen[-1] == "2023-01-28"
+
+
+def test_history_stream_includes_archive(client, customer_with_history):
+    with db.engine.connect() as connection:
+        archive_consumptions(connection, date(2023, 7, 1))
+
+    response = client.get(
+        "/api/consumo/historial", query_string={"customer_id": "0001", "formato": "ndjson", "archivo": "1"}
+    )
+
+    assert len(response.get_data(as_text=True).splitlines()) == 13
+
+
+def test_history_rejects_invalid_archive_flag(client, sample_customer):
+    response = client.get("/api/consumo/historial", query_string={"customer_id": "0001", "archivo": "quizas"})
+
+    assert response.status_code == 400
@@ -0,0 +1,225 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+"""Pruebas del modo de servicio asíncrono (ASGI)."""
+from __future__ import annotations
+
+import asyncio
+import json
+from datetime import date
+from decimal import Decimal
+from typing import Any, Dict, List, Tuple
+
+import pytest
+
+pytest.importorskip("aiosqlite")
+pytest.importorskip("a2wsgi")
+
+from backend.app_factory import create_app
+from backend.asgi import async_database_url, create_asgi_app
+from backend.models import Billing, Consumption, Customer, db
+
+
+@pytest.fixture
+def asgi_config(tmp_path):
+    return {
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'asgi.sqlite3'}",
+        "API_CACHE_CONTROL": "private, max-age=0",
+        "CORS_ORIGINS": "https://panel.example.com",
+    }
+
+
+@pytest.fixture
+def asgi_app(asgi_config):
+    """Aplicación ASGI sobre un fichero SQLite sembrado con la app Flask."""
+    config = asgi_config
+    flask_app = create_app(config)
+    with flask_app.app_context():
+        db.create_all()
+        customer = Customer(external_id="0001", full_name="Ana Pérez", email="ana@example.com")
+        db.session.add(customer)
+        db.session.flush()
+        db.session.add(
+            Consumption(
+                customer_id=customer.id,
+                period_start=date(2024, 5, 1),
+                period_end=date(2024, 5, 31),
+                data_used_mb=1024.0,
+                voice_minutes=120,
+            )
+        )
+        db.session.add(
+            Billing(
+                customer_id=customer.id,
+                billing_date=date(2024, 5, 15),
+                amount=Decimal("15.50"),
+                currency="EUR",
+                due_date=date(2024, 6, 5),
+                paid=False,
+            )
+        )
+        db.session.commit()
+        db.engine.dispose()
+
+    return create_asgi_app(config)
+
+
+async def _call(app, method: str, path: str, query: str = "", body: bytes = b"", headers: List[Tuple[str, str]] | None = None):
+    scope = {
+        "type": "http",
+        "http_version": "1.1",
+        "scheme": "http",
+        "server": ("testserver", 80),
+        "method": method,
+        "path": path,
+        "query_string": query.encode(),
+        "headers": [(name.encode(), value.encode()) for name, value in headers or []],
+    }
+    messages: List[Dict[str, Any]] = []
+
+    async def receive() -> Dict[str, Any]:
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message: Dict[str, Any]) -> None:
+        messages.append(message)
+
+    await app(scope, receive, send)
+    start, *chunks = messages
+    response_headers = {name.decode().lower(): value.decode() for name, value in start["headers"]}
+    return start["status"], response_headers, b"".join(chunk.get("body", b"") for chunk in chunks)
+
+
+def request(app, *args: Any, **kwargs: Any):
+    """Ejecuta una petición en su propio bucle y libera las conexiones de ese bucle."""
+
+    async def run():
+        try:
+            return await _call(app, *args, **kwargs)
+        finally:
+            await app.engine.dispose()
+
+    return asyncio.run(run())
+
+
+def test_async_database_url_swaps_driver():
+    assert async_database_url("sqlite:///telcox.db").drivername == "sqlite+aiosqlite"
+    assert async_database_url("mysql+pymysql://u:p@db:3306/telcox").drivername == "mysql+aiomysql"
+
+
+def test_asgi_dashboard_matches_flask_payload(asgi_app):
+    status, headers, body = request(asgi_app, "GET", "/api/dashboard", "customer_id=0001")
+
+    assert status == 200
+    assert json.loads(body) == {
+        "perfil": {"cliente_id": "0001", "nombre": "Ana Pérez", "saldo": 15.5, "consumo_mb": 1024.0, "minutos": 120.0},
+        "consumo": {"cliente_id": "0001", "consumo_mb": 1024.0, "minutos": 120.0},
+    }
+    assert headers["etag"].startswith('"dashboard-')
+    assert headers["cache-control"] == "private, max-age=0"
+
+
+def test_asgi_returns_304_for_matching_etag(asgi_app):
+    _, headers, _ = request(asgi_app, "GET", "/api/cliente", "customer_id=0001")
+
+    status, _, body = request(
+        asgi_app, "GET", "/api/cliente", "customer_id=0001", headers=[("If-None-Match", headers["etag"])]
+    )
+
+    assert status == 304
+    assert body == b""
+
+
+def test_asgi_errors_keep_flask_contract(asgi_app):
+    status, _, body = request(asgi_app, "GET", "/api/consumo")
+    assert status == 400
+    assert json.loads(body) == {"mensaje": "El parámetro de consulta 'customer_id' es obligatorio"}
+
+    status, _, body = request(asgi_app, "GET", "/api/consumo", "customer_id=9999")
+    assert status == 404
+    assert json.loads(body) == {"mensaje": "No se encontró el cliente '9999'"}
+
+
+def test_asgi_batch_reports_missing_customers(asgi_app):
+    status, _, body = request(
+        asgi_app, "POST", "/api/clientes/batch", body=json.dumps({"customer_ids": ["0001", "9999"]}).encode()
+    )
+
+    assert status == 200
+    payload = json.loads(body)
+    assert [cliente["cliente_id"] for cliente in payload["clientes"]] == ["0001"]
+    assert payload["errores"] == [{"cliente_id": "9999", "mensaje": "No se encontró el cliente '9999'"}]
+
+
+def test_asgi_serves_concurrent_requests(asgi_app):
+    async def burst():
+        return await asyncio.gather(
+            *(_call(asgi_app, "GET", "/api/consumo", "customer_id=0001") for _ in range(50))
+        )
+
+    async def run():
+        try:
+            return await burst()
+        finally:
+            await asgi_app.engine.dispose()
+
+    responses = asyncio.run(run())
+
+    assert {status for status, _, _ in responses} == {200}
+
+
+def test_asgi_delegates_other_routes_to_flask(asgi_app):
+    status, _, body = request(asgi_app, "GET", "/api/consumo/historial", "customer_id=0001")
+    assert status == 200
+    assert [period["periodo_fin"] for period in json.loads(body)["periodos"]] == ["2024-05-31"]
+
+    status, _, _ = request(asgi_app, "GET", "/metrics")
+    assert status == 200
+
+    status, _, _ = request(asgi_app, "GET", "/api/desconocido")
+    assert status == 404
+
+
+def test_asgi_preflight_follows_flask_cors(asgi_app):
+    origin = [("Origin", "https://panel.example.com"), ("Access-Control-Request-Method", "GET")]
+
+    _, allowed, _ = request(asgi_app, "OPTIONS", "/api/consumo", headers=origin)
+    _, rejected, _ = request(
+        asgi_app, "OPTIONS", "/api/consumo", headers=[("Origin", "https://otro.example.com"), origin[1]]
+    )
+
+    assert allowed["access-control-allow-origin"] == "https://panel.example.com"
+    assert "access-control-allow-origin" not in rejected
+
+
+def test_asgi_native_routes_use_cors_settings(asgi_config, asgi_app):
+    status, headers, _ = request(
+        asgi_app, "GET", "/api/consumo", "customer_id=0001", headers=[("Origin", "https://panel.example.com")]
+    )
+    assert status == 200
+    assert headers["access-control-allow-origin"] == "https://panel.example.com"
+    assert headers["access-control-allow-credentials"] == "true"
+
+    _, headers, _ = request(
+        asgi_app, "GET", "/api/consumo", "customer_id=0001", headers=[("Origin", "https://otro.example.com")]
+    )
+    assert "access-control-allow-origin" not in headers
+
+    anonymous = create_asgi_app({**asgi_config, "CORS_SUPPORTS_CREDENTIALS": False})
+    _, headers, _ = request(
+        anonymous, "GET", "/api/consumo", "customer_id=0001", headers=[("Origin", "https://panel.example.com")]
+    )
+    assert headers["access-control-allow-origin"] == "https://panel.example.com"
+    assert "access-control-allow-credentials" not in headers
+
+
+def test_asgi_uses_fallback_when_primary_is_down(tmp_path):
+    app = create_asgi_app(
+        {
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": "mysql+pymysql://u:p@127.0.0.1:1/telcox",
+            "DEFAULT_SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'fallback.sqlite3'}",
+            "DB_FALLBACK_ENABLED": True,
+        }
+    )
+
+    assert app.engine.url.drivername == "sqlite+aiosqlite"
@@ -0,0 +1,188 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+"""Pruebas de la caché de servicios de clientes."""
+from __future__ import annotations
+
+from datetime import date
+from decimal import Decimal
+
+from backend.app_factory import create_app
+from backend.models import Billing, Consumption, Customer, db
+from backend.services import get_cache
+from backend.services.cache import MemoryCache, RedisCache, SQLiteCache
+from backend.services.customer_service import get_consumption_summary, get_customer_profile
+
+
+class FakeRedis:
+    """Sustituto local mínimo del protocolo Redis usado por ``RedisCache``."""
+
+    def __init__(self) -> None:
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value.encode()
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    def scan_iter(self, match):
+        return [key for key in self.data if key.startswith(match.rstrip("*"))]
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats() == {"entries": 2, "hits": 3, "misses": 1, "evictions": 1, "expirations": 0}
+
+
+def test_memory_cache_expires_entries_after_ttl():
+    clock = FakeClock()
+    cache = MemoryCache(ttl=10, clock=clock)
+    cache.set("a", 1)
+
+    clock.now = 9.9
+    assert cache.get("a") == 1
+    clock.now = 10.0
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_profile_is_served_from_cache(sample_customer, monkeypatch):
+    get_customer_profile(sample_customer)
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("no debería consultar la base de datos")
+
+    monkeypatch.setattr("backend.services.customer_service._fetch_customer_snapshot", _fail)
+    assert get_customer_profile(sample_customer)["saldo"] == 15.5
+    assert get_cache().stats()["hits"] == 1
+
+
+def test_orm_changes_invalidate_cached_entries(app, sample_customer):
+    assert get_consumption_summary(sample_customer)["consumo_mb"] == 1024.0
+    assert get_customer_profile(sample_customer)["saldo"] == 15.5
+
+    customer = db.session.query(Customer).filter_by(external_id=sample_customer).one()
+    db.session.add(
+        Consumption(
+            customer_id=customer.id,
+            period_start=date(2024, 6, 1),
+            period_end=date(2024, 6, 30),
+            data_used_mb=4096.0,
+            voice_minutes=10,
+        )
+    )
+    db.session.add(
+        Billing(customer_id=customer.id, billing_date=date(2024, 6, 15), amount=Decimal("4.50"))
+    )
+    db.session.commit()
+
+    assert get_consumption_summary(sample_customer)["consumo_mb"] == 4096.0
+    assert get_customer_profile(sample_customer)["saldo"] == 20.0
+
+
+def test_rollback_keeps_cached_entries(app, sample_customer):
+    get_customer_profile(sample_customer)
+
+    customer = db.session.query(Customer).filter_by(external_id=sample_customer).one()
+    customer.full_name = "Otra Persona"
+    db.session.flush()
+    db.session.rollback()
+
+    assert get_cache().get(f"perfil:{sample_customer}")["value"]["nombre"] == "Ana Pérez"
+
+
+def test_cache_can_be_disabled_from_config():
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://", "CUSTOMER_CACHE_ENABLED": False})
+
+    with app.app_context():
+        assert get_cache() is None
+
+
+def test_sqlite_cache_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    writer = SQLiteCache(path)
+    reader = SQLiteCache(path)
+
+    writer.set("perfil:0001", {"cliente_id": "0001", "saldo": 15.5})
+    assert reader.get("perfil:0001") == {"cliente_id": "0001", "saldo": 15.5}
+
+    reader.delete_many(["perfil:0001"])
+    assert writer.get("perfil:0001") is None
+
+
+def test_sqlite_cache_evicts_oldest_entries(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"), max_entries=2)
+    for key in ("a", "b", "c"):
+        cache.set(key, key)
+
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["evictions"] == 1
+
+
+def test_sqlite_cache_trims_every_interval_writes(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"), max_entries=2, trim_interval=3)
+    for key in ("a", "b", "c", "d"):
+        cache.set(key, key)
+    assert cache.stats()["entries"] == 3
+    assert cache.stats()["evictions"] == 1
+
+    cache.set("e", "e")
+    cache.set("f", "f")
+    assert cache.stats()["entries"] == 2
+    assert cache.get("f") == "f"
+
+
+def test_redis_cache_prefixes_and_clears_keys():
+    client = FakeRedis()
+    client.data["otra:app"] = b"1"
+    cache = RedisCache(client=client, prefix="telcox:")
+
+    cache.set("perfil:0001", {"saldo": 1.0})
+    assert client.data["telcox:perfil:0001"] == b'{"saldo": 1.0}'
+    assert cache.get("perfil:0001") == {"saldo": 1.0}
+
+    cache.clear()
+    assert list(client.data) == ["otra:app"]
+
+
+def test_shared_backend_is_selected_from_config(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    config = {
+        "SQLALCHEMY_DATABASE_URI": "sqlite://",
+        "CUSTOMER_CACHE_BACKEND": "sqlite",
+        "CUSTOMER_CACHE_PATH": path,
+    }
+    first = create_app(config)
+    second = create_app(config)
+
+    with first.app_context():
+        db.create_all()
+        db.session.add(Customer(external_id="0001", full_name="Ana Pérez"))
+        db.session.commit()
+        assert isinstance(get_cache(), SQLiteCache)
+        get_customer_profile("0001")
+
+    with second.app_context():
+        assert get_customer_profile("0001")["nombre"] == "Ana Pérez"
+        assert get_cache().stats()["hits"] == 1
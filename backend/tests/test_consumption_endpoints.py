@@ -3,10 +3,15 @@
 """Pruebas de integración ligera para los endpoints de consumo."""
 from __future__ import annotations
 
+import json
+from datetime import date
 from typing import Any, Dict
 
 import pytest
 
+from backend.models import Billing, Consumption, Customer, db
+from backend.services.summary_service import refresh_customer_summaries
+
 
 @pytest.mark.usefixtures("sample_customer")
 def test_get_consumption_returns_data(client):
@@ -52,3 +57,207 @@ def test_get_customer_profile_returns_not_found_when_customer_missing(client):
 
     assert response.status_code == 404
     assert "No se encontró" in response.get_json()["mensaje"]
+
+
+@pytest.mark.usefixtures("sample_customer")
+def test_batch_profiles_returns_results_and_errors(client):
+    response = client.post(
+        "/api/clientes/batch", json={"customer_ids": ["0001", "9999", "0001"]}
+    )
+
+    assert response.status_code == 200
+    payload = response.get_json()
+    assert payload["clientes"] == [
+        {
+            "cliente_id": "0001",
+            "nombre": "Ana Pérez",
+            "saldo": 15.5,
+            "consumo_mb": 1024.0,
+            "minutos": 120.0,
+        }
+    ]
+    assert [error["cliente_id"] for error in payload["errores"]] == ["9999"]
+    assert "No se encontró" in payload["errores"][0]["mensaje"]
+
+
+@pytest.mark.parametrize(
+    "body",
+    [None, {}, {"customer_ids": []}, {"customer_ids": "0001"}, {"customer_ids": [1]}],
+)
+def test_batch_profiles_rejects_invalid_body(client, body):
+    response = client.post("/api/clientes/batch", json=body)
+
+    assert response.status_code == 400
+    assert "customer_ids" in response.get_json()["mensaje"]
+
+
+@pytest.mark.usefixtures("sample_customer")
+def test_customer_profile_answers_conditional_requests(client):
+    first = client.get("/api/cliente", query_string={"customer_id": "0001"})
+    etag = first.headers["ETag"]
+
+    assert first.status_code == 200
+    assert first.headers["Last-Modified"]
+    assert first.headers["Cache-Control"] == "private, no-cache"
+
+    second = client.get(
+        "/api/cliente", query_string={"customer_id": "0001"}, headers={"If-None-Match": etag}
+    )
+    assert second.status_code == 304
+    assert second.data == b""
+    assert second.headers["ETag"] == etag
+
+
+@pytest.mark.usefixtures("sample_customer")
+def test_consumption_and_profile_have_distinct_etags(client):
+    profile = client.get("/api/cliente", query_string={"customer_id": "0001"})
+    consumption = client.get("/api/consumo", query_string={"customer_id": "0001"})
+
+    assert profile.headers["ETag"] != consumption.headers["ETag"]
+
+
+def test_etag_changes_when_billing_is_bulk_inserted(app, client, sample_customer):
+    first = client.get("/api/cliente", query_string={"customer_id": "0001"})
+
+    customer = db.session.query(Customer).filter_by(external_id="0001").one()
+    db.session.execute(
+        Billing.__table__.insert(),
+        [{"customer_id": customer.id, "billing_date": date(2024, 6, 15), "amount": 4.5, "paid": False}],
+    )
+    refresh_customer_summaries(db.session.connection(), [customer.id])
+    db.session.commit()
+
+    second = client.get(
+        "/api/cliente",
+        query_string={"customer_id": "0001"},
+        headers={"If-None-Match": first.headers["ETag"]},
+    )
+    assert second.status_code == 200
+    assert second.headers["ETag"] != first.headers["ETag"]
+    assert second.get_json()["saldo"] == 20.0
+
+
+def test_cache_control_is_configurable(app, client, sample_customer):
+    app.config["API_CACHE_CONTROL"] = "private, max-age=30"
+
+    response = client.get("/api/consumo", query_string={"customer_id": "0001"})
+
+    assert response.headers["Cache-Control"] == "private, max-age=30"
+
+
+@pytest.mark.usefixtures("sample_customer")
+def test_dashboard_returns_profile_and_consumption(client):
+    response = client.get("/api/dashboard", query_string={"customer_id": "0001"})
+
+    assert response.status_code == 200
+    assert response.get_json() == {
+        "perfil": {
+            "cliente_id": "0001",
+            "nombre": "Ana Pérez",
+            "saldo": 15.5,
+            "consumo_mb": 1024.0,
+            "minutos": 120.0,
+        },
+        "consumo": {"cliente_id": "0001", "consumo_mb": 1024.0, "minutos": 120.0},
+    }
+    assert response.headers["ETag"]
+
+
+def test_dashboard_uses_one_query_for_200_and_304(app, client, sample_customer, count_queries):
+    with count_queries() as statements:
+        first = client.get("/api/dashboard", query_string={"customer_id": "0001"})
+        queries_for_200 = len(statements)
+        second = client.get(
+            "/api/dashboard", query_string={"customer_id": "0001"}, headers={"If-None-Match": first.headers["ETag"]}
+        )
+
+    assert first.status_code == 200
+    assert second.status_code == 304
+    assert queries_for_200 == 1
+    assert len(statements) == 2
+
+
+@pytest.mark.usefixtures("sample_customer")
+def test_dashboard_returns_not_found_when_customer_missing(client):
+    response = client.get("/api/dashboard", query_string={"customer_id": "9999"})
+
+    assert response.status_code == 404
+
+
+@pytest.fixture
+def customer_with_history(app, sample_customer):
+    """Añade once periodos anteriores al consumo de mayo de 2024 del cliente de ejemplo."""
+    customer_id = db.session.execute(db.select(Customer.id).where(Customer.external_id == "0001")).scalar_one()
+    db.session.execute(
+        Consumption.__table__.insert(),
+        [
+            {
+                "customer_id": customer_id,
+                "period_start": date(2023, month, 1),
+                "period_end": date(2023, month, 28),
+                "data_used_mb": float(month),
+                "voice_minutes": float(month * 10),
+            }
+            for month in range(2, 13)
+        ],
+    )
+    db.session.commit()
+    return sample_customer
+
+
+@pytest.mark.usefixtures("customer_with_history")
+def test_history_pages_with_cursor(client):
+    seen = []
+    cursor = None
+    while True:
+        query = {"customer_id": "0001", "limite": 5}
+        if cursor:
+            query["cursor"] = cursor
+        response = client.get("/api/consumo/historial", query_string=query)
+        assert response.status_code == 200
+        payload = response.get_json()
+        assert len(payload["periodos"]) <= 5
+        seen.extend(period["periodo_fin"] for period in payload["periodos"])
+        cursor = payload["siguiente"]
+        if cursor is None:
+            break
+
+    assert len(seen) == 12
+    assert seen == sorted(seen, reverse=True)
+    assert seen[0] == "2024-05-31"
+
+
+@pytest.mark.usefixtures("customer_with_history")
+def test_history_streams_ndjson(client):
+    response = client.get(
+        "/api/consumo/historial", query_string={"customer_id": "0001"}, headers={"Accept": "application/x-ndjson"}
+    )
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert len(lines) == 12
+    assert lines[0] == {
+        "periodo_inicio": "2024-05-01",
+        "periodo_fin": "2024-05-31",
+        "consumo_mb": 1024.0,
+        "minutos": 120.0,
+    }
+
+
+@pytest.mark.usefixtures("sample_customer")
+@pytest.mark.parametrize(
+    "query, status",
+    [
+        ({"customer_id": "9999"}, 404),
+        ({"customer_id": "9999", "formato": "ndjson"}, 404),
+        ({"customer_id": "0001", "cursor": "no-es-un-cursor"}, 400),
+        ({"customer_id": "0001", "limite": "0"}, 400),
+        ({}, 400),
+    ],
+)
+def test_history_rejects_invalid_requests(client, query, status):
+    response = client.get("/api/consumo/historial", query_string=query)
+
+    assert response.status_code == status
+    assert "mensaje" in response.get_json()
@@ -13,6 +13,10 @@ from backend.services.customer_service import (
     CustomerServiceError,
     get_consumption_summary,
     get_customer_profile,
+    get_customer_profiles,
+    get_customer_validators,
+    get_dashboard_data,
+    get_dashboard_view,
 )
 
 
@@ -54,6 +58,61 @@ def test_get_customer_profile_includes_balance(sample_customer):
     assert profile["minutos"] == 120.0
 
 
+def test_get_customer_profile_uses_single_statement(app, sample_customer, count_queries):
+    with count_queries() as statements:
+        get_customer_profile(sample_customer)
+        get_consumption_summary(sample_customer)
+
+    assert len(statements) == 2
+
+
+def test_get_dashboard_data_uses_single_statement(app, sample_customer, count_queries):
+    with count_queries() as statements:
+        dashboard = get_dashboard_data(sample_customer)
+
+    assert len(statements) == 1
+    assert dashboard["perfil"]["saldo"] == 15.5
+    assert dashboard["consumo"] == {"cliente_id": "0001", "consumo_mb": 1024.0, "minutos": 120.0}
+
+
+def test_dashboard_view_matches_validators_and_data(app, sample_customer):
+    view = get_dashboard_view(sample_customer)
+
+    assert view.validators == get_customer_validators(sample_customer)
+    assert view.data == get_dashboard_data(sample_customer)
+
+
+@pytest.mark.usefixtures("app")
+def test_get_customer_profile_without_consumption_or_billing(app):
+    with app.app_context():
+        db.session.add(Customer(external_id="0002", full_name="Luis Gómez"))
+        db.session.commit()
+
+        profile = get_customer_profile("0002")
+        assert profile == {
+            "cliente_id": "0002",
+            "nombre": "Luis Gómez",
+            "saldo": 0.0,
+            "consumo_mb": 0.0,
+            "minutos": 0.0,
+        }
+
+
+@pytest.mark.usefixtures("app")
+def test_get_customer_profiles_queries_once_per_chunk(app, count_queries):
+    with app.app_context():
+        db.session.add_all(
+            [Customer(external_id=f"{index:04d}", full_name=f"Cliente {index}") for index in range(5)]
+        )
+        db.session.commit()
+
+        with count_queries() as statements:
+            profiles = get_customer_profiles(["0000", "0001", "0002", "0003", "0004", "9999"], chunk_size=2)
+
+        assert sorted(profiles) == ["0000", "0001", "0002", "0003", "0004"]
+        assert len(statements) == 3
+
+
 @pytest.mark.usefixtures("app")
 def test_service_raises_when_customer_missing(app):
     with app.app_context():
@@ -64,7 +123,7 @@ def test_service_raises_when_customer_missing(app):
 @pytest.mark.usefixtures("app")
 def test_service_raises_service_error_on_db_failure(monkeypatch, app):
     with app.app_context():
-        monkeypatch.setattr("backend.services.customer_service._get_customer_by_external_id", _boom)
+        monkeypatch.setattr("backend.services.customer_service._fetch_customer_snapshot", _boom)
         with pytest.raises(CustomerServiceError):
             get_consumption_summary("0001")
 
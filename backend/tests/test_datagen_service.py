@@ -0,0 +1,107 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+"""Pruebas del generador sintético de clientes, consumos y facturas."""
+from __future__ import annotations
+
+import csv
+from datetime import date
+
+from flask import Flask
+from sqlalchemy import func, select, update
+
+from backend import datagen
+from backend.app_factory import create_app
+from backend.models import Billing, Consumption, Customer, CustomerSummary, db
+from backend.services.datagen_service import (
+    GeneratorSpec,
+    generate_customer,
+    generate_dataset,
+    generate_range,
+    next_customer_id,
+)
+
+
+SPEC = GeneratorSpec(customers=40, months=12, last_month=date(2024, 6, 1), seed=7)
+
+
+def test_generated_rows_do_not_depend_on_chunking():
+    whole = generate_range(SPEC, 1, 41)
+    chunks = [generate_range(SPEC, first, min(first + 7, 41)) for first in range(1, 41, 7)]
+
+    for table, rows in enumerate(whole):
+        assert rows == [row for chunk in chunks for row in chunk[table]]
+    assert generate_customer(SPEC, 5) == generate_customer(SPEC, 5)
+    assert generate_customer(SPEC, 5) != generate_customer(GeneratorSpec(customers=40, seed=8), 5)
+
+
+def test_generated_history_is_consistent():
+    _, consumptions, billings = generate_range(SPEC, 1, 41)
+
+    assert len(consumptions) == len(billings)
+    assert {row[1] for row in consumptions} <= {date(2023, month, 1) for month in range(7, 13)} | {
+        date(2024, month, 1) for month in range(1, 7)
+    }
+    assert all(row[2] > 0 for row in billings)
+    assert any(not row[5] for row in billings)
+
+
+def test_generate_dataset_inserts_and_rebuilds_summaries(app):
+    with app.app_context():
+        with db.engine.connect() as connection:
+            assert next_customer_id(connection) == 1
+            stats = generate_dataset(SPEC, connection=connection, chunk_size=15)
+            assert next_customer_id(connection) == 41
+
+        assert stats.customers == db.session.scalar(select(func.count()).select_from(Customer)) == 40
+        assert stats.consumptions == db.session.scalar(select(func.count()).select_from(Consumption))
+        assert stats.billings == db.session.scalar(select(func.count()).select_from(Billing))
+        assert db.session.scalar(select(func.count()).select_from(CustomerSummary)) == 40
+
+
+def test_generate_dataset_only_rebuilds_summaries_of_generated_customers(app, sample_customer):
+    customer_id = db.session.scalar(select(Customer.id).where(Customer.external_id == sample_customer))
+    db.session.execute(update(CustomerSummary).values(data_used_mb=-1.0))
+    db.session.commit()
+
+    with db.engine.connect() as connection:
+        spec = GeneratorSpec(customers=10, months=3, last_month=date(2024, 6, 1), first_id=next_customer_id(connection))
+        generate_dataset(spec, connection=connection, chunk_size=4)
+
+    assert db.session.scalar(select(CustomerSummary.data_used_mb).where(CustomerSummary.customer_id == customer_id)) == -1.0
+    assert db.session.scalar(select(func.count()).select_from(CustomerSummary)) == 11
+
+
+def test_datagen_cli_resolves_relative_sqlite_uri(tmp_path, monkeypatch):
+    instance_path = tmp_path / "instance"
+    monkeypatch.setattr(Flask, "auto_find_instance_path", lambda self: str(instance_path))
+    monkeypatch.setenv("SQLALCHEMY_DATABASE_URI", "sqlite:///relative.sqlite3")
+    monkeypatch.chdir(tmp_path)
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+
+    assert datagen.main(["--customers", "10", "--months", "3", "--workers", "2", "--chunk-size", "4"]) == 0
+
+    with app.app_context():
+        assert db.session.scalar(select(func.count()).select_from(CustomerSummary)) == 10
+    assert not (tmp_path / "relative.sqlite3").exists()
+
+
+def test_generate_dataset_writes_csv_and_load_script(tmp_path):
+    stats = generate_dataset(SPEC, directory=tmp_path, chunk_size=25)
+
+    assert sorted(path.name for path in tmp_path.glob("*.csv")) == [
+        "billings-0000000001.csv",
+        "billings-0000000026.csv",
+        "consumptions-0000000001.csv",
+        "consumptions-0000000026.csv",
+        "customers-0000000001.csv",
+        "customers-0000000026.csv",
+    ]
+    with (tmp_path / "billings-0000000001.csv").open(newline="", encoding="utf-8") as handle:
+        assert {row[5] for row in csv.reader(handle)} <= {"0", "1"}
+
+    script = (tmp_path / "load_data.sql").read_text(encoding="utf-8")
+    assert script.index("INTO TABLE customers") < script.index("INTO TABLE consumptions")
+    assert script.count("LOAD DATA LOCAL INFILE") == 6
+    assert stats.files[-1] == tmp_path / "load_data.sql"
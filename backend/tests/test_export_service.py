@@ -0,0 +1,107 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+"""Pruebas de la exportación columnar de consumos y facturas."""
+from __future__ import annotations
+
+import importlib.util
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from backend.models import Consumption, Customer, db
+from backend.services.export_service import ExportError, columns_by_partition, export_table
+
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+
+@pytest.fixture
+def months(sample_customer):
+    customer = db.session.query(Customer).filter_by(external_id=sample_customer).one()
+    db.session.add_all(
+        Consumption(
+            customer_id=customer.id,
+            period_start=date(2024, month, 1),
+            period_end=date(2024, month, 28),
+            data_used_mb=float(month),
+            voice_minutes=month,
+        )
+        for month in (6, 7, 8)
+    )
+    db.session.commit()
+
+
+def test_columns_are_grouped_by_partition_month():
+    rows = [
+        (1, "0001", date(2024, 5, 1), 10.0),
+        (2, "0002", date(2024, 6, 3), 20.0),
+        (3, "0003", date(2024, 5, 20), 30.0),
+    ]
+
+    partitions = columns_by_partition(rows, ["id", "external_id", "period_start", "data_used_mb"], "period_start")
+
+    assert list(partitions) == ["mes=2024-05", "mes=2024-06"]
+    assert partitions["mes=2024-05"]["id"] == [1, 3]
+    assert partitions["mes=2024-06"]["data_used_mb"] == [20.0]
+
+
+def test_export_validates_arguments(app, tmp_path):
+    with db.engine.connect() as connection:
+        with pytest.raises(ExportError):
+            export_table(connection, "customers", tmp_path)
+        with pytest.raises(ExportError):
+            export_table(connection, "billing", tmp_path, file_format="csv")
+
+
+@pytest.mark.skipif(HAS_PYARROW, reason="pyarrow está instalado")
+def test_export_requires_pyarrow(app, tmp_path):
+    with db.engine.connect() as connection, pytest.raises(ExportError, match="pyarrow"):
+        export_table(connection, "consumption", tmp_path)
+
+
+def test_parquet_export_is_partitioned_by_month(app, months, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    with db.engine.connect() as connection:
+        stats = export_table(connection, "consumption", tmp_path, batch_size=2, max_open_files=1)
+
+    assert stats.rows == 4
+    assert stats.bytes_written > 0
+    table = pq.read_table(tmp_path / "consumption")
+    assert table.num_rows == 4
+    assert sorted(p.name for p in (tmp_path / "consumption").iterdir()) == [
+        "mes=2024-05",
+        "mes=2024-06",
+        "mes=2024-07",
+        "mes=2024-08",
+    ]
+
+
+def test_repeated_export_replaces_previous_partitions(app, months, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    stale = tmp_path / "consumption" / "mes=2023-01"
+    stale.mkdir(parents=True)
+    (stale / "part-00000.parquet").write_bytes(b"")
+
+    with db.engine.connect() as connection:
+        export_table(connection, "consumption", tmp_path, batch_size=2, max_open_files=1)
+        stats = export_table(connection, "consumption", tmp_path, start=date(2024, 6, 1), end=date(2024, 8, 31))
+        stats = export_table(connection, "consumption", tmp_path, start=date(2024, 6, 1), end=date(2024, 8, 31))
+
+    assert stats.rows == 3
+    assert all(path.exists() for path in stats.files)
+    assert pq.read_table(tmp_path / "consumption").num_rows == 4
+    assert sorted(path.name for path in (tmp_path / "consumption" / "mes=2024-06").iterdir()) == ["part-00000.parquet"]
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["consumption"]
+    assert not stale.exists()
+
+
+def test_arrow_export_keeps_decimal_amounts(app, sample_customer, tmp_path):
+    ipc = pytest.importorskip("pyarrow.ipc")
+
+    with db.engine.connect() as connection:
+        stats = export_table(connection, "billing", tmp_path, file_format="arrow")
+
+    table = ipc.open_file(str(stats.files[0])).read_all()
+    assert table.column("amount").to_pylist() == [Decimal("15.50")]
+    assert table.column("external_id").to_pylist() == [sample_customer]
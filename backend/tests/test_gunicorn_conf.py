@@ -0,0 +1,46 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+"""Pruebas de la configuración de gunicorn y del punto de entrada WSGI."""
+from __future__ import annotations
+
+import importlib
+import logging
+import sys
+import types
+
+from backend import gunicorn_conf
+from backend.models import db
+
+
+def test_default_workers_follows_cpu_count():
+    assert gunicorn_conf.default_workers(1) == 3
+    assert gunicorn_conf.default_workers(4) == 9
+    assert gunicorn_conf.default_workers(0) == 3
+
+
+def test_settings_can_be_overridden_from_environment(monkeypatch):
+    monkeypatch.setenv("WEB_CONCURRENCY", "5")
+    monkeypatch.setenv("GUNICORN_PRELOAD", "false")
+    monkeypatch.setenv("GUNICORN_ACCESS_LOG", "")
+    try:
+        config = importlib.reload(gunicorn_conf)
+        assert config.workers == 5
+        assert config.preload_app is False
+        assert config.accesslog is None
+    finally:
+        monkeypatch.undo()
+        importlib.reload(gunicorn_conf)
+
+    assert gunicorn_conf.preload_app is True
+
+
+def test_post_fork_replaces_inherited_pool(app, monkeypatch):
+    from backend.wsgi import dispose_engines
+
+    monkeypatch.setitem(sys.modules, "backend.wsgi", types.SimpleNamespace(app=app, dispose_engines=dispose_engines))
+    inherited_pool = db.engine.pool
+    server = types.SimpleNamespace(log=logging.getLogger("gunicorn.test"))
+
+    gunicorn_conf.post_fork(server, types.SimpleNamespace(pid=1234))
+
+    assert db.engine.pool is not inherited_pool
@@ -0,0 +1,209 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+"""Pruebas de la carga masiva de consumos y facturas."""
+from __future__ import annotations
+
+import json
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from flask import Flask
+
+from backend import ingest
+from backend.app_factory import create_app
+from backend.models import Billing, Consumption, ConsumptionRollup, Customer, CustomerSummary, db
+from backend.services import ingestion_service
+from backend.services.aggregation_service import get_usage_aggregates, refresh_rollups
+from backend.services.customer_service import get_customer_profile
+from backend.services.ingestion_service import (
+    IngestionError,
+    ingest_file,
+    ingest_file_parallel,
+    read_byte_range,
+    read_header,
+    split_byte_ranges,
+)
+
+CONSUMPTION_HEADER = "external_id,period_start,period_end,data_used_mb,voice_minutes\n"
+
+
+def _consumption_csv(path, months, data_used_mb=1.0):
+    lines = [
+        f"{external_id},2023-{month:02d}-01,2023-{month:02d}-28,{data_used_mb * month},{month}\n"
+        for month in range(1, months + 1)
+        for external_id in ("0001", "0002")
+    ]
+    path.write_text(CONSUMPTION_HEADER + "".join(lines), encoding="utf-8")
+
+
+def test_ingest_csv_consumptions_in_batches(app, sample_customer, tmp_path):
+    path = tmp_path / "usage.csv"
+    path.write_text(
+        "external_id,period_start,period_end,data_used_mb,voice_minutes\n"
+        "0001,2024-06-01,2024-06-30,2048,90\n"
+        "0001,2024-07-01,2024-07-31,4096,30\n"
+        "9999,2024-07-01,2024-07-31,1,1\n"
+        "0001,2024-08-31,2024-08-01,1,1\n"
+        "0001,2024-08-01,2024-08-31,-5,1\n"
+        "0001,2024-08-01,2024-08-31,1,1\n",
+        encoding="utf-8",
+    )
+    commits = []
+
+    with db.engine.connect() as connection:
+        stats = ingest_file(connection, path, "consumption", batch_size=1, batches_per_transaction=2, on_commit=commits.append)
+
+    assert (stats.read, stats.inserted, stats.rejected) == (6, 3, 3)
+    assert len(commits) == 2
+    assert db.session.query(Consumption).count() == 4
+    assert get_customer_profile(sample_customer)["consumo_mb"] == 1.0
+
+
+def test_ingest_invalidates_rollups_of_loaded_periods(app, sample_customer, tmp_path):
+    with db.engine.begin() as connection:
+        refresh_rollups(connection, "mes", [date(2024, 5, 1), date(2024, 6, 1)])
+    path = tmp_path / "usage.csv"
+    path.write_text(CONSUMPTION_HEADER + "0001,2024-06-01,2024-06-30,2048,90\n", encoding="utf-8")
+
+    with db.engine.connect() as connection:
+        ingest_file(connection, path, "consumption")
+
+    assert db.session.query(ConsumptionRollup.bucket).all() == [(date(2024, 5, 1),)]
+    june = get_usage_aggregates("mes", date(2024, 6, 1), date(2024, 6, 30))
+    assert [bucket.data_used_mb for bucket in june] == [2048.0]
+
+
+def test_ingest_json_lines_billings(app, sample_customer, tmp_path):
+    path = tmp_path / "billings.jsonl"
+    lines = [
+        {"external_id": "0001", "billing_date": "2024-06-15", "amount": "4.50", "paid": False},
+        {"external_id": "0001", "billing_date": "2024-07-15", "amount": 10, "paid": "true", "due_date": "2024-08-05"},
+        {"external_id": "0001", "billing_date": "2024-07-15", "amount": "1.234"},
+    ]
+    path.write_text("\n".join(json.dumps(line) for line in lines) + "\n{no es json\n", encoding="utf-8")
+
+    with db.engine.connect() as connection:
+        stats = ingest_file(connection, path, "billing")
+
+    assert (stats.inserted, stats.rejected) == (2, 2)
+    assert db.session.query(Billing).count() == 3
+    summary = db.session.query(CustomerSummary).one()
+    assert summary.outstanding_balance == Decimal("20.00")
+
+
+def test_ingest_rejects_unknown_kind(app, tmp_path):
+    with db.engine.connect() as connection, pytest.raises(IngestionError):
+        ingest_file(connection, tmp_path / "x.csv", "desconocido")
+
+
+def test_upsert_makes_consumption_ingestion_idempotent(app, sample_customer, tmp_path):
+    path = tmp_path / "usage.csv"
+    path.write_text(CONSUMPTION_HEADER + "0001,2024-05-01,2024-05-31,2000,10\n", encoding="utf-8")
+
+    with db.engine.connect() as connection:
+        ingest_file(connection, path, "consumption")
+        ingest_file(connection, path, "consumption")
+
+    consumption = db.session.query(Consumption).one()
+    assert consumption.data_used_mb == 2000.0
+
+
+def test_byte_ranges_cover_every_line_once(tmp_path):
+    path = tmp_path / "usage.csv"
+    _consumption_csv(path, months=12)
+    fieldnames, data_start = read_header(path)
+
+    ranges = split_byte_ranges(path, data_start, parts=5)
+    records = [record for start, end in ranges for _, record in read_byte_range(path, start, end, fieldnames)]
+
+    assert ranges[0][0] == data_start
+    assert all(previous[1] == current[0] for previous, current in zip(ranges, ranges[1:]))
+    assert len(records) == 24
+    assert records[0] == {
+        "external_id": "0001",
+        "period_start": "2023-01-01",
+        "period_end": "2023-01-28",
+        "data_used_mb": "1.0",
+        "voice_minutes": "1",
+    }
+
+
+def test_parallel_ingestion_can_be_retried_without_duplicates(tmp_path):
+    uri = f"sqlite:///{tmp_path / 'telcox.db'}"
+    app = create_app({"SQLALCHEMY_DATABASE_URI": uri})
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([Customer(external_id="0001", full_name="Ana"), Customer(external_id="0002", full_name="Luis")])
+        db.session.commit()
+
+        path = tmp_path / "usage.csv"
+        _consumption_csv(path, months=12)
+        stats, failed = ingest_file_parallel(uri, path, "consumption", workers=2, batch_size=3)
+        assert (stats.inserted, failed) == (24, [])
+
+        _consumption_csv(path, months=12, data_used_mb=2.0)
+        ingest_file_parallel(uri, path, "consumption", workers=2, batch_size=3)
+
+        assert db.session.query(Consumption).count() == 24
+        summary = db.session.query(CustomerSummary).filter_by(customer_id=1).one()
+        assert summary.data_used_mb == 24.0
+
+
+@pytest.mark.parametrize("retries, failures", [(1, 0), (0, 1)])
+def test_parallel_ingestion_retries_failed_ranges(tmp_path, monkeypatch, retries, failures):
+    uri = f"sqlite:///{tmp_path / 'telcox.db'}"
+    app = create_app({"SQLALCHEMY_DATABASE_URI": uri})
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([Customer(external_id="0001", full_name="Ana"), Customer(external_id="0002", full_name="Luis")])
+        db.session.commit()
+        path = tmp_path / "usage.csv"
+        _consumption_csv(path, months=12)
+
+        # Los procesos del pool se crean por fork y heredan el parche: el
+        # primer rango que termina de escribir falla una sola vez, ya confirmado.
+        marker = tmp_path / "fallo-simulado"
+        original = ingestion_service.write_batches
+
+        def write_then_fail_once(*args, **kwargs):
+            original(*args, **kwargs)
+            try:
+                marker.touch(exist_ok=False)
+            except FileExistsError:
+                return
+            raise RuntimeError("fallo simulado")
+
+        monkeypatch.setattr(ingestion_service, "write_batches", write_then_fail_once)
+        _, failed = ingest_file_parallel(uri, path, "consumption", workers=2, batch_size=3, retries=retries)
+
+        assert marker.exists()
+        assert len(failed) == failures
+        assert all("fallo simulado" in result.error for result in failed)
+        assert db.session.query(Consumption).count() == 24
+
+
+def test_parallel_ingestion_requires_natural_key(tmp_path):
+    with pytest.raises(IngestionError):
+        ingest_file_parallel("sqlite://", tmp_path / "billings.csv", "billing", workers=2)
+
+
+def test_parallel_ingest_cli_resolves_relative_sqlite_uri(tmp_path, monkeypatch):
+    instance_path = tmp_path / "instance"
+    monkeypatch.setattr(Flask, "auto_find_instance_path", lambda self: str(instance_path))
+    monkeypatch.setenv("SQLALCHEMY_DATABASE_URI", "sqlite:///relative.sqlite3")
+    monkeypatch.chdir(tmp_path)
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([Customer(external_id="0001", full_name="Ana"), Customer(external_id="0002", full_name="Luis")])
+        db.session.commit()
+    path = tmp_path / "usage.csv"
+    _consumption_csv(path, months=6)
+
+    assert ingest.main(["consumption", str(path), "--workers", "2", "--batch-size", "3"]) == 0
+
+    with app.app_context():
+        assert db.session.query(Consumption).count() == 12
+    assert (instance_path / "relative.sqlite3").exists()
+    assert not (tmp_path / "relative.sqlite3").exists()
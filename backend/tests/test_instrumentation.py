@@ -0,0 +1,71 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+"""Pruebas de la instrumentación por petición y del endpoint ``/metrics``."""
+from __future__ import annotations
+
+import re
+
+from backend.app_factory import create_app
+from backend.metrics import HistogramVec
+from backend.models import db
+
+
+def test_histogram_vec_renders_prometheus_series():
+    histogram = HistogramVec("demo_seconds", "Demostración.", ("endpoint",), buckets=(0.1, 1.0))
+    histogram.labels('/api/"x"').observe(0.5)
+
+    lines = histogram.render()
+
+    assert lines[:2] == ["# HELP demo_seconds Demostración.", "# TYPE demo_seconds histogram"]
+    assert 'demo_seconds_bucket{endpoint="/api/\\"x\\"",le="0.1"} 0' in lines
+    assert 'demo_seconds_bucket{endpoint="/api/\\"x\\"",le="+Inf"} 1' in lines
+    assert 'demo_seconds_count{endpoint="/api/\\"x\\""} 1' in lines
+
+
+def test_responses_carry_server_timing(client, sample_customer):
+    response = client.get("/api/cliente?customer_id=0001")
+
+    timing = response.headers["Server-Timing"]
+    match = re.match(r'db;dur=[\d.]+;desc="(\d+) consultas", app;dur=[\d.]+', timing)
+    assert match is not None
+    assert int(match.group(1)) >= 1
+
+
+def test_metrics_endpoint_exposes_request_histograms(client, sample_customer):
+    client.get("/api/cliente?customer_id=0001")
+    client.get("/api/cliente?customer_id=9999")
+
+    response = client.get("/metrics")
+    body = response.get_data(as_text=True)
+
+    assert response.content_type.startswith("text/plain; version=0.0.4")
+    assert "# TYPE telcox_http_request_duration_seconds histogram" in body
+    assert 'telcox_http_request_duration_seconds_count{endpoint="/api/cliente",method="GET",status="200"} 1' in body
+    assert 'telcox_http_request_duration_seconds_count{endpoint="/api/cliente",method="GET",status="404"} 1' in body
+    assert 'telcox_http_request_db_queries_bucket{endpoint="/api/cliente",le="+Inf"} 2' in body
+
+
+def test_query_budget_warns_about_n_plus_one(caplog):
+    app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": "sqlite://", "REQUEST_QUERY_BUDGET": 0})
+    with app.app_context():
+        db.create_all()
+        app.logger.addHandler(caplog.handler)
+        try:
+            app.test_client().get("/api/cliente?customer_id=0001")
+        finally:
+            app.logger.removeHandler(caplog.handler)
+        db.session.remove()
+        db.drop_all()
+
+    assert "Posible N+1 en GET /api/cliente" in caplog.text
+
+
+def test_instrumentation_can_be_disabled():
+    app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": "sqlite://", "REQUEST_METRICS_ENABLED": False})
+    with app.app_context():
+        db.create_all()
+        response = app.test_client().get("/api/cliente?customer_id=0001")
+        db.session.remove()
+        db.drop_all()
+
+    assert "Server-Timing" not in response.headers
@@ -0,0 +1,66 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+"""Pruebas de los proveedores JSON de la aplicación."""
+from __future__ import annotations
+
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from backend import json_provider
+from backend.app_factory import create_app
+from backend.json_provider import OrjsonProvider, StdlibJSONProvider, dumps_bytes, json_provider_class
+
+PAYLOAD = {
+    "cliente_id": "0001",
+    "nombre": "Ana Pérez",
+    "saldo": Decimal("15.50"),
+    "periodo_inicio": date(2024, 5, 1),
+    "actualizado": datetime(2024, 5, 31, 12, 30, 15),
+}
+EXPECTED = {
+    "cliente_id": "0001",
+    "nombre": "Ana Pérez",
+    "saldo": 15.5,
+    "periodo_inicio": "2024-05-01",
+    "actualizado": "2024-05-31T12:30:15",
+}
+
+
+def _app(provider: str):
+    return create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": "sqlite://", "JSON_PROVIDER": provider})
+
+
+@pytest.mark.parametrize("provider", ["stdlib", "orjson"])
+def test_providers_serialize_model_types_alike(provider):
+    if provider == "orjson":
+        pytest.importorskip("orjson")
+    app = _app(provider)
+
+    with app.test_request_context():
+        response = app.json.response(PAYLOAD)
+        assert json.loads(app.json.dumps(PAYLOAD)) == EXPECTED
+
+    assert type(app.json) is json_provider_class(provider)
+    assert response.mimetype == "application/json"
+    assert "Ana Pérez" in response.get_data(as_text=True)
+    assert json.loads(response.get_data()) == EXPECTED
+    assert json.loads(dumps_bytes(PAYLOAD)) == EXPECTED
+
+
+def test_auto_prefers_orjson_when_installed():
+    expected = OrjsonProvider if json_provider.orjson is not None else StdlibJSONProvider
+
+    assert json_provider_class("auto") is expected
+    with pytest.raises(ValueError):
+        json_provider_class("ujson")
+
+
+def test_endpoints_use_the_configured_provider(sample_customer, client):
+    payload = client.get("/api/cliente?customer_id=0001").get_json()
+
+    assert payload["saldo"] == 15.5
+    assert payload["nombre"] == "Ana Pérez"
+
@@ -0,0 +1,29 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+"""Pruebas de las utilidades de la línea base de carga."""
+from __future__ import annotations
+
+from backend.benchmarks.loadtest import percentile, sample_external_ids
+from backend.models import Customer, db
+
+
+def test_percentile_uses_nearest_rank():
+    values = [float(value) for value in range(1, 101)]
+
+    assert percentile(values, 0.50) == 50.0
+    assert percentile(values, 0.95) == 95.0
+    assert percentile(values, 0.99) == 99.0
+    assert percentile([1.0, 2.0, 3.0, 4.0], 0.50) == 2.0
+    assert percentile([1.0, 2.0, 3.0, 4.0], 0.75) == 3.0
+    assert percentile([], 0.95) == 0.0
+
+
+def test_sample_external_ids_returns_existing_customers(app, sample_customer):
+    db.session.add_all(Customer(external_id=f"00{index}", full_name=f"Cliente {index}") for index in range(10, 13))
+    db.session.commit()
+
+    with db.engine.connect() as connection:
+        sample = sample_external_ids(connection, 10, seed=7)
+
+    assert len(sample) == 4
+    assert sorted(sample) == sorted(external_id for (external_id,) in db.session.query(Customer.external_id))
@@ -0,0 +1,82 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+"""Pruebas del plan de mantenimiento de particiones mensuales."""
+from __future__ import annotations
+
+from datetime import date
+
+import pytest
+
+from backend.models import db
+from backend.services.partition_service import (
+    Partition,
+    PartitionError,
+    add_partitions_statement,
+    blocking_rows_statement,
+    maintain_partitions,
+    partitioning_clause,
+    plan_maintenance,
+    plan_statements,
+)
+
+
+PARTITIONS = [
+    Partition("p202401", date(2024, 2, 1)),
+    Partition("p202402", date(2024, 3, 1)),
+    Partition("p202403", date(2024, 4, 1)),
+    Partition("pmax", None),
+]
+
+
+def test_partitioning_clause_covers_each_month_and_maxvalue():
+    clause = partitioning_clause("consumptions", date(2023, 12, 15), date(2024, 2, 1))
+
+    assert clause.startswith("PARTITION BY RANGE COLUMNS(period_end)")
+    assert "PARTITION p202312 VALUES LESS THAN ('2024-01-01')" in clause
+    assert "PARTITION p202402 VALUES LESS THAN ('2024-03-01')" in clause
+    assert clause.count("PARTITION p") == 4
+    assert clause.rstrip().endswith("PARTITION pmax VALUES LESS THAN (MAXVALUE)\n)")
+
+
+def test_plan_creates_missing_future_months():
+    plan = plan_maintenance("billings", PARTITIONS, today=date(2024, 4, 20), months_ahead=2)
+
+    assert plan.create == [date(2024, 4, 1), date(2024, 5, 1), date(2024, 6, 1)]
+    assert plan.expire == []
+    statement = add_partitions_statement(plan.table, plan.create)
+    assert statement.startswith("ALTER TABLE billings REORGANIZE PARTITION pmax INTO")
+    assert "PARTITION p202406 VALUES LESS THAN ('2024-07-01')" in statement
+
+
+def test_plan_expires_partitions_outside_retention():
+    plan = plan_maintenance("consumptions", PARTITIONS, today=date(2024, 5, 3), months_ahead=0, retention_months=3)
+
+    assert plan.create == [date(2024, 4, 1), date(2024, 5, 1)]
+    assert [partition.name for partition in plan.expire] == ["p202401"]
+
+
+def test_expired_partitions_are_dropped_without_exchange_tables():
+    plan = plan_maintenance("consumptions", PARTITIONS, today=date(2024, 3, 3), months_ahead=0, retention_months=1)
+
+    assert plan_statements(plan) == ["ALTER TABLE consumptions DROP PARTITION p202401"]
+    assert plan.retained == []
+
+
+def test_unpaid_billings_and_latest_consumptions_block_expiry():
+    partition = PARTITIONS[0]
+
+    assert blocking_rows_statement("billings", partition) == (
+        "SELECT 1 FROM billings PARTITION (p202401) WHERE paid = 0 LIMIT 1"
+    )
+    assert blocking_rows_statement("consumptions", partition) == (
+        "SELECT 1 FROM consumptions PARTITION (p202401) LIMIT 1"
+    )
+    assert "customer_summaries.latest_consumption_id = consumptions.id" in blocking_rows_statement(
+        "consumptions", partition, dry_run=True
+    )
+
+
+def test_maintenance_requires_mysql(app):
+    with db.engine.connect() as connection:
+        with pytest.raises(PartitionError):
+            maintain_partitions(connection)
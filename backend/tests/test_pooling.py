@@ -0,0 +1,58 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+"""Pruebas de la configuración e instrumentación del pool de conexiones."""
+from __future__ import annotations
+
+from sqlalchemy import text
+
+from backend.app_factory import create_app
+from backend.models import db
+from backend.pooling import InstrumentedQueuePool, pool_engine_options
+
+
+def test_pool_options_come_from_config_and_environment(monkeypatch):
+    monkeypatch.setenv("DB_POOL_RECYCLE", "280")
+    monkeypatch.setenv("DB_POOL_PRE_PING", "false")
+    app = create_app(
+        {
+            "SQLALCHEMY_DATABASE_URI": "mysql+pymysql://u:p@db.invalid/telcox",
+            "DB_FALLBACK_ENABLED": False,
+            "DB_POOL_SIZE": 4,
+            "DB_MAX_OVERFLOW": 2,
+        }
+    )
+
+    options = app.config["SQLALCHEMY_ENGINE_OPTIONS"]
+    assert options["pool_size"] == 4
+    assert options["max_overflow"] == 2
+    assert options["pool_recycle"] == 280
+    assert options["pool_pre_ping"] is False
+    with app.app_context():
+        assert isinstance(db.engine.pool, InstrumentedQueuePool)
+        assert db.engine.pool.size() == 4
+
+
+def test_sqlite_keeps_driver_pool_defaults():
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://"})
+
+    assert pool_engine_options(app, "sqlite://") == {}
+
+
+def test_pool_status_endpoint_reports_usage(tmp_path):
+    app = create_app(
+        {
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'pool.db'}",
+            "SQLALCHEMY_ENGINE_OPTIONS": {"poolclass": InstrumentedQueuePool, "pool_size": 2},
+        }
+    )
+    with app.app_context():
+        with db.engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+            status = app.test_client().get("/estado/pool").get_json()
+
+    assert status["pool"] == "InstrumentedQueuePool"
+    assert status["size"] == 2
+    assert status["checked_out"] == 1
+    assert status["connects"] == 1
+    assert status["checkouts"] >= 1
+    assert status["wait_seconds"]["count"] >= 1
@@ -0,0 +1,60 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+"""Verifica que el planificador de SQLite usa los índices de las rutas críticas."""
+from __future__ import annotations
+
+from datetime import date, datetime
+
+from sqlalchemy import text
+
+from backend.models import Customer, db
+from backend.services.aggregation_service import aggregate_statement
+from backend.services.customer_service import _customer_snapshot_statement
+from backend.services.history_service import _history_statement, encode_cursor
+from backend.services.summary_service import summary_select
+
+
+def _query_plan(statement) -> str:
+    compiled = statement.compile(db.engine, compile_kwargs={"literal_binds": True})
+    rows = db.session.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+    return "\n".join(row[-1] for row in rows)
+
+
+def test_snapshot_reads_summary_by_primary_key(app):
+    plan = _query_plan(_customer_snapshot_statement().where(Customer.external_id == "0001"))
+
+    assert "SEARCH customer_summaries USING INTEGER PRIMARY KEY" in plan
+    assert "consumptions" not in plan
+    assert "billings" not in plan
+
+
+def test_summary_refresh_uses_composite_indexes(app):
+    plan = _query_plan(summary_select(Customer.id == 1).params(summary_updated_at=datetime(2024, 6, 1)))
+
+    assert "ix_consumptions_customer_period_end" in plan
+    assert "ix_billings_customer_paid_amount" in plan
+    assert "COVERING INDEX ix_billings_customer_paid_amount" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_history_pages_walk_the_period_index(app):
+    cursor = encode_cursor(date(2024, 5, 31), 10)
+    plan = _query_plan(_history_statement(1, cursor).limit(51))
+
+    assert "ix_consumptions_customer_period_end" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_aggregation_scans_the_covering_period_indexes(app):
+    plan = _query_plan(aggregate_statement("mes", date(2024, 1, 1), date(2024, 12, 31)))
+
+    assert "COVERING INDEX ix_consumptions_period_start" in plan
+    assert "COVERING INDEX ix_consumptions_archive_period_start" in plan
+
+
+def test_history_with_archive_walks_both_period_indexes(app):
+    cursor = encode_cursor(date(2024, 5, 31), 10)
+    plan = _query_plan(_history_statement(1, cursor, include_archive=True).limit(51))
+
+    assert "ix_consumptions_customer_period_end" in plan
+    assert "ix_consumptions_archive_customer_period_end" in plan
@@ -0,0 +1,278 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+"""Pruebas del enrutado a la base de datos de respaldo y a las réplicas de lectura."""
+from __future__ import annotations
+
+import socket
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import create_engine, event, select, text
+
+from backend.app_factory import create_app
+from backend.models import Customer, db
+from backend.routing import CircuitBreaker, DatabaseRouter, Replica, ReplicaSet, get_router, replica_reads
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_circuit_breaker_opens_and_retries_after_timeout():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, retry_after=30, clock=clock)
+
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock.now = 29
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.now = 30
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.trips == 2
+
+
+def test_router_switches_to_fallback_and_back(tmp_path):
+    available = {"primary": False}
+    primary_path = tmp_path / "primary.sqlite3"
+
+    def connect_primary():
+        if not available["primary"]:
+            raise sqlite3.OperationalError("servidor no disponible")
+        return sqlite3.connect(primary_path)
+
+    primary = create_engine("sqlite://", creator=connect_primary)
+    fallback = create_engine(f"sqlite:///{tmp_path / 'fallback.sqlite3'}")
+    clock = FakeClock()
+    router = DatabaseRouter(primary, fallback, CircuitBreaker(retry_after=30, clock=clock))
+
+    assert router.active_engine() is fallback
+    assert router.status() == {"respaldo": {"estado": "open", "usa_respaldo": True, "aperturas": 1}}
+
+    available["primary"] = True
+    assert router.active_engine() is fallback
+    clock.now = 30
+    assert router.active_engine() is primary
+    assert router.breaker.state == CircuitBreaker.CLOSED
+
+    available["primary"] = False
+    primary.dispose()
+    with pytest.raises(Exception):
+        with primary.connect():
+            pass
+    assert router.active_engine() is fallback
+
+
+def test_create_app_does_not_probe_the_database(monkeypatch):
+    def fail_connection(*_args, **_kwargs):
+        raise AssertionError("create_app no debe abrir conexiones")
+
+    monkeypatch.setattr(socket, "create_connection", fail_connection)
+    started = time.perf_counter()
+    app = create_app(
+        {
+            "SQLALCHEMY_DATABASE_URI": "mysql+pymysql://u:p@10.255.255.1:3306/telcox",
+            "DB_FALLBACK_ENABLED": True,
+        }
+    )
+
+    assert time.perf_counter() - started < 0.5
+    assert app.config["SQLALCHEMY_DATABASE_URI"].startswith("mysql+pymysql://")
+    with app.app_context():
+        assert get_router().fallback.url.get_backend_name() == "sqlite"
+
+
+def test_requests_are_served_from_fallback_when_primary_is_down(tmp_path):
+    app = create_app(
+        {
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": "mysql+pymysql://u:p@127.0.0.1:1/telcox",
+            "DEFAULT_SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'fallback.sqlite3'}",
+            "DB_FALLBACK_ENABLED": True,
+        }
+    )
+    with app.app_context():
+        db.metadata.create_all(get_router().fallback)
+
+    response = app.test_client().get("/api/consumo", query_string={"customer_id": "0001"})
+
+    assert response.status_code == 404
+    with app.app_context():
+        assert get_router().status()["respaldo"]["usa_respaldo"] is True
+        assert db.session.execute(text("select 1")).scalar() == 1
+    assert app.test_client().get("/estado/pool").get_json()["respaldo"]["estado"] == "open"
+
+
+def test_fallback_is_not_configured_in_production():
+    app = create_app(
+        {
+            "SQLALCHEMY_DATABASE_URI": "mysql+pymysql://u:p@db.invalid/telcox",
+            "FLASK_ENV": "production",
+        }
+    )
+
+    with app.app_context():
+        assert get_router() is None
+
+
+def _database_file(path, full_name: str) -> str:
+    """Crea una base SQLite con el esquema y un único cliente ``0001``."""
+    uri = f"sqlite:///{path}"
+    engine = create_engine(uri)
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(Customer.__table__.insert(), {"external_id": "0001", "full_name": full_name})
+    engine.dispose()
+    return uri
+
+
+def _replica_app(tmp_path, **config):
+    return create_app(
+        {
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": _database_file(tmp_path / "primary.sqlite3", "Primario"),
+            "CUSTOMER_CACHE_ENABLED": False,
+            **config,
+        }
+    )
+
+
+def _served_names(app, requests: int = 4):
+    client = app.test_client()
+    return [
+        client.get("/api/cliente", query_string={"customer_id": "0001"}).get_json()["nombre"]
+        for _ in range(requests)
+    ]
+
+
+def test_reads_rotate_across_replicas(tmp_path):
+    app = _replica_app(
+        tmp_path,
+        DB_REPLICA_URIS=",".join(
+            [
+                _database_file(tmp_path / "replica-a.sqlite3", "Réplica A"),
+                _database_file(tmp_path / "replica-b.sqlite3", "Réplica B"),
+            ]
+        ),
+    )
+
+    assert _served_names(app) == ["Réplica A", "Réplica B", "Réplica A", "Réplica B"]
+    with app.app_context():
+        assert [replica["estado"] for replica in get_router().status()["replicas"]] == ["closed", "closed"]
+
+
+def test_unavailable_or_lagging_replicas_fall_back_to_primary(tmp_path):
+    broken_uri = f"sqlite:///{tmp_path / 'missing' / 'replica.sqlite3'}"
+    app = _replica_app(tmp_path, DB_REPLICA_URIS=[broken_uri])
+
+    assert _served_names(app, 2) == ["Primario", "Primario"]
+    with app.app_context():
+        assert get_router().status()["replicas"][0]["estado"] == "open"
+
+    lagging_engine = create_engine(_database_file(tmp_path / "lagging.sqlite3", "Réplica"))
+    lagging = Replica(lagging_engine, max_lag=10, lag_probe=lambda _engine: 60)
+    assert ReplicaSet([lagging]).choose() is None
+    lagging.max_lag = 120
+    assert lagging.lag_ok() is True
+
+
+def test_least_connections_prefers_idle_replica(tmp_path):
+    busy = Replica(create_engine(_database_file(tmp_path / "busy.sqlite3", "Ocupada")))
+    idle = Replica(create_engine(_database_file(tmp_path / "idle.sqlite3", "Libre")))
+    replicas = ReplicaSet([busy, idle], strategy="least_connections")
+
+    with busy.engine.connect():
+        assert busy.in_use == 1
+        assert {replicas.choose() for _ in range(3)} == {idle.engine}
+
+
+def test_reads_after_writes_stay_on_primary(tmp_path):
+    app = _replica_app(
+        tmp_path, DB_REPLICA_URIS=[_database_file(tmp_path / "replica.sqlite3", "Réplica")]
+    )
+
+    with app.app_context():
+        customer = db.session.execute(select(Customer).where(Customer.external_id == "0001")).scalar_one()
+        customer.full_name = "Primario actualizado"
+        db.session.flush()
+        with replica_reads():
+            assert db.session.execute(select(Customer.full_name)).scalar_one() == "Primario actualizado"
+        db.session.rollback()
+
+        with replica_reads():
+            assert db.session.execute(select(Customer.full_name)).scalar_one() == "Réplica"
+
+
+def test_probe_waiters_give_up_after_probe_wait(tmp_path):
+    primary = create_engine(f"sqlite:///{tmp_path / 'primary.sqlite3'}")
+    fallback = create_engine(f"sqlite:///{tmp_path / 'fallback.sqlite3'}")
+    router = DatabaseRouter(primary, fallback, CircuitBreaker(clock=FakeClock()), probe_wait=0.1)
+
+    router._probe_lock.acquire()
+    try:
+        started = time.perf_counter()
+        assert router.active_engine() is fallback
+        assert time.perf_counter() - started < 0.5
+    finally:
+        router._probe_lock.release()
+
+    assert router.active_engine() is primary
+
+
+def test_concurrent_requests_wait_for_the_primary_probe(tmp_path):
+    primary_path = tmp_path / "primary.sqlite3"
+    probing = threading.Event()
+    release = threading.Event()
+    connections = []
+
+    def connect_primary():
+        connections.append(threading.current_thread().name)
+        if len(connections) == 1:
+            probing.set()
+            release.wait(5)
+        return sqlite3.connect(primary_path, check_same_thread=False)
+
+    primary = create_engine("sqlite://", creator=connect_primary)
+    fallback = create_engine(f"sqlite:///{tmp_path / 'fallback.sqlite3'}")
+    router = DatabaseRouter(primary, fallback, CircuitBreaker(clock=FakeClock()))
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = [executor.submit(router.active_engine) for _ in range(8)]
+        assert probing.wait(5)
+        time.sleep(0.1)
+        assert not any(result.done() for result in results)
+        release.set()
+        engines = [result.result(timeout=5) for result in results]
+
+    assert all(engine is primary for engine in engines)
+    assert len(connections) == 1
+    assert router.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_probe_uses_short_connect_timeout():
+    pymysql = pytest.importorskip("pymysql")
+    primary = create_engine("mysql+pymysql://u:p@10.255.255.1:3306/telcox")
+    fallback = create_engine("sqlite://")
+    router = DatabaseRouter(primary, fallback, CircuitBreaker(clock=FakeClock()), probe_timeout=0.5)
+    seen = []
+
+    @event.listens_for(primary, "do_connect")
+    def refuse(dialect, connection_record, cargs, cparams):
+        seen.append(cparams.get("connect_timeout"))
+        raise pymysql.err.OperationalError(2003, "servidor no disponible")
+
+    assert router.active_engine() is fallback
+    assert seen == [0.5]
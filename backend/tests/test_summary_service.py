@@ -0,0 +1,100 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+"""Pruebas del mantenimiento incremental de ``customer_summaries``."""
+from __future__ import annotations
+
+from datetime import date
+from decimal import Decimal
+
+from backend.models import Billing, Consumption, Customer, CustomerSummary, db
+from backend.services.summary_service import rebuild_customer_summaries, summary_select
+
+
+def _summary(external_id: str) -> CustomerSummary:
+    customer = db.session.query(Customer).filter_by(external_id=external_id).one()
+    summary = db.session.get(CustomerSummary, customer.id)
+    db.session.expire_all()
+    return summary
+
+
+def test_summary_is_created_with_orm_inserts(sample_customer):
+    summary = _summary(sample_customer)
+
+    assert summary.data_used_mb == 1024.0
+    assert summary.voice_minutes == 120.0
+    assert summary.latest_period_end == date(2024, 5, 31)
+    assert summary.outstanding_balance == Decimal("15.50")
+    assert summary.billing_count == 1
+
+
+def test_summary_follows_updates_and_deletes(sample_customer):
+    billing = db.session.query(Billing).one()
+    billing.paid = True
+    db.session.commit()
+    assert _summary(sample_customer).outstanding_balance == Decimal("0")
+
+    db.session.delete(db.session.query(Consumption).one())
+    db.session.commit()
+    summary = _summary(sample_customer)
+    assert summary.latest_consumption_id is None
+    assert summary.data_used_mb is None
+
+
+def test_summary_moves_records_between_customers(sample_customer):
+    other = Customer(external_id="0002", full_name="Luis Gómez")
+    db.session.add(other)
+    db.session.flush()
+
+    db.session.query(Billing).one().customer_id = other.id
+    db.session.commit()
+
+    assert _summary(sample_customer).outstanding_balance == Decimal("0")
+    assert _summary("0002").outstanding_balance == Decimal("15.50")
+
+
+def test_rebuild_backfills_rows_written_outside_the_orm(app, sample_customer):
+    customer = db.session.query(Customer).filter_by(external_id=sample_customer).one()
+    db.session.execute(
+        Consumption.__table__.insert(),
+        [
+            {
+                "customer_id": customer.id,
+                "period_start": date(2024, 6, 1),
+                "period_end": date(2024, 6, 30),
+                "data_used_mb": 2048.0,
+                "voice_minutes": 30.0,
+            }
+        ],
+    )
+    db.session.execute(CustomerSummary.__table__.delete())
+    db.session.commit()
+
+    with db.engine.connect() as connection:
+        assert rebuild_customer_summaries(connection, batch_size=1) == 1
+
+    summary = _summary(sample_customer)
+    assert summary.data_used_mb == 2048.0
+    assert summary.outstanding_balance == Decimal("15.50")
+
+
+def test_latest_consumption_prefers_the_recent_window_and_falls_back(app, sample_customer):
+    customer = db.session.query(Customer).filter_by(external_id=sample_customer).one()
+    db.session.add(
+        Consumption(
+            customer_id=customer.id,
+            period_start=date(2024, 6, 1),
+            period_end=date(2024, 6, 30),
+            data_used_mb=2048.0,
+            voice_minutes=30.0,
+        )
+    )
+    db.session.commit()
+
+    with db.engine.connect() as connection:
+        recent, fallback = (
+            connection.execute(summary_select(Customer.id == customer.id, since=since), {"summary_updated_at": None}).one()
+            for since in (date(2024, 6, 1), date(2025, 1, 1))
+        )
+
+    assert recent.period_end == fallback.period_end == date(2024, 6, 30)
+    assert recent.data_used_mb == fallback.data_used_mb == 2048.0
@@ -0,0 +1,39 @@
+# Author: Ing. Jigson Contreras
+# Email: supercontreras-ji@hotmail.com
+"""Punto de entrada WSGI para servidores de producción.
+
+Con ``preload_app`` gunicorn importa este módulo una sola vez en el proceso
+maestro, de modo que ``create_app`` y los modelos se cargan antes del ``fork``
+y los workers comparten esas páginas de memoria::
+
+    gunicorn --config gunicorn_conf.py backend.wsgi:app
+"""
+from __future__ import annotations
+
+from flask import Flask
+
+from backend.app_factory import create_app
+from backend.models import db
+from backend.routing import get_router
+
+
+def dispose_engines(app: Flask) -> None:
+    """Descarta las conexiones heredadas del proceso padre tras un ``fork``.
+
+    ``close=False`` deja intactos los sockets del padre y crea un pool vacío,
+    así cada worker abre sus propias conexiones.
+    """
+
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+        router = get_router()
+        if router is not None:
+            for engine in router.engines():
+                engine.dispose(close=False)
+
+
+app = create_app()
+
+
+__all__ = ["app", "dispose_engines"]
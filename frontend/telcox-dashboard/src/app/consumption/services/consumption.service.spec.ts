@@ -61,7 +61,7 @@ describe('ConsumptionService', () => {
     request.flush(mockConsumption);
   });
 
-  it('should merge profile and consumption data for the dashboard', () => {
+  it('should request the combined dashboard endpoint', () => {
     const mockProfile: CustomerProfile = {
       cliente_id: '0003',
       nombre: 'María López',
@@ -82,22 +82,12 @@ describe('ConsumptionService', () => {
       });
     });
 
-    const profileRequest = httpMock.expectOne('http://localhost:5000/api/cliente?customer_id=0003');
-    const consumptionRequest = httpMock.expectOne('http://localhost:5000/api/consumo?customer_id=0003');
-
-    profileRequest.flush(mockProfile);
-    consumptionRequest.flush(mockConsumption);
+    const request = httpMock.expectOne('http://localhost:5000/api/dashboard?customer_id=0003');
+    expect(request.request.method).toBe('GET');
+    request.flush({ perfil: mockProfile, consumo: mockConsumption });
   });
 
-  it('should propagate errors when one of the API calls fails', () => {
-    const mockProfile: CustomerProfile = {
-      cliente_id: '0004',
-      nombre: 'Cliente Demo',
-      saldo: 10,
-      consumo_mb: 100,
-      minutos: 20
-    };
-
+  it('should propagate errors when the dashboard call fails', () => {
     service.getDashboardData('0004').subscribe({
       next: () => fail('La llamada debería haber fallado'),
       error: (error) => {
@@ -105,11 +95,8 @@ describe('ConsumptionService', () => {
       }
     });
 
-    const profileRequest = httpMock.expectOne('http://localhost:5000/api/cliente?customer_id=0004');
-    const consumptionRequest = httpMock.expectOne('http://localhost:5000/api/consumo?customer_id=0004');
-
-    profileRequest.flush(mockProfile);
-    consumptionRequest.flush(
+    const request = httpMock.expectOne('http://localhost:5000/api/dashboard?customer_id=0004');
+    request.flush(
       { mensaje: 'Fallo del servicio' },
       { status: 500, statusText: 'Server Error' }
     );
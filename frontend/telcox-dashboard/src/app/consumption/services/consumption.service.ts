@@ -2,7 +2,7 @@
 // Email: supercontreras-ji@hotmail.com
 import { Injectable } from '@angular/core';
 import { HttpClient, HttpParams } from '@angular/common/http';
-import { Observable, forkJoin, map } from 'rxjs';
+import { Observable, map } from 'rxjs';
 
 import { environment } from '../../../environments/environment';
 
@@ -25,6 +25,11 @@ export interface DashboardData {
   consumption: ConsumptionSummary;
 }
 
+interface DashboardResponse {
+  perfil: CustomerProfile;
+  consumo: ConsumptionSummary;
+}
+
 @Injectable({ providedIn: 'root' })
 export class ConsumptionService {
   private readonly apiUrl = environment.apiUrl;
@@ -42,16 +47,14 @@ export class ConsumptionService {
   }
 
   getDashboardData(customerId: string): Observable<DashboardData> {
-    return forkJoin({
-      profile: this.getCustomerProfile(customerId),
-      consumption: this.getConsumption(customerId)
-    }).pipe(
-      map(({ profile, consumption }) => ({
-        profile,
+    const params = new HttpParams().set('customer_id', customerId);
+    return this.http.get<DashboardResponse>(`${this.apiUrl}/api/dashboard`, { params }).pipe(
+      map(({ perfil, consumo }) => ({
+        profile: perfil,
         consumption: {
-          cliente_id: consumption.cliente_id,
-          consumo_mb: consumption.consumo_mb,
-          minutos: consumption.minutos
+          cliente_id: consumo.cliente_id,
+          consumo_mb: consumo.consumo_mb,
+          minutos: consumo.minutos
         }
       }))
     );